@@ -0,0 +1,43 @@
+"""add embedding cache table
+
+Revision ID: a3c1e9d27b40
+Revises: 54f3af073585
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a3c1e9d27b40"
+down_revision = "54f3af073585"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        op.f("ix_embedding_cache_last_used_at"),
+        "embedding_cache",
+        ["last_used_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_embedding_cache_last_used_at"), table_name="embedding_cache")
+    op.drop_table("embedding_cache")
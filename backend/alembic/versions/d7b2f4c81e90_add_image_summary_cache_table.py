@@ -0,0 +1,45 @@
+"""add image summary cache table
+
+Revision ID: d7b2f4c81e90
+Revises: a3c1e9d27b40
+Create Date: 2026-10-18 13:41:07.562390
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d7b2f4c81e90"
+down_revision = "a3c1e9d27b40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_summary_cache",
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        op.f("ix_image_summary_cache_last_used_at"),
+        "image_summary_cache",
+        ["last_used_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_image_summary_cache_last_used_at"), table_name="image_summary_cache"
+    )
+    op.drop_table("image_summary_cache")
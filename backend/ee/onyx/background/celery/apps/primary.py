@@ -1,12 +1,19 @@
+from datetime import datetime
+
 from ee.onyx.background.celery_utils import should_perform_chat_ttl_check
 from ee.onyx.background.task_name_builders import name_chat_ttl_task
+from ee.onyx.background.task_name_builders import name_query_history_export_task
+from ee.onyx.server.query_history.export import write_query_history_csv
 from ee.onyx.server.reporting.usage_export_generation import create_new_usage_report
 from onyx.background.celery.apps.primary import celery_app
 from onyx.background.task_utils import build_celery_task_wrapper
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.constants import OnyxCeleryTask
 from onyx.db.chat import delete_chat_session
 from onyx.db.chat import get_chat_sessions_older_than
 from onyx.db.engine import get_session_with_current_tenant
+from onyx.db.tasks import mark_task_finished
+from onyx.db.tasks import mark_task_start
 from onyx.server.settings.store import load_settings
 from onyx.utils.logger import setup_logger
 
@@ -41,6 +48,40 @@ def perform_ttl_management_task(retention_limit_days: int, *, tenant_id: str) ->
                 )
 
 
+@celery_app.task(
+    name=OnyxCeleryTask.EXPORT_QUERY_HISTORY_TASK,
+    ignore_result=True,
+    soft_time_limit=JOB_TIMEOUT,
+)
+def export_query_history_task(
+    start: str, end: str, file_name: str, *, tenant_id: str
+) -> None:
+    """Writes the query history CSV into the file store. The task row is registered
+    by the API when the export is requested, see /admin/query-history/start-export"""
+    task_name = name_query_history_export_task(file_name)
+    with get_session_with_current_tenant() as db_session:
+        mark_task_start(task_name=task_name, db_session=db_session)
+
+    success = False
+    try:
+        with get_session_with_current_tenant() as db_session:
+            write_query_history_csv(
+                db_session=db_session,
+                start=datetime.fromisoformat(start),
+                end=datetime.fromisoformat(end),
+                file_name=file_name,
+            )
+        success = True
+    except Exception:
+        logger.exception(f"Query history export failed: file_name={file_name}")
+        raise
+    finally:
+        with get_session_with_current_tenant() as db_session:
+            mark_task_finished(
+                task_name=task_name, db_session=db_session, success=success
+            )
+
+
 #####
 # Periodic Tasks
 #####
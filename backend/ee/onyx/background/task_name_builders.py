@@ -1,2 +1,6 @@
 def name_chat_ttl_task(retention_limit_days: int, tenant_id: str | None = None) -> str:
     return f"chat_ttl_{retention_limit_days}_days"
+
+
+def name_query_history_export_task(file_name: str) -> str:
+    return f"query_history_export_{file_name}"
@@ -85,6 +85,20 @@ SLACK_PERMISSION_DOC_SYNC_FREQUENCY = int(
     os.environ.get("SLACK_PERMISSION_DOC_SYNC_FREQUENCY") or 5 * 60
 )
 
+# Post query censoring
+# In seconds, how long the set of sources with censoring enabled is cached for
+CENSORING_ENABLED_SOURCES_CACHE_TTL = int(
+    os.environ.get("CENSORING_ENABLED_SOURCES_CACHE_TTL") or 60
+)
+# In seconds, how long a user's access to a Salesforce object is cached for. This is
+# how long a permission change in Salesforce can take to show up in search results
+SALESFORCE_OBJECT_ACCESS_CACHE_TTL = int(
+    os.environ.get("SALESFORCE_OBJECT_ACCESS_CACHE_TTL") or 5 * 60
+)
+SALESFORCE_OBJECT_ACCESS_CACHE_MAX_ENTRIES = int(
+    os.environ.get("SALESFORCE_OBJECT_ACCESS_CACHE_MAX_ENTRIES") or 100_000
+)
+
 # The posthog client does not accept empty API keys or hosts however it fails silently
 # when the capture is called. These defaults prevent Posthog issues from breaking the Onyx app
 POSTHOG_API_KEY = os.environ.get("POSTHOG_API_KEY") or "FooBar"
@@ -1,11 +1,14 @@
+from collections.abc import Generator
 from collections.abc import Sequence
 from datetime import datetime
+from uuid import UUID
 
 from sqlalchemy import asc
 from sqlalchemy import BinaryExpression
 from sqlalchemy import ColumnElement
 from sqlalchemy import desc
 from sqlalchemy import distinct
+from sqlalchemy import tuple_
 from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
 from sqlalchemy.orm import Session
@@ -171,3 +174,58 @@ def fetch_chat_sessions_eagerly_by_time(
     chat_sessions = query.all()
 
     return chat_sessions
+
+
+def fetch_chat_sessions_by_time_page(
+    start: datetime,
+    end: datetime,
+    db_session: Session,
+    page_size: int,
+    after: tuple[datetime, UUID] | None = None,
+) -> list[ChatSession]:
+    """Sorted by oldest to newest. Messages are not loaded. `after` is the
+    (time_created, id) of the last session of the previous page, so pages stay
+    cheap to fetch no matter how deep into the range they are."""
+    stmt = (
+        select(ChatSession)
+        .where(ChatSession.time_created.between(start, end))
+        .options(
+            joinedload(ChatSession.user),
+            joinedload(ChatSession.persona),
+        )
+        .order_by(asc(ChatSession.time_created), asc(ChatSession.id))
+        .limit(page_size)
+    )
+
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(ChatSession.time_created, ChatSession.id) > tuple_(*after)
+        )
+
+    return list(db_session.scalars(stmt).unique().all())
+
+
+def fetch_chat_session_pages_by_time(
+    start: datetime,
+    end: datetime,
+    db_session: Session,
+    page_size: int,
+) -> Generator[list[ChatSession], None, None]:
+    after: tuple[datetime, UUID] | None = None
+    while True:
+        chat_sessions = fetch_chat_sessions_by_time_page(
+            start=start,
+            end=end,
+            db_session=db_session,
+            page_size=page_size,
+            after=after,
+        )
+        if not chat_sessions:
+            return
+
+        yield chat_sessions
+
+        if len(chat_sessions) < page_size:
+            return
+
+        after = (chat_sessions[-1].time_created, chat_sessions[-1].id)
@@ -1,5 +1,7 @@
 import time
 
+from ee.onyx.configs.app_configs import SALESFORCE_OBJECT_ACCESS_CACHE_MAX_ENTRIES
+from ee.onyx.configs.app_configs import SALESFORCE_OBJECT_ACCESS_CACHE_TTL
 from ee.onyx.db.external_perm import fetch_external_groups_for_user_email_and_group_ids
 from ee.onyx.external_permissions.salesforce.utils import (
     get_any_salesforce_client_for_doc_id,
@@ -12,6 +14,8 @@ from onyx.configs.app_configs import BLURB_SIZE
 from onyx.context.search.models import InferenceChunk
 from onyx.db.engine import get_session_context_manager
 from onyx.utils.logger import setup_logger
+from onyx.utils.ttl_cache import TTLCache
+from shared_configs.contextvars import get_current_tenant_id
 
 logger = setup_logger()
 
@@ -20,6 +24,12 @@ logger = setup_logger()
 ChunkKey = tuple[str, int]  # (doc_id, chunk_id)
 ContentRange = tuple[int, int | None]  # (start_index, end_index) None means to the end
 
+# (tenant_id, user_email, object_id) -> whether the user can read the object
+_OBJECT_ACCESS_CACHE: TTLCache[tuple[str, str, str], bool] = TTLCache(
+    maxsize=SALESFORCE_OBJECT_ACCESS_CACHE_MAX_ENTRIES,
+    ttl=SALESFORCE_OBJECT_ACCESS_CACHE_TTL,
+)
+
 
 # NOTE: Used for testing timing
 def _get_dummy_object_access_map(
@@ -40,7 +50,23 @@ def _get_objects_access_for_user_email_from_salesforce(
     """
     This function wraps the salesforce call as we may want to change how this
     is done in the future. (E.g. replace it with the above function)
+
+    Access is cached per user and object for SALESFORCE_OBJECT_ACCESS_CACHE_TTL
+    seconds, Salesforce is only asked about the objects that aren't cached.
     """
+    tenant_id = get_current_tenant_id()
+    object_id_to_access: dict[str, bool] = {}
+    uncached_object_ids: set[str] = set()
+    for object_id in object_ids:
+        access = _OBJECT_ACCESS_CACHE.get((tenant_id, user_email, object_id))
+        if access is None:
+            uncached_object_ids.add(object_id)
+        else:
+            object_id_to_access[object_id] = access
+
+    if not uncached_object_ids:
+        return object_id_to_access
+
     # This is cached in the function so the first query takes an extra 0.1-0.3 seconds
     # but subsequent queries for this source are essentially instant
     first_doc_id = chunks[0].document_id
@@ -61,11 +87,13 @@ def _get_objects_access_for_user_email_from_salesforce(
         logger.warning(f"User '{user_email}' not found in Salesforce")
         return None
 
-    # This is the only query that is not cached in the function
-    # so it takes 0.1-0.2 seconds total
-    object_id_to_access = get_objects_access_for_user_id(
-        salesforce_client, user_id, list(object_ids)
+    # This takes 0.1-0.2 seconds total, so its results are cached above
+    fetched_object_id_to_access = get_objects_access_for_user_id(
+        salesforce_client, user_id, list(uncached_object_ids)
     )
+    for object_id, access in fetched_object_id_to_access.items():
+        _OBJECT_ACCESS_CACHE.set((tenant_id, user_email, object_id), access)
+    object_id_to_access.update(fetched_object_id_to_access)
     logger.debug(f"Object ID to access: {object_id_to_access}")
     return object_id_to_access
 
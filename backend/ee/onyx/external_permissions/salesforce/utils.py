@@ -117,6 +117,8 @@ def get_objects_access_for_user_id(
     4 unique objects).
     If we decide this isn't acceptable we can use multiple queries but they
     should be in parallel so query time doesn't get too long.
+
+    Every queried record id is in the returned map.
     """
     truncated_record_ids = record_ids[:_MAX_RECORD_IDS_PER_QUERY]
     record_ids_str = "'" + "','".join(truncated_record_ids) + "'"
@@ -127,7 +129,12 @@ def get_objects_access_for_user_id(
     AND UserId = '{user_id}'
     """
     result = salesforce_client.query_all(access_query)
-    return {record["RecordId"]: record["HasReadAccess"] for record in result["records"]}
+    # records the user has no access to at all may not be returned
+    object_id_to_access = {record_id: False for record_id in truncated_record_ids}
+    object_id_to_access.update(
+        {record["RecordId"]: record["HasReadAccess"] for record in result["records"]}
+    )
+    return object_id_to_access
 
 
 _CC_PAIR_ID_SALESFORCE_CLIENT_MAP: dict[int, Salesforce] = {}
@@ -1,5 +1,6 @@
-import csv
-import io
+import itertools
+import uuid
+from collections.abc import Generator
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
@@ -12,34 +13,41 @@ from fastapi import Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ee.onyx.db.query_history import fetch_chat_sessions_eagerly_by_time
+from ee.onyx.background.task_name_builders import name_query_history_export_task
 from ee.onyx.db.query_history import get_page_of_chat_sessions
 from ee.onyx.db.query_history import get_total_filtered_chat_sessions_count
+from ee.onyx.server.query_history.export import fetch_chat_session_snapshots
+from ee.onyx.server.query_history.export import ONYX_ANONYMIZED_EMAIL
+from ee.onyx.server.query_history.export import stream_query_history_csv
 from ee.onyx.server.query_history.models import ChatSessionMinimal
 from ee.onyx.server.query_history.models import ChatSessionSnapshot
-from ee.onyx.server.query_history.models import MessageSnapshot
-from ee.onyx.server.query_history.models import QuestionAnswerPairSnapshot
+from ee.onyx.server.query_history.models import QueryHistoryExport
 from onyx.auth.users import current_admin_user
-from onyx.auth.users import get_display_email
+from onyx.background.celery.versioned_apps.client import app as client_app
 from onyx.chat.chat_utils import create_chat_chain
 from onyx.configs.app_configs import ONYX_QUERY_HISTORY_TYPE
-from onyx.configs.constants import MessageType
+from onyx.configs.constants import OnyxCeleryPriority
+from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import QAFeedbackType
 from onyx.configs.constants import QueryHistoryType
-from onyx.configs.constants import SessionType
 from onyx.db.chat import get_chat_session_by_id
 from onyx.db.chat import get_chat_sessions_by_user
 from onyx.db.engine import get_session
+from onyx.db.engine import get_session_with_current_tenant
+from onyx.db.enums import TaskStatus
 from onyx.db.models import ChatSession
 from onyx.db.models import User
+from onyx.db.tasks import get_latest_task
+from onyx.db.tasks import register_task
+from onyx.file_store.constants import STANDARD_CHUNK_SIZE
+from onyx.file_store.file_store import get_default_file_store
 from onyx.server.documents.models import PaginatedReturn
 from onyx.server.query_and_chat.models import ChatSessionDetails
 from onyx.server.query_and_chat.models import ChatSessionsResponse
+from shared_configs.contextvars import get_current_tenant_id
 
 router = APIRouter()
 
-ONYX_ANONYMIZED_EMAIL = "anonymous@anonymous.invalid"
-
 
 def fetch_and_process_chat_session_history(
     db_session: Session,
@@ -48,34 +56,20 @@ def fetch_and_process_chat_session_history(
     feedback_type: QAFeedbackType | None,
     limit: int | None = 500,
 ) -> list[ChatSessionSnapshot]:
-    # observed to be slow a scale of 8192 sessions and 4 messages per session
-
-    # this is a little slow (5 seconds)
-    chat_sessions = fetch_chat_sessions_eagerly_by_time(
-        start=start, end=end, db_session=db_session, limit=limit
+    snapshots = fetch_chat_session_snapshots(
+        db_session=db_session, start=start, end=end
     )
 
-    # this is VERY slow (80 seconds) due to create_chat_chain being called
-    # for each session. Needs optimizing.
-    chat_session_snapshots = [
-        snapshot_from_chat_session(chat_session=chat_session, db_session=db_session)
-        for chat_session in chat_sessions
-    ]
-
-    valid_snapshots = [
-        snapshot for snapshot in chat_session_snapshots if snapshot is not None
-    ]
-
     if feedback_type:
-        valid_snapshots = [
+        snapshots = (
             snapshot
-            for snapshot in valid_snapshots
+            for snapshot in snapshots
             if any(
                 message.feedback_type == feedback_type for message in snapshot.messages
             )
-        ]
+        )
 
-    return valid_snapshots
+    return list(itertools.islice(snapshots, limit))
 
 
 def snapshot_from_chat_session(
@@ -91,24 +85,7 @@ def snapshot_from_chat_session(
     except RuntimeError:
         return None
 
-    flow_type = SessionType.SLACK if chat_session.onyxbot_flow else SessionType.CHAT
-
-    return ChatSessionSnapshot(
-        id=chat_session.id,
-        user_email=get_display_email(
-            chat_session.user.email if chat_session.user else None
-        ),
-        name=chat_session.description,
-        messages=[
-            MessageSnapshot.build(message)
-            for message in messages
-            if message.message_type != MessageType.SYSTEM
-        ],
-        assistant_id=chat_session.persona_id,
-        assistant_name=chat_session.persona.name if chat_session.persona else None,
-        time_created=chat_session.time_created,
-        flow_type=flow_type,
-    )
+    return ChatSessionSnapshot.build(chat_session, messages)
 
 
 @router.get("/admin/chat-sessions")
@@ -238,52 +215,120 @@ def get_chat_session_admin(
     return snapshot
 
 
+def _check_query_history_enabled() -> None:
+    if ONYX_QUERY_HISTORY_TYPE == QueryHistoryType.DISABLED:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail="Query history has been disabled by the administrator.",
+        )
+
+
 @router.get("/admin/query-history-csv")
 def get_query_history_as_csv(
     _: User | None = Depends(current_admin_user),
     start: datetime | None = None,
     end: datetime | None = None,
-    db_session: Session = Depends(get_session),
 ) -> StreamingResponse:
-    if ONYX_QUERY_HISTORY_TYPE == QueryHistoryType.DISABLED:
+    _check_query_history_enabled()
+
+    start = start or datetime.fromtimestamp(0, tz=timezone.utc)
+    end = end or datetime.now(tz=timezone.utc)
+
+    def generate_csv() -> Generator[str, None, None]:
+        # the request scoped session is closed before the response is streamed,
+        # so the export gets its own
+        with get_session_with_current_tenant() as db_session:
+            yield from stream_query_history_csv(
+                db_session=db_session, start=start, end=end
+            )
+
+    return StreamingResponse(
+        generate_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment;filename=onyx_query_history.csv"},
+    )
+
+
+@router.post("/admin/query-history/start-export")
+def start_query_history_export(
+    _: User | None = Depends(current_admin_user),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    db_session: Session = Depends(get_session),
+) -> QueryHistoryExport:
+    """Generates the query history CSV in the background, for exports too large to
+    be streamed within a single request"""
+    _check_query_history_enabled()
+
+    start = start or datetime.fromtimestamp(0, tz=timezone.utc)
+    end = end or datetime.now(tz=timezone.utc)
+    file_name = f"query_history_{uuid.uuid4().hex}.csv"
+
+    register_task(name_query_history_export_task(file_name), db_session)
+    client_app.send_task(
+        OnyxCeleryTask.EXPORT_QUERY_HISTORY_TASK,
+        kwargs={
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "file_name": file_name,
+            "tenant_id": get_current_tenant_id(),
+        },
+        priority=OnyxCeleryPriority.MEDIUM,
+    )
+
+    return QueryHistoryExport(file_name=file_name, status=TaskStatus.PENDING)
+
+
+@router.get("/admin/query-history/export-status")
+def get_query_history_export_status(
+    file_name: str,
+    _: User | None = Depends(current_admin_user),
+    db_session: Session = Depends(get_session),
+) -> QueryHistoryExport:
+    _check_query_history_enabled()
+
+    task = get_latest_task(name_query_history_export_task(file_name), db_session)
+    if task is None:
         raise HTTPException(
-            status_code=HTTPStatus.FORBIDDEN,
-            detail="Query history has been disabled by the administrator.",
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=f"No query history export found for '{file_name}'",
         )
 
-    # this call is very expensive and is timing out via endpoint
-    # TODO: optimize call and/or generate via background task
-    complete_chat_session_history = fetch_and_process_chat_session_history(
-        db_session=db_session,
-        start=start or datetime.fromtimestamp(0, tz=timezone.utc),
-        end=end or datetime.now(tz=timezone.utc),
-        feedback_type=None,
-        limit=None,
-    )
+    status = task.status
+    if status == TaskStatus.PENDING and task.start_time is not None:
+        status = TaskStatus.STARTED
+
+    return QueryHistoryExport(file_name=file_name, status=status)
 
-    question_answer_pairs: list[QuestionAnswerPairSnapshot] = []
-    for chat_session_snapshot in complete_chat_session_history:
-        if ONYX_QUERY_HISTORY_TYPE == QueryHistoryType.ANONYMIZED:
-            chat_session_snapshot.user_email = ONYX_ANONYMIZED_EMAIL
 
-        question_answer_pairs.extend(
-            QuestionAnswerPairSnapshot.from_chat_session_snapshot(chat_session_snapshot)
+@router.get("/admin/query-history/download")
+def download_query_history_export(
+    file_name: str,
+    _: User | None = Depends(current_admin_user),
+    db_session: Session = Depends(get_session),
+) -> StreamingResponse:
+    _check_query_history_enabled()
+
+    task = get_latest_task(name_query_history_export_task(file_name), db_session)
+    if task is None or task.status != TaskStatus.SUCCESS:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail=f"Query history export '{file_name}' is not ready",
         )
 
-    # Create an in-memory text stream
-    stream = io.StringIO()
-    writer = csv.DictWriter(
-        stream, fieldnames=list(QuestionAnswerPairSnapshot.model_fields.keys())
+    file = get_default_file_store(db_session).read_file(
+        file_name=file_name, mode="b", use_tempfile=True
     )
-    writer.writeheader()
-    for row in question_answer_pairs:
-        writer.writerow(row.to_json())
 
-    # Reset the stream's position to the start
-    stream.seek(0)
+    def iterfile() -> Generator[bytes, None, None]:
+        while True:
+            chunk = file.read(STANDARD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
 
     return StreamingResponse(
-        iter([stream.getvalue()]),
+        content=iterfile(),
         media_type="text/csv",
-        headers={"Content-Disposition": "attachment;filename=onyx_query_history.csv"},
+        headers={"Content-Disposition": f"attachment;filename={file_name}"},
     )
@@ -0,0 +1,129 @@
+import csv
+import io
+import tempfile
+from collections import defaultdict
+from collections.abc import Generator
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from ee.onyx.db.query_history import fetch_chat_session_pages_by_time
+from ee.onyx.server.query_history.models import ChatSessionSnapshot
+from ee.onyx.server.query_history.models import QuestionAnswerPairSnapshot
+from onyx.chat.chat_utils import build_chat_chain
+from onyx.configs.app_configs import ONYX_QUERY_HISTORY_TYPE
+from onyx.configs.constants import FileOrigin
+from onyx.configs.constants import QueryHistoryType
+from onyx.db.chat import get_chat_messages_by_sessions
+from onyx.db.models import ChatMessage
+from onyx.file_store.constants import MAX_IN_MEMORY_SIZE
+from onyx.file_store.file_store import get_default_file_store
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+ONYX_ANONYMIZED_EMAIL = "anonymous@anonymous.invalid"
+
+# number of chat sessions whose messages are fetched with a single query
+EXPORT_SESSIONS_PER_PAGE = 500
+
+# CSV rows are buffered until there is at least this much to send
+_CSV_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def fetch_chat_session_snapshots(
+    db_session: Session,
+    start: datetime,
+    end: datetime,
+    page_size: int = EXPORT_SESSIONS_PER_PAGE,
+) -> Generator[ChatSessionSnapshot, None, None]:
+    """Yields a snapshot of every chat session created between `start` and `end`,
+    oldest first. Sessions are fetched a page at a time and the messages of a whole
+    page are fetched with one query, so the number of queries doesn't grow with the
+    number of sessions in a page. Sessions without a valid message chain (e.g. older
+    chats) are skipped."""
+    for chat_sessions in fetch_chat_session_pages_by_time(
+        start=start, end=end, db_session=db_session, page_size=page_size
+    ):
+        messages_by_session: dict[UUID, list[ChatMessage]] = defaultdict(list)
+        # messages come back root first, which is kept within each session
+        for message in get_chat_messages_by_sessions(
+            chat_session_ids=[chat_session.id for chat_session in chat_sessions],
+            user_id=None,
+            db_session=db_session,
+            skip_permission_check=True,
+            prefetch_feedback_and_docs=True,
+        ):
+            messages_by_session[message.chat_session_id].append(message)
+
+        for chat_session in chat_sessions:
+            try:
+                last_message, messages = build_chat_chain(
+                    messages_by_session[chat_session.id]
+                )
+            except RuntimeError:
+                continue
+            messages.append(last_message)
+
+            yield ChatSessionSnapshot.build(chat_session, messages)
+
+
+def stream_query_history_csv(
+    db_session: Session,
+    start: datetime,
+    end: datetime,
+) -> Generator[str, None, None]:
+    """Yields the query history CSV a chunk at a time, so the whole file never has
+    to be held in memory."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=list(QuestionAnswerPairSnapshot.model_fields.keys())
+    )
+    writer.writeheader()
+
+    for chat_session_snapshot in fetch_chat_session_snapshots(
+        db_session=db_session, start=start, end=end
+    ):
+        if ONYX_QUERY_HISTORY_TYPE == QueryHistoryType.ANONYMIZED:
+            chat_session_snapshot.user_email = ONYX_ANONYMIZED_EMAIL
+
+        for row in QuestionAnswerPairSnapshot.from_chat_session_snapshot(
+            chat_session_snapshot
+        ):
+            writer.writerow(row.to_json())
+
+        if buffer.tell() >= _CSV_STREAM_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def write_query_history_csv(
+    db_session: Session,
+    start: datetime,
+    end: datetime,
+    file_name: str,
+) -> None:
+    """Generates the query history CSV into the file store under `file_name`"""
+    with tempfile.SpooledTemporaryFile(
+        max_size=MAX_IN_MEMORY_SIZE, mode="w+b"
+    ) as temp_file:
+        for chunk in stream_query_history_csv(
+            db_session=db_session, start=start, end=end
+        ):
+            temp_file.write(chunk.encode("utf-8"))
+
+        # after writing seek to beginning of buffer
+        temp_file.seek(0)
+        get_default_file_store(db_session).save_file(
+            file_name=file_name,
+            content=temp_file,
+            display_name=file_name,
+            file_origin=FileOrigin.GENERATED_REPORT,
+            file_type="text/csv",
+        )
+
+    logger.info(f"Wrote query history export: file_name={file_name}")
@@ -7,6 +7,7 @@ from onyx.auth.users import get_display_email
 from onyx.configs.constants import MessageType
 from onyx.configs.constants import QAFeedbackType
 from onyx.configs.constants import SessionType
+from onyx.db.enums import TaskStatus
 from onyx.db.models import ChatMessage
 from onyx.db.models import ChatSession
 
@@ -150,6 +151,30 @@ class ChatSessionSnapshot(BaseModel):
     time_created: datetime
     flow_type: SessionType
 
+    @classmethod
+    def build(
+        cls, chat_session: ChatSession, messages: list[ChatMessage]
+    ) -> "ChatSessionSnapshot":
+        """`messages` is the mainline chain of the session, see `create_chat_chain`"""
+        return cls(
+            id=chat_session.id,
+            user_email=get_display_email(
+                chat_session.user.email if chat_session.user else None
+            ),
+            name=chat_session.description,
+            messages=[
+                MessageSnapshot.build(message)
+                for message in messages
+                if message.message_type != MessageType.SYSTEM
+            ],
+            assistant_id=chat_session.persona_id,
+            assistant_name=chat_session.persona.name if chat_session.persona else None,
+            time_created=chat_session.time_created,
+            flow_type=(
+                SessionType.SLACK if chat_session.onyxbot_flow else SessionType.CHAT
+            ),
+        )
+
 
 class QuestionAnswerPairSnapshot(BaseModel):
     chat_session_id: UUID
@@ -216,3 +241,8 @@ class QuestionAnswerPairSnapshot(BaseModel):
             "time_created": str(self.time_created),
             "flow_type": self.flow_type,
         }
+
+
+class QueryHistoryExport(BaseModel):
+    file_name: str
+    status: TaskStatus
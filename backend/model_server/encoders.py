@@ -1,12 +1,18 @@
 import asyncio
+import hashlib
+import importlib.util
 import json
 import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from types import TracebackType
 from typing import cast
 from typing import Optional
 
 import aioboto3  # type: ignore
 import httpx
+import numpy as np
 import openai
 import vertexai  # type: ignore
 import voyageai  # type: ignore
@@ -14,6 +20,7 @@ from cohere import AsyncClient as CohereAsyncClient
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 from google.oauth2 import service_account  # type: ignore
 from litellm import aembedding
 from litellm.exceptions import RateLimitError
@@ -29,11 +36,18 @@ from model_server.constants import DEFAULT_VERTEX_MODEL
 from model_server.constants import DEFAULT_VOYAGE_MODEL
 from model_server.constants import EmbeddingModelTextType
 from model_server.constants import EmbeddingProvider
+from model_server.micro_batching import get_micro_batcher
+from model_server.micro_batching import MicroBatcher
 from model_server.utils import pass_aws_key
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import API_BASED_EMBEDDING_TIMEOUT
+from shared_configs.configs import CLOUD_EMBEDDING_CLIENT_IDLE_TIMEOUT
+from shared_configs.configs import CLOUD_EMBEDDING_CLIENT_POOL_SIZE
 from shared_configs.configs import INDEXING_ONLY
+from shared_configs.configs import MODEL_SERVER_MICRO_BATCH_MAX_SIZE
+from shared_configs.configs import MODEL_SERVER_MICRO_BATCH_MAX_WAIT_MS
+from shared_configs.configs import MODEL_SERVER_MICRO_BATCHING_ENABLED
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
 from shared_configs.configs import VERTEXAI_EMBEDDING_LOCAL_BATCH_SIZE
 from shared_configs.enums import EmbedTextType
@@ -44,6 +58,10 @@ from shared_configs.model_server_models import EmbedResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
 from shared_configs.utils import batch_list
+from shared_configs.utils import BINARY_EMBEDDING_MEDIA_TYPE
+from shared_configs.utils import EMBEDDING_DTYPE_HEADER
+from shared_configs.utils import encode_embeddings_binary
+from shared_configs.utils import get_embedding_wire_dtype
 
 
 logger = setup_logger()
@@ -62,6 +80,9 @@ _OPENAI_MAX_INPUT_LEN = 2048
 # Cohere allows up to 96 embeddings in a single embedding calling
 _COHERE_MAX_INPUT_LEN = 96
 
+# HTTP2 needs the optional h2 package, fall back to HTTP/1.1 keep-alive without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 # Authentication error string constants
 _AUTH_ERROR_401 = "401"
 _AUTH_ERROR_UNAUTHORIZED = "unauthorized"
@@ -131,19 +152,36 @@ class CloudEmbedding:
         self.api_url = api_url
         self.api_version = api_version
         self.timeout = timeout
-        self.http_client = httpx.AsyncClient(timeout=timeout)
+        # keep-alive (and HTTP2 when available) connections are reused for as long as
+        # this client lives, see CloudEmbeddingPool
+        self.http_client = httpx.AsyncClient(
+            timeout=timeout,
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(keepalive_expiry=CLOUD_EMBEDDING_CLIENT_IDLE_TIMEOUT),
+        )
         self._closed = False
 
+        # provider SDK clients are created lazily and reuse http_client where the
+        # SDK allows passing one in
+        self._openai_client: openai.AsyncOpenAI | None = None
+        self._cohere_client: CohereAsyncClient | None = None
+        self._voyage_client: voyageai.AsyncClient | None = None
+        self._vertex_models: dict[str, TextEmbeddingModel] = {}
+
     async def _embed_openai(
         self, texts: list[str], model: str | None, reduced_dimension: int | None
     ) -> list[Embedding]:
         if not model:
             model = DEFAULT_OPENAI_MODEL
 
-        # Use the OpenAI specific timeout for this one
-        client = openai.AsyncOpenAI(
-            api_key=self.api_key, timeout=OPENAI_EMBEDDING_TIMEOUT
-        )
+        if self._openai_client is None:
+            # Use the OpenAI specific timeout for this one
+            self._openai_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=OPENAI_EMBEDDING_TIMEOUT,
+                http_client=self.http_client,
+            )
+        client = self._openai_client
 
         final_embeddings: list[Embedding] = []
 
@@ -164,7 +202,11 @@ class CloudEmbedding:
         if not model:
             model = DEFAULT_COHERE_MODEL
 
-        client = CohereAsyncClient(api_key=self.api_key)
+        if self._cohere_client is None:
+            self._cohere_client = CohereAsyncClient(
+                api_key=self.api_key, httpx_client=self.http_client
+            )
+        client = self._cohere_client
 
         final_embeddings: list[Embedding] = []
         for text_batch in batch_list(texts, _COHERE_MAX_INPUT_LEN):
@@ -185,9 +227,11 @@ class CloudEmbedding:
         if not model:
             model = DEFAULT_VOYAGE_MODEL
 
-        client = voyageai.AsyncClient(
-            api_key=self.api_key, timeout=API_BASED_EMBEDDING_TIMEOUT
-        )
+        if self._voyage_client is None:
+            self._voyage_client = voyageai.AsyncClient(
+                api_key=self.api_key, timeout=API_BASED_EMBEDDING_TIMEOUT
+            )
+        client = self._voyage_client
 
         response = await client.embed(
             texts=texts,
@@ -217,12 +261,15 @@ class CloudEmbedding:
         if not model:
             model = DEFAULT_VERTEX_MODEL
 
-        credentials = service_account.Credentials.from_service_account_info(
-            json.loads(self.api_key)
-        )
-        project_id = json.loads(self.api_key)["project_id"]
-        vertexai.init(project=project_id, credentials=credentials)
-        client = TextEmbeddingModel.from_pretrained(model)
+        client = self._vertex_models.get(model)
+        if client is None:
+            credentials = service_account.Credentials.from_service_account_info(
+                json.loads(self.api_key)
+            )
+            project_id = json.loads(self.api_key)["project_id"]
+            vertexai.init(project=project_id, credentials=credentials)
+            client = TextEmbeddingModel.from_pretrained(model)
+            self._vertex_models[model] = client
 
         inputs = [TextEmbeddingInput(text, embedding_type) for text in texts]
 
@@ -359,6 +406,120 @@ class CloudEmbedding:
             )
 
 
+def _get_cloud_embedding_pool_key(
+    api_key: str,
+    provider: EmbeddingProvider,
+    api_url: str | None,
+    api_version: str | None,
+) -> tuple[str, str | None, str | None, str]:
+    # never keep the raw key around in the pool's bookkeeping
+    api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    return (str(provider), api_url, api_version, api_key_hash)
+
+
+class _PooledCloudEmbedding:
+    def __init__(self, client: CloudEmbedding) -> None:
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        # set when the entry is dropped from the pool while a request still uses it,
+        # the client is then closed by the last request to release it
+        self.evicted = False
+
+
+class CloudEmbeddingPool:
+    """Keeps CloudEmbedding clients alive across requests so that their connections
+    (and TLS sessions) to the embedding providers are reused instead of being set up
+    for every batch.
+
+    Clients are keyed by provider, api url, api version and a hash of the api key.
+    The pool holds at most `max_size` clients (least recently used ones are dropped
+    first) and closes clients that have been idle for longer than `idle_timeout`
+    seconds. A client is never closed while a request is still using it.
+
+    Only meant to be used from the model server's event loop."""
+
+    def __init__(self, max_size: int, idle_timeout: float) -> None:
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self._entries: OrderedDict[
+            tuple[str, str | None, str | None, str], _PooledCloudEmbedding
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        api_key: str,
+        provider: EmbeddingProvider,
+        api_url: str | None = None,
+        api_version: str | None = None,
+    ) -> AsyncIterator[CloudEmbedding]:
+        await self._evict_idle()
+
+        key = _get_cloud_embedding_pool_key(api_key, provider, api_url, api_version)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PooledCloudEmbedding(
+                CloudEmbedding.create(api_key, provider, api_url, api_version)
+            )
+            self._entries[key] = entry
+            await self._evict_overflow()
+        self._entries.move_to_end(key)
+
+        entry.in_use += 1
+        try:
+            yield entry.client
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if entry.evicted and entry.in_use == 0:
+                await entry.client.aclose()
+
+    async def _evict(
+        self, key: tuple[str, str | None, str | None, str], reason: str
+    ) -> None:
+        entry = self._entries.pop(key)
+        entry.evicted = True
+        logger.debug(
+            f"Evicting cloud embedding client: provider={key[0]} reason={reason}"
+        )
+        if entry.in_use == 0:
+            await entry.client.aclose()
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        idle_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.in_use == 0 and now - entry.last_used > self.idle_timeout
+        ]
+        for key in idle_keys:
+            await self._evict(key, "idle")
+
+    async def _evict_overflow(self) -> None:
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            await self._evict(oldest_key, "max_size")
+
+    async def aclose(self) -> None:
+        for key in list(self._entries.keys()):
+            await self._evict(key, "shutdown")
+
+
+_CLOUD_EMBEDDING_POOL = CloudEmbeddingPool(
+    max_size=CLOUD_EMBEDDING_CLIENT_POOL_SIZE,
+    idle_timeout=CLOUD_EMBEDDING_CLIENT_IDLE_TIMEOUT,
+)
+
+
+async def close_cloud_embedding_pool() -> None:
+    """Closes all pooled cloud embedding clients, called on model server shutdown."""
+    await _CLOUD_EMBEDDING_POOL.aclose()
+
+
 def get_embedding_model(
     model_name: str,
     max_context_length: int,
@@ -411,7 +572,9 @@ async def embed_text(
     api_version: str | None,
     reduced_dimension: int | None,
     gpu_type: str = "UNKNOWN",
-) -> list[Embedding]:
+) -> list[Embedding] | list[np.ndarray]:
+    """Local models return rows of the array the model produced, they are only turned
+    into lists of floats for the clients that want JSON."""
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -426,6 +589,7 @@ async def embed_text(
     for text in texts:
         total_chars += len(text)
 
+    embeddings: list[Embedding] | list[np.ndarray]
     if provider_type is not None:
         logger.info(
             f"Embedding {len(texts)} texts with {total_chars} total characters with provider: {provider_type}"
@@ -442,7 +606,7 @@ async def embed_text(
                 "Cloud models take an explicit text type instead."
             )
 
-        async with CloudEmbedding(
+        async with _CLOUD_EMBEDDING_POOL.acquire(
             api_key=api_key,
             provider=provider_type,
             api_url=api_url,
@@ -478,20 +642,20 @@ async def embed_text(
 
         prefixed_texts = [f"{prefix}{text}" for text in texts] if prefix else texts
 
-        local_model = get_embedding_model(
-            model_name=model_name, max_context_length=max_context_length
-        )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: local_model.encode(
-                prefixed_texts, normalize_embeddings=normalize_embeddings
-            ),
-        )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
+        if MODEL_SERVER_MICRO_BATCHING_ENABLED:
+            embeddings = await _get_embedding_batcher(
+                model_name=model_name,
+                max_context_length=max_context_length,
+                normalize_embeddings=normalize_embeddings,
+            ).submit(prefixed_texts)
+        else:
+            # Run CPU-bound embedding in a thread pool
+            embeddings = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: _encode_local(
+                    prefixed_texts, model_name, max_context_length, normalize_embeddings
+                ),
+            )
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -515,13 +679,71 @@ async def embed_text(
     return embeddings
 
 
+def _encode_local(
+    texts: list[str],
+    model_name: str,
+    max_context_length: int,
+    normalize_embeddings: bool,
+) -> list[np.ndarray]:
+    local_model = get_embedding_model(
+        model_name=model_name, max_context_length=max_context_length
+    )
+    embeddings_vectors = local_model.encode(
+        texts, normalize_embeddings=normalize_embeddings
+    )
+    # views into the model output, no per float conversion
+    return list(np.asarray(embeddings_vectors, dtype=np.float32))
+
+
+def _embeddings_as_lists(
+    embeddings: list[Embedding] | list[np.ndarray],
+) -> list[Embedding]:
+    return [
+        embedding if isinstance(embedding, list) else embedding.tolist()
+        for embedding in embeddings
+    ]
+
+
+def _get_embedding_batcher(
+    model_name: str, max_context_length: int, normalize_embeddings: bool
+) -> MicroBatcher[str, np.ndarray]:
+    return get_micro_batcher(
+        key=("embed", model_name, max_context_length, normalize_embeddings),
+        name=f"embed:{model_name}",
+        process_batch=lambda texts: _encode_local(
+            texts, model_name, max_context_length, normalize_embeddings
+        ),
+        max_batch_size=MODEL_SERVER_MICRO_BATCH_MAX_SIZE,
+        max_wait_seconds=MODEL_SERVER_MICRO_BATCH_MAX_WAIT_MS / 1000,
+    )
+
+
+def _predict_local_rerank(
+    query_doc_pairs: list[tuple[str, str]], model_name: str
+) -> list[float]:
+    cross_encoder = get_local_reranking_model(model_name)
+    return cross_encoder.predict(query_doc_pairs).tolist()  # type: ignore
+
+
 @simple_log_function_time()
 async def local_rerank(query: str, docs: list[str], model_name: str) -> list[float]:
-    cross_encoder = get_local_reranking_model(model_name)
+    query_doc_pairs = [(query, doc) for doc in docs]
+
+    if MODEL_SERVER_MICRO_BATCHING_ENABLED:
+        # the cross encoder scores every pair independently, so pairs from different
+        # queries can share a forward pass
+        batcher: MicroBatcher[tuple[str, str], float] = get_micro_batcher(
+            key=("rerank", model_name),
+            name=f"rerank:{model_name}",
+            process_batch=lambda pairs: _predict_local_rerank(pairs, model_name),
+            max_batch_size=MODEL_SERVER_MICRO_BATCH_MAX_SIZE,
+            max_wait_seconds=MODEL_SERVER_MICRO_BATCH_MAX_WAIT_MS / 1000,
+        )
+        return await batcher.submit(query_doc_pairs)
+
     # Run CPU-bound reranking in a thread pool
     return await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: cross_encoder.predict([(query, doc) for doc in docs]).tolist(),  # type: ignore
+        None, lambda: _predict_local_rerank(query_doc_pairs, model_name)
     )
 
 
@@ -596,17 +818,39 @@ async def litellm_rerank(
         ]
 
 
-@router.post("/bi-encoder-embed")
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
-    return await process_embed_request(embed_request, request.app.state.gpu_type)
+) -> EmbedResponse | Response:
+    # Clients that understand the binary format ask for it explicitly, everyone
+    # else (including older API servers) keeps getting JSON
+    if BINARY_EMBEDDING_MEDIA_TYPE not in request.headers.get("accept", ""):
+        return await process_embed_request(embed_request, request.app.state.gpu_type)
+
+    dtype_name = request.headers.get(EMBEDDING_DTYPE_HEADER, "float32").lower()
+    try:
+        get_embedding_wire_dtype(dtype_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    embeddings = await _run_embed_request(embed_request, request.app.state.gpu_type)
+    payload, headers = encode_embeddings_binary(embeddings, dtype_name)
+    return Response(
+        content=payload, media_type=BINARY_EMBEDDING_MEDIA_TYPE, headers=headers
+    )
 
 
 async def process_embed_request(
     embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
 ) -> EmbedResponse:
+    embeddings = await _run_embed_request(embed_request, gpu_type)
+    return EmbedResponse(embeddings=_embeddings_as_lists(embeddings))
+
+
+async def _run_embed_request(
+    embed_request: EmbedRequest, gpu_type: str
+) -> list[Embedding] | list[np.ndarray]:
     if not embed_request.texts:
         raise HTTPException(status_code=400, detail="No texts to be embedded")
 
@@ -636,7 +880,7 @@ async def process_embed_request(
             prefix=prefix,
             gpu_type=gpu_type,
         )
-        return EmbedResponse(embeddings=embeddings)
+        return embeddings
     except AuthenticationError as e:
         # Handle authentication errors consistently
         logger.error(f"Authentication error: {e.provider}")
@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections.abc import Callable
+from collections.abc import Hashable
+from typing import Generic
+from typing import TypeVar
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+_QUEUE_DEPTH = Gauge(
+    "onyx_model_server_micro_batch_queue_depth",
+    "Number of items waiting to be put into a batch",
+    ["batcher"],
+)
+_BATCH_SIZE = Histogram(
+    "onyx_model_server_micro_batch_size",
+    "Number of items per forward pass",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+_BATCH_REQUESTS = Histogram(
+    "onyx_model_server_micro_batch_requests",
+    "Number of requests merged into a single forward pass",
+    ["batcher"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+_QUEUE_WAIT = Histogram(
+    "onyx_model_server_micro_batch_queue_wait_seconds",
+    "Time a request waited before its batch was started",
+    ["batcher"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+_BATCH_FAILURES = Counter(
+    "onyx_model_server_micro_batch_failures",
+    "Number of batches whose forward pass raised",
+    ["batcher"],
+)
+
+
+class _PendingRequest(Generic[T, R]):
+    def __init__(self, items: list[T], future: "asyncio.Future[list[R]]") -> None:
+        self.items = items
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Merges concurrent requests for the same model into a single forward pass.
+
+    The first request to arrive starts a timer of `max_wait_seconds`, every request
+    that comes in before it fires (or until `max_batch_size` items are queued) joins
+    the same batch. `process_batch` then runs once in the default executor and each
+    request gets back the slice of the results that belongs to its items.
+
+    `process_batch` must return exactly one result per item, in order. Requests that
+    are already at least `max_batch_size` items long skip the queue entirely.
+
+    Only meant to be used from the model server's event loop."""
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[list[T]], list[R]],
+        max_batch_size: int,
+        max_wait_seconds: float,
+    ) -> None:
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+
+        self._pending: list[_PendingRequest[T, R]] = []
+        self._pending_items = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending_items
+
+    async def submit(self, items: list[T]) -> list[R]:
+        if not items:
+            return []
+
+        loop = asyncio.get_running_loop()
+        if len(items) >= self.max_batch_size:
+            return await self._run(loop, [items])
+
+        future: asyncio.Future[list[R]] = loop.create_future()
+        self._pending.append(_PendingRequest(items, future))
+        self._pending_items += len(items)
+        _QUEUE_DEPTH.labels(self.name).set(self._pending_items)
+
+        if self._pending_items >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        requests = self._pending
+        self._pending = []
+        self._pending_items = 0
+        _QUEUE_DEPTH.labels(self.name).set(0)
+
+        # requests whose caller went away (e.g. client disconnected) are dropped
+        requests = [request for request in requests if not request.future.done()]
+        if requests:
+            asyncio.ensure_future(self._run_batch(requests))
+
+    async def _run_batch(self, requests: list[_PendingRequest[T, R]]) -> None:
+        now = time.monotonic()
+        for request in requests:
+            _QUEUE_WAIT.labels(self.name).observe(now - request.enqueued_at)
+
+        try:
+            results = await self._run(
+                asyncio.get_running_loop(), [request.items for request in requests]
+            )
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in requests:
+            request_results = results[offset : offset + len(request.items)]
+            offset += len(request.items)
+            if not request.future.done():
+                request.future.set_result(request_results)
+
+    async def _run(
+        self, loop: asyncio.AbstractEventLoop, item_lists: list[list[T]]
+    ) -> list[R]:
+        items = [item for item_list in item_lists for item in item_list]
+        _BATCH_SIZE.labels(self.name).observe(len(items))
+        _BATCH_REQUESTS.labels(self.name).observe(len(item_lists))
+
+        try:
+            # Run the CPU/GPU bound forward pass in a thread pool
+            results = await loop.run_in_executor(None, self.process_batch, items)
+        except Exception:
+            _BATCH_FAILURES.labels(self.name).inc()
+            raise
+
+        if len(results) != len(items):
+            _BATCH_FAILURES.labels(self.name).inc()
+            raise RuntimeError(
+                f"Micro batch {self.name} returned {len(results)} results "
+                f"for {len(items)} items"
+            )
+
+        logger.debug(
+            f"event=micro_batch batcher={self.name} "
+            f"requests={len(item_lists)} items={len(items)}"
+        )
+        return results
+
+
+_BATCHERS: dict[Hashable, MicroBatcher] = {}
+
+
+def get_micro_batcher(
+    key: Hashable,
+    name: str,
+    process_batch: Callable[[list[T]], list[R]],
+    max_batch_size: int,
+    max_wait_seconds: float,
+) -> MicroBatcher[T, R]:
+    """Returns the batcher for `key`, creating it on first use. Requests only get
+    merged with other requests that use the same key."""
+    batcher = _BATCHERS.get(key)
+    if batcher is None:
+        batcher = MicroBatcher(
+            name=name,
+            process_batch=process_batch,
+            max_batch_size=max_batch_size,
+            max_wait_seconds=max_wait_seconds,
+        )
+        _BATCHERS[key] = batcher
+    return batcher
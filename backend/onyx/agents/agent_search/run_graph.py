@@ -1,10 +1,16 @@
+import threading
+import time
+from collections.abc import Callable
 from collections.abc import Iterable
 from datetime import datetime
+from enum import Enum
 from typing import cast
 
 from langchain_core.runnables.schema import CustomStreamEvent
 from langchain_core.runnables.schema import StreamEvent
+from langgraph.graph import StateGraph
 from langgraph.graph.state import CompiledStateGraph
+from prometheus_client import Gauge
 
 from onyx.agents.agent_search.basic.graph_builder import basic_graph_builder
 from onyx.agents.agent_search.basic.states import BasicInput
@@ -41,7 +47,28 @@ from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
-_COMPILED_GRAPH: CompiledStateGraph | None = None
+
+class AgentGraph(str, Enum):
+    MAIN = "main"
+    BASIC = "basic"
+    DIVIDE_AND_CONQUER = "divide_and_conquer"
+
+
+_GRAPH_BUILDERS: dict[AgentGraph, Callable[[], StateGraph]] = {
+    AgentGraph.MAIN: main_graph_builder_a,
+    AgentGraph.BASIC: basic_graph_builder,
+    AgentGraph.DIVIDE_AND_CONQUER: divide_and_conquer_graph_builder,
+}
+
+# Compiled graphs hold no per run state, so one per process is shared by all requests
+_COMPILED_GRAPHS: dict[AgentGraph, CompiledStateGraph] = {}
+_COMPILED_GRAPHS_LOCK = threading.Lock()
+
+agent_graph_compile_seconds = Gauge(
+    "agent_graph_compile_seconds",
+    "Time it took to build and compile an agent graph in this process",
+    ["graph"],
+)
 
 
 def _parse_agent_event(
@@ -116,14 +143,34 @@ def run_graph(
         yield parsed_object
 
 
-# It doesn't actually take very long to load the graph, but we'd rather
-# not compile it again on every request.
+def get_compiled_graph(graph: AgentGraph) -> CompiledStateGraph:
+    compiled_graph = _COMPILED_GRAPHS.get(graph)
+    if compiled_graph is not None:
+        return compiled_graph
+
+    with _COMPILED_GRAPHS_LOCK:
+        compiled_graph = _COMPILED_GRAPHS.get(graph)
+        if compiled_graph is None:
+            start = time.monotonic()
+            compiled_graph = _GRAPH_BUILDERS[graph]().compile()
+            elapsed = time.monotonic() - start
+
+            agent_graph_compile_seconds.labels(graph=graph.value).set(elapsed)
+            logger.info(f"Compiled agent graph '{graph.value}' in {elapsed:.2f}s")
+            _COMPILED_GRAPHS[graph] = compiled_graph
+    return compiled_graph
+
+
 def load_compiled_graph() -> CompiledStateGraph:
-    global _COMPILED_GRAPH
-    if _COMPILED_GRAPH is None:
-        graph = main_graph_builder_a()
-        _COMPILED_GRAPH = graph.compile()
-    return _COMPILED_GRAPH
+    return get_compiled_graph(AgentGraph.MAIN)
+
+
+def warm_up_compiled_graphs() -> None:
+    """Compiles every agent graph, so no chat request has to."""
+    start = time.monotonic()
+    for graph in AgentGraph:
+        get_compiled_graph(graph)
+    logger.notice(f"Agent graphs compiled in {time.monotonic() - start:.2f}s")
 
 
 def run_main_graph(
@@ -144,8 +191,7 @@ def run_main_graph(
 def run_basic_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    graph = basic_graph_builder()
-    compiled_graph = graph.compile()
+    compiled_graph = get_compiled_graph(AgentGraph.BASIC)
     input = BasicInput(unused=True)
     return run_graph(compiled_graph, config, input)
 
@@ -153,8 +199,7 @@ def run_basic_graph(
 def run_dc_graph(
     config: GraphConfig,
 ) -> AnswerStream:
-    graph = divide_and_conquer_graph_builder()
-    compiled_graph = graph.compile()
+    compiled_graph = get_compiled_graph(AgentGraph.DIVIDE_AND_CONQUER)
     input = DCMainInput(log_messages=[])
     config.inputs.search_request.query = config.inputs.search_request.query.strip()
     return run_graph(compiled_graph, config, input)
@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timezone
 from typing import Any
@@ -88,21 +89,20 @@ def document_batch_to_ids(
     return {doc.id for doc in doc_batch}
 
 
-def extract_ids_from_runnable_connector(
+def extract_id_batches_from_runnable_connector(
     runnable_connector: BaseConnector,
     callback: IndexingHeartbeatInterface | None = None,
-) -> set[str]:
+) -> Iterator[set[str]]:
     """
+    Yields the document IDs of the source batch by batch, as the connector returns them.
     If the SlimConnector hasnt been implemented for the given connector, just pull
     all docs using the load_from_state and grab out the IDs.
 
     Optionally, a callback can be passed to handle the length of each document batch.
     """
-    all_connector_doc_ids: set[str] = set()
-
     if isinstance(runnable_connector, SlimConnector):
         for metadata_batch in runnable_connector.retrieve_all_slim_documents():
-            all_connector_doc_ids.update({doc.id for doc in metadata_batch})
+            yield {doc.id for doc in metadata_batch}
 
     doc_batch_generator = None
 
@@ -127,11 +127,23 @@ def extract_ids_from_runnable_connector(
                     "extract_ids_from_runnable_connector: Stop signal detected"
                 )
 
-        all_connector_doc_ids.update(doc_batch_processing_func(doc_batch))
+        yield doc_batch_processing_func(doc_batch)
 
         if callback:
             callback.progress("extract_ids_from_runnable_connector", len(doc_batch))
 
+
+def extract_ids_from_runnable_connector(
+    runnable_connector: BaseConnector,
+    callback: IndexingHeartbeatInterface | None = None,
+) -> set[str]:
+    """All document IDs of the source, see extract_id_batches_from_runnable_connector"""
+    all_connector_doc_ids: set[str] = set()
+    for doc_id_batch in extract_id_batches_from_runnable_connector(
+        runnable_connector, callback
+    ):
+        all_connector_doc_ids.update(doc_id_batch)
+
     return all_connector_doc_ids
 
 
@@ -37,6 +37,7 @@ from onyx.background.indexing.job_client import SimpleJob
 from onyx.background.indexing.job_client import SimpleJobClient
 from onyx.background.indexing.job_client import SimpleJobException
 from onyx.background.indexing.run_indexing import run_indexing_entrypoint
+from onyx.configs.app_configs import INDEXING_CHUNKING_PROCESSES
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
@@ -968,7 +969,9 @@ def connector_indexing_proxy_task(
     if not self.request.id:
         task_logger.error("self.request.id is None!")
 
-    client = SimpleJobClient()
+    # chunking in a process pool needs the indexing process to be able to start
+    # processes. It then exits by itself if this watchdog dies, see IndexingCallback
+    client = SimpleJobClient(daemon=INDEXING_CHUNKING_PROCESSES <= 1)
     task_logger.info(f"submitting connector_indexing_task with tenant_id={tenant_id}")
 
     job = client.submit(
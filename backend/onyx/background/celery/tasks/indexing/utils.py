@@ -1,3 +1,4 @@
+import os
 import time
 from datetime import datetime
 from datetime import timezone
@@ -15,6 +16,7 @@ from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
 from onyx.configs.app_configs import DISABLE_INDEX_UPDATE_ON_SWAP
+from onyx.configs.app_configs import INDEXING_CHUNKING_PROCESSES
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import DANSWER_REDIS_FUNCTION_LOCK_PREFIX
 from onyx.configs.constants import DocumentSource
@@ -124,21 +126,19 @@ class IndexingCallbackBase(IndexingHeartbeatInterface):
         return False
 
     def progress(self, tag: str, amount: int) -> None:
-        # rkuo: this shouldn't be necessary yet because we spawn the process this runs inside
-        # with daemon=True. It seems likely some indexing tasks will need to spawn other processes
-        # eventually, which daemon=True prevents, so leave this code in until we're ready to test it.
-
-        # if self.parent_pid:
-        #     # check if the parent pid is alive so we aren't running as a zombie
-        #     now = time.monotonic()
-        #     if now - self.last_parent_check > IndexingCallback.PARENT_CHECK_INTERVAL:
-        #         try:
-        #             # this is unintuitive, but it checks if the parent pid is still running
-        #             os.kill(self.parent_pid, 0)
-        #         except Exception:
-        #             logger.exception("IndexingCallback - parent pid check exceptioned")
-        #             raise
-        #         self.last_parent_check = now
+        # The indexing process is usually spawned with daemon=True, so it dies with its
+        # parent. When it isn't (so it can chunk in a process pool), make sure it
+        # doesn't keep running as a zombie after the parent is gone.
+        if self.parent_pid and INDEXING_CHUNKING_PROCESSES > 1:
+            now = time.monotonic()
+            if now - self.last_parent_check > self.PARENT_CHECK_INTERVAL:
+                try:
+                    # this is unintuitive, but it checks if the parent pid is still running
+                    os.kill(self.parent_pid, 0)
+                except Exception:
+                    logger.exception("IndexingCallback - parent pid check exceptioned")
+                    raise
+                self.last_parent_check = now
 
         try:
             current_time = time.monotonic()
@@ -1,4 +1,6 @@
 import time
+from collections.abc import Iterable
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
@@ -20,10 +22,15 @@ from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_queue_length
 from onyx.background.celery.celery_redis import celery_get_queued_task_ids
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
+from onyx.background.celery.celery_utils import (
+    extract_id_batches_from_runnable_connector,
+)
 from onyx.background.celery.celery_utils import extract_ids_from_runnable_connector
 from onyx.background.celery.tasks.indexing.utils import IndexingCallbackBase
 from onyx.configs.app_configs import ALLOW_SIMULTANEOUS_PRUNING
+from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import STREAMING_PRUNING_ENABLED
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_PRUNING_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_TASK_WAIT_FOR_FENCE_TIMEOUT
@@ -40,6 +47,9 @@ from onyx.db.connector import mark_ccpair_as_pruned
 from onyx.db.connector_credential_pair import get_connector_credential_pair
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
+from onyx.db.document import (
+    construct_document_id_select_for_connector_credential_pair,
+)
 from onyx.db.document import get_documents_for_connector_credential_pair
 from onyx.db.engine import get_session_with_current_tenant
 from onyx.db.enums import ConnectorCredentialPairStatus
@@ -69,6 +79,25 @@ class PruneCallback(IndexingCallbackBase):
         super().progress(tag, amount)
 
 
+def _stream_doc_ids_to_remove(
+    db_session: Session,
+    redis_connector: RedisConnector,
+    connector_id: int,
+    credential_id: int,
+) -> Iterator[str]:
+    """Yields the indexed document ids of the cc pair that aren't in the source
+    anymore. The source's document ids must have been added with
+    redis_connector.prune.source_doc_ids_add and marked complete, raises if they
+    are lost in the meantime"""
+    stmt = construct_document_id_select_for_connector_credential_pair(
+        connector_id, credential_id
+    )
+    for doc_id_batch in (
+        db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT).partitions()
+    ):
+        yield from redis_connector.prune.source_doc_ids_missing(list(doc_id_batch))
+
+
 """Jobs / utils for kicking off pruning tasks."""
 
 
@@ -459,37 +488,60 @@ def connector_pruning_generator_task(
                 r,
             )
 
-            # a list of docs in the source
-            all_connector_doc_ids: set[str] = extract_ids_from_runnable_connector(
-                runnable_connector, callback
-            )
-
-            # a list of docs in our local index
-            all_indexed_document_ids = {
-                doc.id
-                for doc in get_documents_for_connector_credential_pair(
-                    db_session=db_session,
-                    connector_id=connector_id,
-                    credential_id=credential_id,
+            doc_ids_to_remove: Iterable[str]
+            if STREAMING_PRUNING_ENABLED:
+                # the docs in the source are collected in redis and the docs in our
+                # local index are streamed from the db and checked against them, so
+                # neither is held in memory
+                redis_connector.prune.source_doc_ids_clear()
+                for doc_id_batch in extract_id_batches_from_runnable_connector(
+                    runnable_connector, callback
+                ):
+                    redis_connector.prune.source_doc_ids_add(doc_id_batch)
+                redis_connector.prune.source_doc_ids_set_complete()
+
+                task_logger.info(
+                    "Pruning source ids collected, streaming docs to remove: "
+                    f"cc_pair={cc_pair_id} "
+                    f"connector_source={cc_pair.connector.source}"
+                )
+                doc_ids_to_remove = _stream_doc_ids_to_remove(
+                    db_session, redis_connector, connector_id, credential_id
+                )
+            else:
+                # a list of docs in the source
+                all_connector_doc_ids: set[str] = extract_ids_from_runnable_connector(
+                    runnable_connector, callback
                 )
-            }
 
-            # generate list of docs to remove (no longer in the source)
-            doc_ids_to_remove = list(all_indexed_document_ids - all_connector_doc_ids)
+                # a list of docs in our local index
+                all_indexed_document_ids = {
+                    doc.id
+                    for doc in get_documents_for_connector_credential_pair(
+                        db_session=db_session,
+                        connector_id=connector_id,
+                        credential_id=credential_id,
+                    )
+                }
 
-            task_logger.info(
-                "Pruning set collected: "
-                f"cc_pair={cc_pair_id} "
-                f"connector_source={cc_pair.connector.source} "
-                f"docs_to_remove={len(doc_ids_to_remove)}"
-            )
+                # generate list of docs to remove (no longer in the source)
+                doc_id_set_to_remove = all_indexed_document_ids - all_connector_doc_ids
+
+                task_logger.info(
+                    "Pruning set collected: "
+                    f"cc_pair={cc_pair_id} "
+                    f"connector_source={cc_pair.connector.source} "
+                    f"docs_to_remove={len(doc_id_set_to_remove)}"
+                )
+                doc_ids_to_remove = doc_id_set_to_remove
 
             task_logger.info(
                 f"RedisConnector.prune.generate_tasks starting. cc_pair={cc_pair_id}"
             )
             tasks_generated = redis_connector.prune.generate_tasks(
-                set(doc_ids_to_remove), self.app, db_session, None
+                doc_ids_to_remove, self.app, db_session, None
             )
+            redis_connector.prune.source_doc_ids_clear()
             if tasks_generated is None:
                 return None
 
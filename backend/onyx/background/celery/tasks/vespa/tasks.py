@@ -15,6 +15,7 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
@@ -29,10 +30,13 @@ from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
 from onyx.db.document import count_documents_by_needs_sync
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine import get_session_with_current_tenant
@@ -642,3 +646,174 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         return False
 
     return True
+
+
+# a batch does the work of VESPA_SYNC_BATCH_SIZE single document tasks, so give it
+# correspondingly more room than the light task limits
+VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT * 3
+VESPA_METADATA_SYNC_BATCH_TIME_LIMIT = VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_METADATA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Same as vespa_metadata_sync_task but for a batch of documents. Document sets
+    and access are looked up with one query each for the whole batch and all updates
+    go through a single pooled Vespa client.
+
+    Documents that fail with a retryable error are retried as a smaller batch, the
+    ones that succeeded are marked as synced right away."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+
+    num_synced = 0
+    num_skipped = 0
+    num_failed = 0
+    retry_doc_ids: list[str] = []
+    retry_exception: Exception | None = None
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                search_settings=active_search_settings.primary,
+                secondary_search_settings=active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            docs = get_documents_by_ids(db_session, document_ids)
+            num_skipped = len(document_ids) - len(docs)
+
+            found_doc_ids = [doc.id for doc in docs]
+            doc_id_to_doc_sets = {
+                doc_id: set(doc_sets)
+                for doc_id, doc_sets in fetch_document_sets_for_documents(
+                    found_doc_ids, db_session
+                )
+            }
+            doc_id_to_access = get_access_for_documents(found_doc_ids, db_session)
+
+            synced_doc_ids: list[str] = []
+            for doc in docs:
+                fields = VespaDocumentFields(
+                    document_sets=doc_id_to_doc_sets.get(doc.id, set()),
+                    access=doc_id_to_access[doc.id],
+                    boost=doc.boost,
+                    hidden=doc.hidden,
+                )
+
+                try:
+                    # update Vespa. OK if doc doesn't exist. Raises exception otherwise.
+                    retry_index.update_single(
+                        doc.id,
+                        tenant_id=tenant_id,
+                        chunk_count=doc.chunk_count,
+                        fields=fields,
+                        user_fields=None,
+                    )
+                except SoftTimeLimitExceeded:
+                    raise
+                except Exception as ex:
+                    e = _unwrap_retry_error(ex)
+                    if (
+                        isinstance(e, httpx.HTTPStatusError)
+                        and e.response.status_code == HTTPStatus.BAD_REQUEST
+                    ):
+                        task_logger.exception(
+                            f"Non-retryable HTTPStatusError: "
+                            f"doc={doc.id} "
+                            f"status={e.response.status_code}"
+                        )
+                        num_failed += 1
+                        continue
+
+                    task_logger.exception(
+                        f"vespa_metadata_sync_batch_task exceptioned: doc={doc.id}"
+                    )
+                    retry_doc_ids.append(doc.id)
+                    retry_exception = e
+                    continue
+
+                synced_doc_ids.append(doc.id)
+
+            # update db last. Worst case = we crash right before this and
+            # the sync might repeat again later
+            mark_documents_as_synced(synced_doc_ids, db_session)
+            num_synced = len(synced_doc_ids)
+
+        if retry_doc_ids:
+            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        elif num_failed:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        elif num_synced:
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+        else:
+            completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
+    except SoftTimeLimitExceeded:
+        task_logger.info(
+            f"SoftTimeLimitExceeded exception. num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as e:
+        # a failure outside of the per document updates (db, search settings, ...)
+        task_logger.exception(
+            f"vespa_metadata_sync_batch_task exceptioned: num_docs={len(document_ids)}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        retry_doc_ids = document_ids
+        retry_exception = e
+    finally:
+        elapsed = time.monotonic() - start
+        task_logger.info(
+            f"vespa_metadata_sync_batch_task completed: "
+            f"status={completion_status.value} "
+            f"docs={len(document_ids)} "
+            f"synced={num_synced} "
+            f"skipped={num_skipped} "
+            f"failed={num_failed} "
+            f"retrying={len(retry_doc_ids)} "
+            f"elapsed={elapsed:.2f}"
+        )
+
+    if retry_doc_ids:
+        if self.max_retries is not None and self.request.retries >= self.max_retries:
+            return False
+
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        countdown = 2 ** (self.request.retries + 4)
+        # only the documents that failed are retried
+        self.retry(
+            exc=retry_exception,
+            countdown=countdown,
+            kwargs=dict(document_ids=retry_doc_ids, tenant_id=tenant_id),
+        )  # this will raise a celery exception
+
+    if completion_status != OnyxCeleryTaskCompletionStatus.SUCCEEDED:
+        return False
+
+    return True
+
+
+def _unwrap_retry_error(ex: Exception) -> Exception:
+    """Returns the last underlying exception if ex is a tenacity RetryError."""
+    if isinstance(ex, RetryError):
+        task_logger.warning(
+            f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
+        )
+
+        # only use the inner exception if it is of type Exception
+        e_temp = ex.last_attempt.exception()
+        if isinstance(e_temp, Exception):
+            return e_temp
+
+    return ex
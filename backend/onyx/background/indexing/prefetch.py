@@ -0,0 +1,169 @@
+import contextvars
+import queue
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+# how often the producer re-checks whether the consumer has gone away while it is
+# blocked on a full queue
+_PUT_POLL_INTERVAL = 1.0
+
+
+class _ProducerDone:
+    pass
+
+
+class _ProducerError:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+class PrefetchStats:
+    """Throughput / backpressure numbers for a BackgroundPrefetcher. Times are seconds."""
+
+    def __init__(self) -> None:
+        self.items_produced = 0
+        self.items_consumed = 0
+        # time the producer spent generating items (e.g. connector API calls)
+        self.produce_seconds = 0.0
+        # time the producer sat on a full queue waiting for the consumer
+        self.producer_blocked_seconds = 0.0
+        # time the consumer sat on an empty queue waiting for the producer
+        self.consumer_wait_seconds = 0.0
+        self.max_queue_depth = 0
+        self._queue_depth_total = 0
+
+    @property
+    def avg_queue_depth(self) -> float:
+        if not self.items_consumed:
+            return 0.0
+        return self._queue_depth_total / self.items_consumed
+
+    def to_log_str(self) -> str:
+        return (
+            f"produced={self.items_produced} "
+            f"consumed={self.items_consumed} "
+            f"produce_time={self.produce_seconds:.2f} "
+            f"producer_blocked={self.producer_blocked_seconds:.2f} "
+            f"consumer_wait={self.consumer_wait_seconds:.2f} "
+            f"avg_queue_depth={self.avg_queue_depth:.2f} "
+            f"max_queue_depth={self.max_queue_depth}"
+        )
+
+
+class BackgroundPrefetcher(Generic[T]):
+    """Runs a generator in a background thread and hands its items to the consumer through
+    a bounded queue, so producing the next item overlaps with processing the current one.
+
+    - at most `max_prefetch` items are buffered, after that the producer blocks (backpressure)
+    - items are yielded in the exact order the generator produced them
+    - an exception in the producer is re-raised in the consumer
+    - if the consumer stops early (exception, break), the producer is told to stop at the
+      next item boundary
+
+    Contextvars (e.g. the current tenant) are copied into the producer thread.
+    """
+
+    def __init__(
+        self,
+        generator_factory: Callable[[], Iterator[T]],
+        max_prefetch: int,
+        name: str = "prefetcher",
+    ) -> None:
+        if max_prefetch < 1:
+            raise ValueError("max_prefetch must be at least 1")
+
+        self.generator_factory = generator_factory
+        self.name = name
+        self.stats = PrefetchStats()
+
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_prefetch)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _put(self, item: Any) -> bool:
+        """Returns False if the consumer went away before the item could be queued."""
+        start = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=_PUT_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats.producer_blocked_seconds += time.monotonic() - start
+
+    def _produce(self) -> None:
+        generator: Iterator[T] | None = None
+        try:
+            generator = self.generator_factory()
+            while not self._stop_event.is_set():
+                start = time.monotonic()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    break
+                finally:
+                    self.stats.produce_seconds += time.monotonic() - start
+
+                self.stats.items_produced += 1
+                if not self._put(item):
+                    return
+            self._put(_ProducerDone())
+        except BaseException as e:
+            self._put(_ProducerError(e))
+        finally:
+            # run the generator's cleanup (e.g. connector finally blocks) in this thread
+            close = getattr(generator, "close", None)
+            if close:
+                close()
+
+    def __iter__(self) -> Iterator[T]:
+        if self._thread is not None:
+            raise RuntimeError(f"{self.name} can only be iterated once")
+
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(
+            target=context.run, args=(self._produce,), name=self.name, daemon=True
+        )
+        self._thread.start()
+
+        try:
+            while True:
+                depth = self._queue.qsize()
+                start = time.monotonic()
+                item = self._queue.get()
+                self.stats.consumer_wait_seconds += time.monotonic() - start
+
+                if isinstance(item, _ProducerDone):
+                    return
+                if isinstance(item, _ProducerError):
+                    raise item.exception
+
+                self.stats.items_consumed += 1
+                self.stats._queue_depth_total += depth
+                self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        # unblock a producer that's waiting on a full queue
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
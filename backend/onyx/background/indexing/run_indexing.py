@@ -1,9 +1,16 @@
+import signal
+import sys
 import time
 import traceback
 from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from functools import partial
+from types import FrameType
+from typing import NamedTuple
 
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -12,7 +19,10 @@ from onyx.background.indexing.checkpointing_utils import check_checkpoint_size
 from onyx.background.indexing.checkpointing_utils import get_latest_valid_checkpoint
 from onyx.background.indexing.checkpointing_utils import save_checkpoint
 from onyx.background.indexing.memory_tracer import MemoryTracer
+from onyx.background.indexing.prefetch import BackgroundPrefetcher
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import INDEXING_CHUNKING_PROCESSES
+from onyx.configs.app_configs import INDEXING_PIPELINE_PREFETCH_BATCHES
 from onyx.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
 from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
 from onyx.configs.app_configs import INTEGRATION_TESTS_MODE
@@ -24,6 +34,7 @@ from onyx.connectors.connector_runner import ConnectorRunner
 from onyx.connectors.exceptions import ConnectorValidationError
 from onyx.connectors.exceptions import UnexpectedValidationError
 from onyx.connectors.factory import instantiate_connector
+from onyx.connectors.models import ConnectorCheckpoint
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
@@ -50,6 +61,8 @@ from onyx.db.models import IndexAttempt
 from onyx.db.models import IndexAttemptError
 from onyx.document_index.factory import get_default_document_index
 from onyx.httpx.httpx_pool import HttpxPool
+from onyx.indexing.chunker import shutdown_chunking_pools
+from onyx.indexing.contextual_rag import ContextualRAGUsage
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.indexing_pipeline import build_indexing_pipeline
@@ -68,6 +81,8 @@ from shared_configs.configs import MULTI_TENANT
 logger = setup_logger()
 
 INDEXING_TRACER_NUM_PRINT_ENTRIES = 5
+# log the pipeline throughput / queue depth every x batches when prefetching
+_PIPELINE_STATS_LOG_INTERVAL = 20
 
 
 def _get_connector_runner(
@@ -173,6 +188,55 @@ def strip_null_characters(doc_batch: list[Document]) -> list[Document]:
     return cleaned_batch
 
 
+class ConnectorRunOutput(NamedTuple):
+    document_batch: list[Document] | None = None
+    failure: ConnectorFailure | None = None
+    # set on the last output for a checkpoint, once everything the connector produced
+    # for the previous checkpoint has been handed out
+    completed_checkpoint: ConnectorCheckpoint | None = None
+
+
+def _iter_connector_outputs(
+    connector_runner: ConnectorRunner,
+    checkpoint: ConnectorCheckpoint,
+    ctx: "RunIndexingContext",
+) -> Iterator[ConnectorRunOutput]:
+    """Flattens the checkpoint loop of the connector into a single stream of outputs so
+    it can be consumed either inline or through a BackgroundPrefetcher."""
+    while checkpoint.has_more:
+        logger.info(
+            f"Running '{ctx.source.value}' connector with checkpoint: {checkpoint}"
+        )
+        for document_batch, failure, next_checkpoint in connector_runner.run(
+            checkpoint
+        ):
+            if next_checkpoint:
+                checkpoint = next_checkpoint
+
+            if document_batch is not None or failure is not None:
+                yield ConnectorRunOutput(document_batch=document_batch, failure=failure)
+
+        yield ConnectorRunOutput(completed_checkpoint=checkpoint)
+
+
+def _log_pipeline_stats(
+    prefetcher: BackgroundPrefetcher,
+    document_count: int,
+    indexing_seconds: float,
+    start_time: float,
+) -> None:
+    stats = prefetcher.stats
+    elapsed = time.monotonic() - start_time
+    logger.info(
+        f"event=indexing_pipeline "
+        f"docs={document_count} "
+        f"fetch_batches_per_sec={stats.items_produced / max(stats.produce_seconds, 1e-6):.2f} "
+        f"index_docs_per_sec={document_count / max(indexing_seconds, 1e-6):.2f} "
+        f"overall_docs_per_sec={document_count / max(elapsed, 1e-6):.2f} "
+        f"{stats.to_log_str()}"
+    )
+
+
 class ConnectorStopSignal(Exception):
     """A custom exception used to signal a stop in processing."""
 
@@ -390,6 +454,7 @@ def _run_indexing(
     net_doc_change = 0
     document_count = 0
     chunk_count = 0
+    contextual_rag_usage = ContextualRAGUsage()
     index_attempt: IndexAttempt | None = None
     try:
         with get_session_with_current_tenant() as db_session_temp:
@@ -436,177 +501,210 @@ def _run_indexing(
                 error for error in unresolved_errors if error.entity_id
             ]
 
-        while checkpoint.has_more:
-            logger.info(
-                f"Running '{ctx.source.value}' connector with checkpoint: {checkpoint}"
+        connector_outputs: Iterable[ConnectorRunOutput]
+        prefetcher: BackgroundPrefetcher[ConnectorRunOutput] | None = None
+        if INDEXING_PIPELINE_PREFETCH_BATCHES > 0:
+            # fetch the next batches from the connector while the current one is
+            # being chunked / embedded / written
+            prefetcher = BackgroundPrefetcher(
+                partial(_iter_connector_outputs, connector_runner, checkpoint, ctx),
+                max_prefetch=INDEXING_PIPELINE_PREFETCH_BATCHES,
+                name=f"connector_prefetch_{index_attempt_id}",
+            )
+            connector_outputs = prefetcher
+        else:
+            connector_outputs = _iter_connector_outputs(
+                connector_runner, checkpoint, ctx
             )
-            for document_batch, failure, next_checkpoint in connector_runner.run(
-                checkpoint
-            ):
-                # Check if connector is disabled mid run and stop if so unless it's the secondary
-                # index being built. We want to populate it even for paused connectors
-                # Often paused connectors are sources that aren't updated frequently but the
-                # contents still need to be initially pulled.
-                if callback:
-                    if callback.should_stop():
-                        raise ConnectorStopSignal("Connector stop signal detected")
-
-                # TODO: should we move this into the above callback instead?
-                with get_session_with_current_tenant() as db_session_temp:
-                    # will exception if the connector/index attempt is marked as paused/failed
-                    _check_connector_and_attempt_status(
-                        db_session_temp, ctx, index_attempt_id
-                    )
-
-                # save record of any failures at the connector level
-                if failure is not None:
-                    total_failures += 1
-                    with get_session_with_current_tenant() as db_session_temp:
-                        create_index_attempt_error(
-                            index_attempt_id,
-                            ctx.cc_pair_id,
-                            failure,
-                            db_session_temp,
-                        )
 
-                    _check_failure_threshold(
-                        total_failures, document_count, batch_num, failure
-                    )
+        indexing_seconds = 0.0
+        for connector_output in connector_outputs:
+            if connector_output.completed_checkpoint is not None:
+                checkpoint = connector_output.completed_checkpoint
 
-                # save the new checkpoint (if one is provided)
-                if next_checkpoint:
-                    checkpoint = next_checkpoint
+                # `make sure the checkpoints aren't getting too large`at some regular interval
+                CHECKPOINT_SIZE_CHECK_INTERVAL = 100
+                if batch_num % CHECKPOINT_SIZE_CHECK_INTERVAL == 0:
+                    check_checkpoint_size(checkpoint)
 
-                # below is all document processing logic, so if no batch we can just continue
-                if document_batch is None:
-                    continue
+                # save latest checkpoint. Every batch produced for this checkpoint has been
+                # indexed by now, since outputs are processed strictly in order
+                with get_session_with_current_tenant() as db_session_temp:
+                    save_checkpoint(
+                        db_session=db_session_temp,
+                        index_attempt_id=index_attempt_id,
+                        checkpoint=checkpoint,
+                    )
+                continue
+
+            document_batch = connector_output.document_batch
+            failure = connector_output.failure
+            # Check if connector is disabled mid run and stop if so unless it's the secondary
+            # index being built. We want to populate it even for paused connectors
+            # Often paused connectors are sources that aren't updated frequently but the
+            # contents still need to be initially pulled.
+            if callback:
+                if callback.should_stop():
+                    raise ConnectorStopSignal("Connector stop signal detected")
+
+            # TODO: should we move this into the above callback instead?
+            with get_session_with_current_tenant() as db_session_temp:
+                # will exception if the connector/index attempt is marked as paused/failed
+                _check_connector_and_attempt_status(
+                    db_session_temp, ctx, index_attempt_id
+                )
 
-                batch_description = []
+            # save record of any failures at the connector level
+            if failure is not None:
+                total_failures += 1
+                with get_session_with_current_tenant() as db_session_temp:
+                    create_index_attempt_error(
+                        index_attempt_id,
+                        ctx.cc_pair_id,
+                        failure,
+                        db_session_temp,
+                    )
 
-                # Generate an ID that can be used to correlate activity between here
-                # and the embedding model server
-                doc_batch_cleaned = strip_null_characters(document_batch)
-                for doc in doc_batch_cleaned:
-                    batch_description.append(doc.to_short_descriptor())
+                _check_failure_threshold(
+                    total_failures, document_count, batch_num, failure
+                )
 
-                    doc_size = 0
-                    for section in doc.sections:
-                        if (
-                            isinstance(section, TextSection)
-                            and section.text is not None
-                        ):
-                            doc_size += len(section.text)
+            # below is all document processing logic, so if no batch we can just continue
+            if document_batch is None:
+                continue
 
-                    if doc_size > INDEXING_SIZE_WARNING_THRESHOLD:
-                        logger.warning(
-                            f"Document size: doc='{doc.to_short_descriptor()}' "
-                            f"size={doc_size} "
-                            f"threshold={INDEXING_SIZE_WARNING_THRESHOLD}"
-                        )
+            batch_description = []
 
-                logger.debug(f"Indexing batch of documents: {batch_description}")
+            # Generate an ID that can be used to correlate activity between here
+            # and the embedding model server
+            doc_batch_cleaned = strip_null_characters(document_batch)
+            for doc in doc_batch_cleaned:
+                batch_description.append(doc.to_short_descriptor())
 
-                index_attempt_md.request_id = make_randomized_onyx_request_id("CIX")
-                index_attempt_md.structured_id = (
-                    f"{tenant_id}:{ctx.cc_pair_id}:{index_attempt_id}:{batch_num}"
-                )
-                index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
+                doc_size = 0
+                for section in doc.sections:
+                    if isinstance(section, TextSection) and section.text is not None:
+                        doc_size += len(section.text)
 
-                # real work happens here!
-                index_pipeline_result = indexing_pipeline(
-                    document_batch=doc_batch_cleaned,
-                    index_attempt_metadata=index_attempt_md,
-                )
+                if doc_size > INDEXING_SIZE_WARNING_THRESHOLD:
+                    logger.warning(
+                        f"Document size: doc='{doc.to_short_descriptor()}' "
+                        f"size={doc_size} "
+                        f"threshold={INDEXING_SIZE_WARNING_THRESHOLD}"
+                    )
 
-                batch_num += 1
-                net_doc_change += index_pipeline_result.new_docs
-                chunk_count += index_pipeline_result.total_chunks
-                document_count += index_pipeline_result.total_docs
-
-                # resolve errors for documents that were successfully indexed
-                failed_document_ids = [
-                    failure.failed_document.document_id
-                    for failure in index_pipeline_result.failures
-                    if failure.failed_document
-                ]
-                successful_document_ids = [
-                    document.id
-                    for document in document_batch
-                    if document.id not in failed_document_ids
-                ]
-                for document_id in successful_document_ids:
-                    with get_session_with_current_tenant() as db_session_temp:
-                        if document_id in doc_id_to_unresolved_errors:
-                            logger.info(
-                                f"Resolving IndexAttemptError for document '{document_id}'"
-                            )
-                            for error in doc_id_to_unresolved_errors[document_id]:
-                                error.is_resolved = True
-                                db_session_temp.add(error)
-                        db_session_temp.commit()
-
-                # add brand new failures
-                if index_pipeline_result.failures:
-                    total_failures += len(index_pipeline_result.failures)
-                    with get_session_with_current_tenant() as db_session_temp:
-                        for failure in index_pipeline_result.failures:
-                            create_index_attempt_error(
-                                index_attempt_id,
-                                ctx.cc_pair_id,
-                                failure,
-                                db_session_temp,
-                            )
+            logger.debug(f"Indexing batch of documents: {batch_description}")
 
-                    _check_failure_threshold(
-                        total_failures,
-                        document_count,
-                        batch_num,
-                        index_pipeline_result.failures[-1],
-                    )
+            index_attempt_md.request_id = make_randomized_onyx_request_id("CIX")
+            index_attempt_md.structured_id = (
+                f"{tenant_id}:{ctx.cc_pair_id}:{index_attempt_id}:{batch_num}"
+            )
+            index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
 
-                # This new value is updated every batch, so UI can refresh per batch update
+            # real work happens here!
+            indexing_start = time.monotonic()
+            index_pipeline_result = indexing_pipeline(
+                document_batch=doc_batch_cleaned,
+                index_attempt_metadata=index_attempt_md,
+            )
+            indexing_seconds += time.monotonic() - indexing_start
+
+            batch_num += 1
+            net_doc_change += index_pipeline_result.new_docs
+            chunk_count += index_pipeline_result.total_chunks
+            document_count += index_pipeline_result.total_docs
+            if index_pipeline_result.contextual_rag_usage:
+                contextual_rag_usage.add(index_pipeline_result.contextual_rag_usage)
+
+            # resolve errors for documents that were successfully indexed
+            failed_document_ids = [
+                failure.failed_document.document_id
+                for failure in index_pipeline_result.failures
+                if failure.failed_document
+            ]
+            successful_document_ids = [
+                document.id
+                for document in document_batch
+                if document.id not in failed_document_ids
+            ]
+            for document_id in successful_document_ids:
                 with get_session_with_current_tenant() as db_session_temp:
-                    # NOTE: Postgres uses the start of the transactions when computing `NOW()`
-                    # so we need either to commit() or to use a new session
-                    update_docs_indexed(
-                        db_session=db_session_temp,
-                        index_attempt_id=index_attempt_id,
-                        total_docs_indexed=document_count,
-                        new_docs_indexed=net_doc_change,
-                        docs_removed_from_index=0,
-                    )
+                    if document_id in doc_id_to_unresolved_errors:
+                        logger.info(
+                            f"Resolving IndexAttemptError for document '{document_id}'"
+                        )
+                        for error in doc_id_to_unresolved_errors[document_id]:
+                            error.is_resolved = True
+                            db_session_temp.add(error)
+                    db_session_temp.commit()
+
+            # add brand new failures
+            if index_pipeline_result.failures:
+                total_failures += len(index_pipeline_result.failures)
+                with get_session_with_current_tenant() as db_session_temp:
+                    for failure in index_pipeline_result.failures:
+                        create_index_attempt_error(
+                            index_attempt_id,
+                            ctx.cc_pair_id,
+                            failure,
+                            db_session_temp,
+                        )
 
-                if callback:
-                    callback.progress("_run_indexing", len(doc_batch_cleaned))
-
-                # Add telemetry for indexing progress
-                optional_telemetry(
-                    record_type=RecordType.INDEXING_PROGRESS,
-                    data={
-                        "index_attempt_id": index_attempt_id,
-                        "cc_pair_id": ctx.cc_pair_id,
-                        "current_docs_indexed": document_count,
-                        "current_chunks_indexed": chunk_count,
-                        "source": ctx.source.value,
-                    },
-                    tenant_id=tenant_id,
+                _check_failure_threshold(
+                    total_failures,
+                    document_count,
+                    batch_num,
+                    index_pipeline_result.failures[-1],
                 )
 
-                memory_tracer.increment_and_maybe_trace()
-
-            # `make sure the checkpoints aren't getting too large`at some regular interval
-            CHECKPOINT_SIZE_CHECK_INTERVAL = 100
-            if batch_num % CHECKPOINT_SIZE_CHECK_INTERVAL == 0:
-                check_checkpoint_size(checkpoint)
-
-            # save latest checkpoint
+            # This new value is updated every batch, so UI can refresh per batch update
             with get_session_with_current_tenant() as db_session_temp:
-                save_checkpoint(
+                # NOTE: Postgres uses the start of the transactions when computing `NOW()`
+                # so we need either to commit() or to use a new session
+                update_docs_indexed(
                     db_session=db_session_temp,
                     index_attempt_id=index_attempt_id,
-                    checkpoint=checkpoint,
+                    total_docs_indexed=document_count,
+                    new_docs_indexed=net_doc_change,
+                    docs_removed_from_index=0,
                 )
 
+            if callback:
+                callback.progress("_run_indexing", len(doc_batch_cleaned))
+
+            # Add telemetry for indexing progress
+            optional_telemetry(
+                record_type=RecordType.INDEXING_PROGRESS,
+                data={
+                    "index_attempt_id": index_attempt_id,
+                    "cc_pair_id": ctx.cc_pair_id,
+                    "current_docs_indexed": document_count,
+                    "current_chunks_indexed": chunk_count,
+                    "source": ctx.source.value,
+                },
+                tenant_id=tenant_id,
+            )
+
+            memory_tracer.increment_and_maybe_trace()
+
+            if prefetcher and batch_num % _PIPELINE_STATS_LOG_INTERVAL == 0:
+                _log_pipeline_stats(
+                    prefetcher, document_count, indexing_seconds, start_time
+                )
+
+        if prefetcher:
+            _log_pipeline_stats(
+                prefetcher, document_count, indexing_seconds, start_time
+            )
+
+        if contextual_rag_usage.llm_calls or contextual_rag_usage.failed_calls:
+            logger.info(
+                f"event=contextual_rag_usage_total "
+                f"index_attempt_id={index_attempt_id} "
+                f"cc_pair_id={ctx.cc_pair_id} "
+                f"{contextual_rag_usage.to_log_str()}"
+            )
+
         optional_telemetry(
             record_type=RecordType.INDEXING_COMPLETE,
             data={
@@ -765,6 +863,11 @@ def _run_indexing(
             )
 
 
+def _exit_on_sigterm(signum: int, frame: FrameType | None) -> None:
+    # unwinds through the finally blocks instead of dying on the spot
+    sys.exit(128 + signum)
+
+
 def run_indexing_entrypoint(
     index_attempt_id: int,
     tenant_id: str,
@@ -803,8 +906,16 @@ def run_indexing_entrypoint(
         f"credentials='{credential_id}'"
     )
 
-    with get_session_with_current_tenant() as db_session:
-        _run_indexing(db_session, index_attempt_id, tenant_id, callback)
+    if INDEXING_CHUNKING_PROCESSES > 1:
+        # the watchdog cancels the attempt with SIGTERM, the chunking workers must
+        # not outlive this process
+        signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            _run_indexing(db_session, index_attempt_id, tenant_id, callback)
+    finally:
+        shutdown_chunking_pools()
 
     logger.info(
         f"Indexing finished{tenant_str}: "
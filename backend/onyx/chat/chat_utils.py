@@ -1,4 +1,5 @@
 import re
+from collections.abc import Sequence
 from typing import cast
 from uuid import UUID
 
@@ -147,8 +148,6 @@ def create_chat_chain(
     stop_at_message_id: int | None = None,
 ) -> tuple[ChatMessage, list[ChatMessage]]:
     """Build the linear chain of messages without including the root message"""
-    mainline_messages: list[ChatMessage] = []
-
     all_chat_messages = get_chat_messages_by_session(
         chat_session_id=chat_session_id,
         user_id=None,
@@ -156,6 +155,23 @@ def create_chat_chain(
         skip_permission_check=True,
         prefetch_tool_calls=prefetch_tool_calls,
     )
+
+    return build_chat_chain(
+        all_chat_messages=all_chat_messages,
+        stop_at_message_id=stop_at_message_id,
+    )
+
+
+def build_chat_chain(
+    all_chat_messages: Sequence[ChatMessage],
+    # Optional id at which we finish processing
+    stop_at_message_id: int | None = None,
+) -> tuple[ChatMessage, list[ChatMessage]]:
+    """Same as `create_chat_chain`, but for the already fetched messages of a single
+    chat session (root message first). Lets callers fetch the messages of many
+    sessions in one query and build the chains in memory."""
+    mainline_messages: list[ChatMessage] = []
+
     id_to_msg = {msg.id: msg for msg in all_chat_messages}
 
     if not all_chat_messages:
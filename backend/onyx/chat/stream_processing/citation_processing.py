@@ -11,12 +11,56 @@ from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+_CITATION_PATTERN = re.compile(r"\[(\d+)\]|\[\[(\d+)\]\]")  # [1], [[1]], etc.
+_POSSIBLE_CITATION_PATTERN = re.compile(r"(\[+\d*$)")  # [1, [, [[, [[2, etc.
+_MANUAL_CITATION_PATTERN = re.compile(r"\[\[(\d+)\]\]")
+
+# The longest partial citation (e.g. "[[12") that is held back waiting for more tokens.
+# Anything longer can't turn into a real citation and is streamed out right away.
+_MAX_CITATION_LOOKAHEAD = 16
+
 
 def in_code_block(llm_text: str) -> bool:
     count = llm_text.count(TRIPLE_BACKTICK)
     return count % 2 != 0
 
 
+class CodeFenceTracker:
+    """Incrementally tracks whether streamed text is inside a ``` code block.
+
+    Equivalent to calling in_code_block on the full text after every token, but only
+    looks at the new token. Fences can be split across tokens, so the length of the
+    trailing run of backticks is carried over between tokens."""
+
+    def __init__(self) -> None:
+        # fences in backtick runs that can no longer grow
+        self._closed_fence_count = 0
+        # length of the run of backticks at the very end of the text so far
+        self._trailing_backticks = 0
+
+    def feed(self, text: str) -> None:
+        if "`" not in text:
+            if text:
+                self._closed_fence_count += self._trailing_backticks // 3
+                self._trailing_backticks = 0
+            return
+
+        for char in text:
+            if char == "`":
+                self._trailing_backticks += 1
+            elif self._trailing_backticks:
+                self._closed_fence_count += self._trailing_backticks // 3
+                self._trailing_backticks = 0
+
+    @property
+    def fence_count(self) -> int:
+        return self._closed_fence_count + self._trailing_backticks // 3
+
+    @property
+    def in_code_block(self) -> bool:
+        return self.fence_count % 2 != 0
+
+
 class CitationProcessor:
     def __init__(
         self,
@@ -31,9 +75,13 @@ class CitationProcessor:
         self.stop_stream = stop_stream
         self.final_order_mapping = final_doc_id_to_rank_map.order_mapping
         self.display_order_mapping = display_doc_id_to_rank_map.order_mapping
-        self.llm_out = ""
+        # only the length and code fence state of the full output are needed, keeping
+        # those up to date per token keeps processing linear in the output length
+        self.llm_out_len = 0
+        self.code_fences = CodeFenceTracker()
         self.max_citation_num = len(context_docs)
-        self.citation_order: list[int] = []  # order of citations in the LLM output
+        # final citation num -> 1-based order of first appearance in the LLM output
+        self.citation_order: dict[int, int] = {}
         self.curr_segment = ""
         self.cited_inds: set[int] = set()
         self.hold = ""
@@ -59,7 +107,8 @@ class CitationProcessor:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.llm_out_len += len(token)
+        self.code_fences.feed(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -67,25 +116,25 @@ class CitationProcessor:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if piece_that_comes_after == "\n" and self.code_fences.in_code_block:
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
-        citation_pattern = r"\[(\d+)\]|\[\[(\d+)\]\]"  # [1], [[1]], etc.
-        citations_found = list(re.finditer(citation_pattern, self.curr_segment))
-        possible_citation_pattern = r"(\[+\d*$)"  # [1, [, [[, [[2, etc.
-        possible_citation_found = re.search(
-            possible_citation_pattern, self.curr_segment
-        )
+        citations_found = list(_CITATION_PATTERN.finditer(self.curr_segment))
+        possible_citation_found = _POSSIBLE_CITATION_PATTERN.search(self.curr_segment)
+        if (
+            possible_citation_found
+            and len(possible_citation_found.group(1)) > _MAX_CITATION_LOOKAHEAD
+        ):
+            possible_citation_found = None
 
-        if len(citations_found) == 0 and len(self.llm_out) - self.past_cite_count > 5:
+        if len(citations_found) == 0 and self.llm_out_len - self.past_cite_count > 5:
             self.current_citations = []
 
         result = ""
-        if citations_found and not in_code_block(self.llm_out):
+        if citations_found and not self.code_fences.in_code_block:
             last_citation_end = 0
             length_to_add = 0
-            while len(citations_found) > 0:
-                citation = citations_found.pop(0)
+            for citation in citations_found:
                 numerical_value = int(
                     next(group for group in citation.groups() if group is not None)
                 )
@@ -98,10 +147,9 @@ class CitationProcessor:
                     context_llm_doc.document_id
                 ]
 
-                if final_citation_num not in self.citation_order:
-                    self.citation_order.append(final_citation_num)
-
-                citation_order_idx = self.citation_order.index(final_citation_num) + 1
+                citation_order_idx = self.citation_order.setdefault(
+                    final_citation_num, len(self.citation_order) + 1
+                )
 
                 # get the value that was displayed to user, should always
                 # be in the display_doc_order_dict. But check anyways
@@ -129,7 +177,7 @@ class CitationProcessor:
 
                 # Handle edge case where LLM outputs citation itself
                 if self.curr_segment.startswith("[["):
-                    match = re.match(r"\[\[(\d+)\]\]", self.curr_segment)
+                    match = _MANUAL_CITATION_PATTERN.match(self.curr_segment)
                     if match:
                         try:
                             doc_id = int(match.group(1))
@@ -151,7 +199,7 @@ class CitationProcessor:
 
                 link = context_llm_doc.link
 
-                self.past_cite_count = len(self.llm_out)
+                self.past_cite_count = self.llm_out_len
                 self.current_citations.append(final_citation_num)
 
                 if citation_order_idx not in self.cited_inds:
@@ -255,6 +255,16 @@ REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL",
 # our redis client only, not celery's
 REDIS_POOL_MAX_CONNECTIONS = int(os.environ.get("REDIS_POOL_MAX_CONNECTIONS", 128))
 
+# Reads of the key value store are cached in process, entries are invalidated across
+# processes through Redis pub/sub. The TTL bounds how stale an entry can get if an
+# invalidation is missed, 0 disables the cache
+KV_STORE_LOCAL_CACHE_TTL_SECONDS = float(
+    os.environ.get("KV_STORE_LOCAL_CACHE_TTL_SECONDS") or 60
+)
+KV_STORE_LOCAL_CACHE_MAX_ENTRIES = int(
+    os.environ.get("KV_STORE_LOCAL_CACHE_MAX_ENTRIES") or 1024
+)
+
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#redis-backend-settings
 # should be one of "required", "optional", or "none"
 REDIS_SSL_CERT_REQS = os.getenv("REDIS_SSL_CERT_REQS", "none")
@@ -310,6 +320,11 @@ except ValueError:
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 1024
 
+# The number of documents synced to Vespa by a single metadata sync task. Doc sets, ACLs
+# and the document index are resolved once per batch instead of once per document.
+# Set to 1 to go back to one task per document.
+VESPA_SYNC_BATCH_SIZE = max(1, int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 16))
+
 DB_YIELD_PER_DEFAULT = 64
 
 #####
@@ -463,6 +478,13 @@ MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE = int(
     os.environ.get("MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE", 0)
 )
 
+# If set to `true`, pruning keeps the document ids of the source in Redis and streams
+# the indexed document ids from Postgres instead of loading both into memory, so the
+# memory used by the pruning worker doesn't grow with the size of the connector
+STREAMING_PRUNING_ENABLED = (
+    os.environ.get("STREAMING_PRUNING_ENABLED", "").lower() == "true"
+)
+
 # comma delimited list of zendesk article labels to skip indexing for
 ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS = os.environ.get(
     "ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS", ""
@@ -500,6 +522,26 @@ ENABLE_CONTEXTUAL_RAG = os.environ.get("ENABLE_CONTEXTUAL_RAG", "").lower() == "
 
 DEFAULT_CONTEXTUAL_RAG_LLM_NAME = "gpt-4o-mini"
 DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER = "DevEnvPresetOpenAI"
+# Max number of contextual RAG LLM calls in flight at once per LLM provider (e.g. "openai")
+# within an indexing process. Calls beyond this wait for a free slot.
+CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS = int(
+    os.environ.get("CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS") or 8
+)
+# Per provider overrides of the above, e.g. {"openai": 32, "anthropic": 4}
+CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS_BY_PROVIDER: dict[str, int] = {}
+try:
+    CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS_BY_PROVIDER = cast(
+        dict[str, int],
+        json.loads(
+            os.environ.get("CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS_BY_PROVIDER") or "{}"
+        ),
+    )
+except json.JSONDecodeError:
+    pass
+# Number of times a rate limited (429) contextual RAG call is retried with backoff
+CONTEXTUAL_RAG_RATE_LIMIT_RETRIES = int(
+    os.environ.get("CONTEXTUAL_RAG_RATE_LIMIT_RETRIES") or 5
+)
 # Finer grained chunking for more detail retention
 # Slightly larger since the sentence aware split is a max cutoff so most minichunks will be under MINI_CHUNK_SIZE
 # tokens. But we need it to be at least as big as 1/4th chunk size to avoid having a tiny mini-chunk at the end
@@ -531,6 +573,35 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 1
 )
 
+# When > 1, documents of an indexing batch are chunked in a pool of this many worker
+# processes instead of in the indexing process. Chunking is CPU bound, so this helps
+# when batches contain many large documents (e.g. PDF uploads). 0 or 1 disables it.
+INDEXING_CHUNKING_PROCESSES = int(os.environ.get("INDEXING_CHUNKING_PROCESSES") or 0)
+
+# Reuse passage embeddings for chunks whose text (and embedding settings) did not change
+# since they were last embedded. Stored in Postgres, bounded to the number of entries below
+# with least recently used entries evicted first. Off unless enabled.
+ENABLE_EMBEDDING_CACHE = os.environ.get("ENABLE_EMBEDDING_CACHE", "").lower() == "true"
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 250_000
+)
+# Cache hits only update the last use of entries that weren't used for this long, so
+# most lookups don't write
+EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS = int(
+    os.environ.get("EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS") or 60 * 60
+)
+# Eviction requires a count over the whole table, only do it every x cache writes
+EMBEDDING_CACHE_PRUNE_INTERVAL = int(
+    os.environ.get("EMBEDDING_CACHE_PRUNE_INTERVAL") or 50
+)
+
+# When > 0, the connector runs in a background thread during indexing and fetches up to
+# this many document batches ahead while the current batch is being chunked, embedded
+# and written. 0 keeps the connector and indexing strictly serial.
+INDEXING_PIPELINE_PREFETCH_BATCHES = int(
+    os.environ.get("INDEXING_PIPELINE_PREFETCH_BATCHES") or 0
+)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -596,6 +667,21 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 )
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
+# Limits of the pooled (per process) client used for Vespa searches and visits
+VESPA_QUERY_HTTP_MAX_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_HTTP_MAX_CONNECTIONS") or 100
+)
+VESPA_QUERY_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_HTTP_MAX_KEEPALIVE_CONNECTIONS") or 20
+)
+VESPA_QUERY_HTTP_KEEPALIVE_EXPIRY = float(
+    os.environ.get("VESPA_QUERY_HTTP_KEEPALIVE_EXPIRY") or 30
+)
+# Send query embeddings to Vespa in the hex tensor form rather than as a list of
+# numbers. Only turn off for Vespa versions that can't parse the hex form
+VESPA_HEX_QUERY_EMBEDDINGS = (
+    os.environ.get("VESPA_HEX_QUERY_EMBEDDINGS", "true").lower() == "true"
+)
 
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
@@ -709,6 +795,27 @@ IMAGE_ANALYSIS_SYSTEM_PROMPT = os.environ.get(
     DEFAULT_IMAGE_ANALYSIS_SYSTEM_PROMPT,
 )
 
+# Number of images from an indexing batch that are summarized by the vision LLM at once
+IMAGE_SUMMARIZATION_MAX_WORKERS = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_WORKERS") or 8
+)
+
+# Reuse the summaries of images that were already summarized with the same vision model
+# and prompts (e.g. logos or screenshots repeated across documents). Works like the
+# embedding cache above.
+ENABLE_IMAGE_SUMMARY_CACHE = (
+    os.environ.get("ENABLE_IMAGE_SUMMARY_CACHE", "true").lower() == "true"
+)
+IMAGE_SUMMARY_CACHE_MAX_ENTRIES = int(
+    os.environ.get("IMAGE_SUMMARY_CACHE_MAX_ENTRIES") or 50_000
+)
+IMAGE_SUMMARY_CACHE_TOUCH_INTERVAL_SECONDS = int(
+    os.environ.get("IMAGE_SUMMARY_CACHE_TOUCH_INTERVAL_SECONDS") or 60 * 60
+)
+IMAGE_SUMMARY_CACHE_PRUNE_INTERVAL = int(
+    os.environ.get("IMAGE_SUMMARY_CACHE_PRUNE_INTERVAL") or 20
+)
+
 DISABLE_AUTO_AUTH_REFRESH = (
     os.environ.get("DISABLE_AUTO_AUTH_REFRESH", "").lower() == "true"
 )
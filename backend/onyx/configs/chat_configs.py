@@ -55,6 +55,17 @@ TITLE_CONTENT_RATIO = max(
     0, min(1, float(os.environ.get("TITLE_CONTENT_RATIO") or 0.10))
 )
 
+# Query embeddings are cached per search settings and (whitespace normalized) query text.
+# The in-process cache is always used, the Redis cache additionally shares embeddings
+# across API server / celery processes
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE") or 2048)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60
+)
+QUERY_EMBEDDING_REDIS_CACHE_ENABLED = (
+    os.environ.get("QUERY_EMBEDDING_REDIS_CACHE_ENABLED", "").lower() == "true"
+)
+
 # A list of languages passed to the LLM to rephase the query
 # For example "English,French,Spanish", be sure to use the "," separator
 MULTILINGUAL_QUERY_EXPANSION = os.environ.get("MULTILINGUAL_QUERY_EXPANSION") or None
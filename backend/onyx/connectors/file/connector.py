@@ -43,8 +43,11 @@ def _read_files_and_metadata(
     metadata: dict[str, Any] = {}
     directory_path = os.path.dirname(file_name)
 
-    # Read file from Postgres store
-    file_content = get_default_file_store(db_session).read_file(file_name, mode="b")
+    # Stream the file from the Postgres store, large uploads (and zips, of which only
+    # the members being extracted are read) don't need to fit in memory
+    file_content = get_default_file_store(db_session).read_file(
+        file_name, mode="b", stream=True
+    )
 
     # If it's a zip, expand it
     if extension == ".zip":
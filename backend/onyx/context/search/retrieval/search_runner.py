@@ -1,12 +1,18 @@
+import hashlib
 import string
 from collections.abc import Callable
+from typing import cast
 
 import nltk  # type:ignore
+import numpy as np
 from nltk.corpus import stopwords  # type:ignore
 from nltk.tokenize import word_tokenize  # type:ignore
 from sqlalchemy.orm import Session
 
 from onyx.chat.models import LlmDoc
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_SIZE
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.configs.chat_configs import QUERY_EMBEDDING_REDIS_CACHE_ENABLED
 from onyx.context.search.models import ChunkMetric
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunk
@@ -17,6 +23,7 @@ from onyx.context.search.models import RetrievalMetricsContainer
 from onyx.context.search.models import SearchQuery
 from onyx.context.search.postprocessing.postprocessing import cleanup_chunks
 from onyx.context.search.utils import inference_section_from_chunks
+from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.db.search_settings import get_multilingual_expansion
 from onyx.document_index.interfaces import DocumentIndex
@@ -25,12 +32,15 @@ from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
 )
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.redis.redis_pool import get_redis_client
 from onyx.secondary_llm_flows.query_expansion import multilingual_query_expansion
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
+from onyx.utils.ttl_cache import TTLCache
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
+from shared_configs.contextvars import get_current_tenant_id
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 
@@ -131,17 +141,100 @@ def combine_retrieval_results(
     return sorted_chunks
 
 
+# keyed by tenant as well, search settings ids are only unique within a tenant
+_QUERY_EMBEDDING_CACHE: TTLCache[tuple[str, int, str], Embedding] = TTLCache(
+    maxsize=QUERY_EMBEDDING_CACHE_SIZE, ttl=QUERY_EMBEDDING_CACHE_TTL_SECONDS
+)
+# Building an EmbeddingModel also resolves the tokenizer, only do it when the
+# search settings change
+_QUERY_EMBEDDING_MODEL_CACHE: TTLCache[tuple, EmbeddingModel] = TTLCache(
+    maxsize=8, ttl=QUERY_EMBEDDING_CACHE_TTL_SECONDS
+)
+_QUERY_EMBEDDING_REDIS_PREFIX = "query_embedding"
+
+
+def _get_query_embedding_model(search_settings: SearchSettings) -> EmbeddingModel:
+    # include everything that goes into the model so that edits to the provider
+    # (e.g. a rotated API key) don't keep using a stale client
+    model_key = (
+        search_settings.id,
+        search_settings.model_name,
+        search_settings.normalize,
+        search_settings.query_prefix,
+        search_settings.passage_prefix,
+        search_settings.api_key,
+        search_settings.provider_type,
+        search_settings.api_url,
+        search_settings.api_version,
+        search_settings.deployment_name,
+        search_settings.reduced_dimension,
+    )
+    model = _QUERY_EMBEDDING_MODEL_CACHE.get(model_key)
+    if model is None:
+        model = EmbeddingModel.from_db_model(
+            search_settings=search_settings,
+            # The below are globally set, this flow always uses the indexing one
+            server_host=MODEL_SERVER_HOST,
+            server_port=MODEL_SERVER_PORT,
+        )
+        _QUERY_EMBEDDING_MODEL_CACHE.set(model_key, model)
+    return model
+
+
+def _get_redis_cache_key(search_settings_id: int, query: str) -> str:
+    query_hash = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return f"{_QUERY_EMBEDDING_REDIS_PREFIX}:{search_settings_id}:{query_hash}"
+
+
+def _get_redis_cached_query_embedding(redis_key: str) -> Embedding | None:
+    try:
+        cached = get_redis_client().get(redis_key)
+    except Exception:
+        logger.exception("Failed to read query embedding from Redis")
+        return None
+
+    if not cached:
+        return None
+    return np.frombuffer(cast(bytes, cached), dtype="<f4").tolist()
+
+
+def _set_redis_cached_query_embedding(redis_key: str, embedding: Embedding) -> None:
+    try:
+        get_redis_client().set(
+            redis_key,
+            np.asarray(embedding, dtype="<f4").tobytes(),
+            ex=QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+        )
+    except Exception:
+        logger.exception("Failed to write query embedding to Redis")
+
+
 def get_query_embedding(query: str, db_session: Session) -> Embedding:
     search_settings = get_current_search_settings(db_session)
 
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
-        # The below are globally set, this flow always uses the indexing one
-        server_host=MODEL_SERVER_HOST,
-        server_port=MODEL_SERVER_PORT,
-    )
-
-    query_embedding = model.encode([query], text_type=EmbedTextType.QUERY)[0]
+    # Differences in whitespace don't change the meaning of the query but would
+    # otherwise miss the cache (e.g. Slack messages, LLM rephrases)
+    normalized_query = " ".join(query.split()) or query
+    cache_key = (get_current_tenant_id(), search_settings.id, normalized_query)
+
+    query_embedding = _QUERY_EMBEDDING_CACHE.get(cache_key)
+    if query_embedding is not None:
+        return query_embedding
+
+    redis_key: str | None = None
+    if QUERY_EMBEDDING_REDIS_CACHE_ENABLED:
+        redis_key = _get_redis_cache_key(search_settings.id, normalized_query)
+        query_embedding = _get_redis_cached_query_embedding(redis_key)
+
+    if query_embedding is None:
+        model = _get_query_embedding_model(search_settings)
+        query_embedding = model.encode(
+            [normalized_query], text_type=EmbedTextType.QUERY
+        )[0]
+        if redis_key:
+            _set_redis_cached_query_embedding(redis_key, query_embedding)
+
+    _QUERY_EMBEDDING_CACHE.set(cache_key, query_embedding)
     return query_embedding
 
 
@@ -17,6 +17,7 @@ from sqlalchemy import select
 from sqlalchemy import update
 from sqlalchemy.exc import MultipleResultsFound
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import Session
 
 from onyx.agents.agent_search.shared_graph_utils.models import CombinedAgentMetrics
@@ -461,6 +462,7 @@ def get_chat_messages_by_sessions(
     user_id: UUID | None,
     db_session: Session,
     skip_permission_check: bool = False,
+    prefetch_feedback_and_docs: bool = False,
 ) -> Sequence[ChatMessage]:
     if not skip_permission_check:
         for chat_session_id in chat_session_ids:
@@ -472,6 +474,13 @@ def get_chat_messages_by_sessions(
         .where(ChatMessage.chat_session_id.in_(chat_session_ids))
         .order_by(nullsfirst(ChatMessage.parent_message))
     )
+    if prefetch_feedback_and_docs:
+        # one extra query per relationship for all of the sessions, instead of
+        # one per message when they are lazy loaded
+        stmt = stmt.options(
+            selectinload(ChatMessage.chat_message_feedbacks),
+            selectinload(ChatMessage.search_docs),
+        )
     return db_session.execute(stmt).scalars().all()
 
 
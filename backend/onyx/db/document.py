@@ -154,6 +154,17 @@ def construct_document_select_for_connector_credential_pair(
     return stmt
 
 
+def construct_document_id_select_for_connector_credential_pair(
+    connector_id: int, credential_id: int
+) -> Select:
+    return select(DocumentByConnectorCredentialPair.id).where(
+        and_(
+            DocumentByConnectorCredentialPair.connector_id == connector_id,
+            DocumentByConnectorCredentialPair.credential_id == credential_id,
+        )
+    )
+
+
 def get_documents_for_cc_pair(
     db_session: Session,
     cc_pair_id: int,
@@ -513,6 +524,19 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(document_ids: list[str], db_session: Session) -> None:
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -816,6 +840,23 @@ def get_document_sources(
     return {doc_id: source for doc_id, source in results}
 
 
+def fetch_known_chunk_counts_for_documents(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, int]:
+    """Return a mapping of document_id -> chunk_count for the documents whose chunk
+    count is recorded in the database. Unknown documents and documents without a
+    chunk_count (indexed before chunk counts were tracked) are left out."""
+    if not document_ids:
+        return {}
+
+    stmt = select(DbDocument.id, DbDocument.chunk_count).where(
+        DbDocument.id.in_(document_ids),
+        DbDocument.chunk_count.is_not(None),
+    )
+    return {str(row.id): row.chunk_count for row in db_session.execute(stmt)}
+
+
 def fetch_chunk_counts_for_documents(
     document_ids: list[str],
     db_session: Session,
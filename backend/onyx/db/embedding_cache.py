@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from onyx.db.lru_cache_table import get_cache_entries
+from onyx.db.lru_cache_table import prune_cache_entries
+from onyx.db.lru_cache_table import upsert_cache_entries
+from onyx.db.models import EmbeddingCacheEntry
+
+
+def get_cached_embeddings(
+    db_session: Session, cache_keys: list[str], touch_interval_seconds: int
+) -> dict[str, bytes]:
+    return get_cache_entries(
+        db_session,
+        EmbeddingCacheEntry,
+        "embedding",
+        cache_keys,
+        touch_interval_seconds,
+    )
+
+
+def upsert_cached_embeddings(db_session: Session, entries: dict[str, bytes]) -> None:
+    upsert_cache_entries(db_session, EmbeddingCacheEntry, "embedding", entries)
+
+
+def prune_embedding_cache(db_session: Session, max_entries: int) -> int:
+    return prune_cache_entries(db_session, EmbeddingCacheEntry, max_entries)
@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from onyx.db.lru_cache_table import get_cache_entries
+from onyx.db.lru_cache_table import prune_cache_entries
+from onyx.db.lru_cache_table import upsert_cache_entries
+from onyx.db.models import ImageSummaryCacheEntry
+
+
+def get_cached_image_summaries(
+    db_session: Session, cache_keys: list[str], touch_interval_seconds: int
+) -> dict[str, str]:
+    return get_cache_entries(
+        db_session,
+        ImageSummaryCacheEntry,
+        "summary",
+        cache_keys,
+        touch_interval_seconds,
+    )
+
+
+def upsert_cached_image_summaries(db_session: Session, entries: dict[str, str]) -> None:
+    upsert_cache_entries(db_session, ImageSummaryCacheEntry, "summary", entries)
+
+
+def prune_image_summary_cache(db_session: Session, max_entries: int) -> int:
+    return prune_cache_entries(db_session, ImageSummaryCacheEntry, max_entries)
@@ -0,0 +1,132 @@
+"""Postgres tables used as least recently used caches. Entries are keyed by
+`cache_key` and evicted in the order of `last_used_at`."""
+
+import threading
+from collections.abc import Mapping
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from onyx.db.models import EmbeddingCacheEntry
+from onyx.db.models import ImageSummaryCacheEntry
+
+CacheTable = type[EmbeddingCacheEntry] | type[ImageSummaryCacheEntry]
+
+
+def get_cache_entries(
+    db_session: Session,
+    table: CacheTable,
+    value_column: str,
+    cache_keys: list[str],
+    touch_interval_seconds: int,
+) -> dict[str, Any]:
+    """Returns the values of the keys that are present. Entries that weren't used
+    within `touch_interval_seconds` are marked as recently used so they survive
+    eviction."""
+    if not cache_keys:
+        return {}
+
+    rows = db_session.execute(
+        select(table.cache_key, getattr(table, value_column), table.last_used_at).where(
+            table.cache_key.in_(cache_keys)
+        )
+    ).all()
+
+    now = datetime.now(timezone.utc)
+    touch_before = now - timedelta(seconds=touch_interval_seconds)
+    stale_keys = sorted(
+        cache_key for cache_key, _, last_used_at in rows if last_used_at < touch_before
+    )
+    if stale_keys:
+        # rows another worker is already touching are skipped rather than waited on,
+        # so concurrent lookups of overlapping keys can't deadlock
+        lockable_keys = (
+            select(table.cache_key)
+            .where(table.cache_key.in_(stale_keys))
+            .order_by(table.cache_key)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        db_session.execute(
+            update(table)
+            .where(table.cache_key.in_(lockable_keys))
+            .values(last_used_at=now)
+        )
+        db_session.commit()
+
+    return {cache_key: value for cache_key, value, _ in rows}
+
+
+def upsert_cache_entries(
+    db_session: Session,
+    table: CacheTable,
+    value_column: str,
+    entries: Mapping[str, Any],
+) -> None:
+    """NOTE: this function is Postgres specific. Not all DBs support the ON CONFLICT clause."""
+    if not entries:
+        return
+
+    now = datetime.now(timezone.utc)
+    insert_stmt = insert(table).values(
+        [
+            {"cache_key": cache_key, value_column: value, "last_used_at": now}
+            for cache_key, value in entries.items()
+        ]
+    )
+    db_session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                value_column: insert_stmt.excluded[value_column],
+                "last_used_at": insert_stmt.excluded.last_used_at,
+            },
+        )
+    )
+    db_session.commit()
+
+
+def prune_cache_entries(
+    db_session: Session, table: CacheTable, max_entries: int
+) -> int:
+    """Evicts the least recently used entries above `max_entries`. Returns the number
+    of evicted entries."""
+    num_entries = db_session.scalar(select(func.count(table.cache_key)))
+    if not num_entries or num_entries <= max_entries:
+        return 0
+
+    stale_keys = (
+        select(table.cache_key)
+        .order_by(table.last_used_at.asc())
+        .limit(num_entries - max_entries)
+        .scalar_subquery()
+    )
+    result = db_session.execute(delete(table).where(table.cache_key.in_(stale_keys)))
+    db_session.commit()
+    return result.rowcount
+
+
+class CachePruneThrottle:
+    """Pruning counts the whole table, so it is only done every `interval` writes."""
+
+    def __init__(self, interval: int) -> None:
+        self.interval = interval
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+
+    def should_prune(self) -> bool:
+        """Records a write to the cache, returns whether it is time to prune."""
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._writes_since_prune < self.interval:
+                return False
+            self._writes_since_prune = 0
+            return True
@@ -2642,3 +2642,32 @@ class LangflowFileNode(Base):
 
     persona_id: Mapped[int] = mapped_column(ForeignKey("persona.id", ondelete="CASCADE"))
     persona: Mapped["Persona"] = relationship(back_populates="langflow_file_nodes")
+
+
+class EmbeddingCacheEntry(Base):
+    """Passage embeddings keyed by a hash of the embedded text and every search setting
+    that affects the resulting vector. Lets re-indexing skip the model server for
+    chunks that did not change."""
+
+    __tablename__ = "embedding_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    # little-endian float32 vector
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+
+class ImageSummaryCacheEntry(Base):
+    """Vision LLM summaries of images keyed by a hash of the image bytes, the vision
+    model and the summarization prompts. Lets indexing skip the LLM for images that
+    were already summarized."""
+
+    __tablename__ = "image_summary_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
@@ -1,12 +1,16 @@
+import io
 import tempfile
 from io import BytesIO
 from typing import IO
 
+import psycopg2
 from psycopg2.extensions import connection
+from psycopg2.extensions import lobject
 from sqlalchemy.orm import Session
 
 from onyx.configs.constants import FileOrigin
 from onyx.db.models import PGFileStore
+from onyx.file_store.constants import LARGE_OBJECT_READ_BUFFER_SIZE
 from onyx.file_store.constants import MAX_IN_MEMORY_SIZE
 from onyx.file_store.constants import STANDARD_CHUNK_SIZE
 from onyx.utils.logger import setup_logger
@@ -60,12 +64,130 @@ def create_populate_lobj(
     return large_object.oid
 
 
+class _LargeObjectRawIO(io.RawIOBase):
+    """Reads a large object on demand. Large object descriptors only live as long as
+    the transaction they were opened in, so the large object is reopened (at the same
+    position) when the session has moved on to a new transaction or connection."""
+
+    def __init__(self, lobj_oid: int, db_session: Session) -> None:
+        super().__init__()
+        self.lobj_oid = lobj_oid
+        self._db_session = db_session
+        self._large_object: lobject | None = None
+        self._position = 0
+        self._size: int | None = None
+
+    def _open(self) -> lobject:
+        pg_conn = get_pg_conn_from_session(self._db_session)
+        large_object = self._large_object
+        if large_object is None or large_object.connection is not pg_conn:
+            large_object = pg_conn.lobject(self.lobj_oid, mode="rb")
+            self._large_object = large_object
+        return large_object
+
+    def _seek_large_object(self, offset: int, whence: int = io.SEEK_SET) -> lobject:
+        large_object = self._open()
+        try:
+            large_object.seek(offset, whence)
+        except psycopg2.ProgrammingError:
+            # the descriptor belongs to a transaction that has ended
+            self._large_object = None
+            large_object = self._open()
+            large_object.seek(offset, whence)
+        return large_object
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self._size = self._seek_large_object(0, io.SEEK_END).tell()
+        return self._size
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        data = self._seek_large_object(self._position).read(len(buffer))
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def readall(self) -> bytes:
+        chunks = []
+        while True:
+            chunk = self.read(STANDARD_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        if self._large_object is not None:
+            try:
+                self._large_object.close()
+            except psycopg2.Error:
+                # already gone with its transaction
+                pass
+            self._large_object = None
+        super().close()
+
+
+class LargeObjectReader(io.BufferedReader):
+    """Binary file object over a large object that only holds a small read buffer in
+    memory. Must be read while `db_session` is open."""
+
+    def __init__(self, lobj_oid: int, db_session: Session) -> None:
+        super().__init__(
+            _LargeObjectRawIO(lobj_oid, db_session),
+            buffer_size=LARGE_OBJECT_READ_BUFFER_SIZE,
+        )
+
+    @property
+    def size(self) -> int:
+        return self.raw.size  # type: ignore[attr-defined]
+
+    def read_range(self, start: int, length: int) -> bytes:
+        """Reads up to `length` bytes starting at `start`, leaves the position at the
+        end of the range."""
+        self.seek(start)
+        return self.read(length)
+
+
 def read_lobj(
     lobj_oid: int,
     db_session: Session,
     mode: str | None = None,
     use_tempfile: bool = False,
+    stream: bool = False,
 ) -> IO:
+    """With `stream`, returns a LargeObjectReader which reads the large object on
+    demand, only usable while `db_session` is open. Otherwise the content is copied
+    into memory (or a temp file with `use_tempfile`)."""
+    if stream:
+        return LargeObjectReader(lobj_oid, db_session)
+
     pg_conn = get_pg_conn_from_session(db_session)
     # Ensure we're using binary mode by default for large objects
     if mode is None:
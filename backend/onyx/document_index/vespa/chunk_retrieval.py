@@ -1,5 +1,6 @@
 import json
 import string
+import time
 from collections.abc import Callable
 from collections.abc import Mapping
 from datetime import datetime
@@ -14,7 +15,7 @@ from onyx.configs.app_configs import LOG_VESPA_TIMING_INFORMATION
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.document_index.interfaces import VespaChunkRequest
-from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_query_http_client
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
@@ -37,6 +38,7 @@ from onyx.document_index.vespa_constants import IMAGE_FILE_NAME
 from onyx.document_index.vespa_constants import LARGE_CHUNK_REFERENCE_IDS
 from onyx.document_index.vespa_constants import MAX_ID_SEARCH_QUERY_SIZE
 from onyx.document_index.vespa_constants import MAX_OR_CONDITIONS
+from onyx.document_index.vespa_constants import MAX_PARALLEL_ID_SEARCH_QUERIES
 from onyx.document_index.vespa_constants import METADATA
 from onyx.document_index.vespa_constants import METADATA_SUFFIX
 from onyx.document_index.vespa_constants import PRIMARY_OWNERS
@@ -198,13 +200,13 @@ def _get_chunks_via_visit_api(
         "fieldSet": field_set,
     }
 
+    http_client = get_vespa_query_http_client()
     document_chunks: list[dict] = []
     while True:
         try:
             filtered_params = {k: v for k, v in params.items() if v is not None}
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=filtered_params)
-                response.raise_for_status()
+            response = http_client.get(url, params=filtered_params)
+            response.raise_for_status()
         except httpx.HTTPError as e:
             error_base = "Failed to query Vespa"
             logger.error(
@@ -309,9 +311,8 @@ def query_vespa(
     )
 
     try:
-        with get_vespa_http_client() as http_client:
-            response = http_client.post(SEARCH_ENDPOINT, json=params)
-            response.raise_for_status()
+        response = get_vespa_query_http_client().post(SEARCH_ENDPOINT, json=params)
+        response.raise_for_status()
     except httpx.HTTPError as e:
         error_base = "Failed to query Vespa"
         logger.error(
@@ -378,6 +379,8 @@ def _get_chunks_via_batch_search(
     if not chunk_requests:
         return []
 
+    start_time = time.monotonic()
+    num_requests = len(chunk_requests)
     filters_str = build_vespa_filters(filters=filters, include_hidden=True)
 
     yql = (
@@ -400,6 +403,12 @@ def _get_chunks_via_batch_search(
             chunk for chunk in inference_chunks if not chunk.large_chunk_reference_ids
         ]
     inference_chunks.sort(key=lambda chunk: chunk.chunk_id)
+
+    if LOG_VESPA_TIMING_INFORMATION:
+        logger.debug(
+            f"Vespa batch search for {num_requests} documents returned "
+            f"{len(inference_chunks)} chunks in {time.monotonic() - start_time:.3f}s"
+        )
     return inference_chunks
 
 
@@ -409,7 +418,9 @@ def batch_search_api_retrieval(
     filters: IndexFilters,
     get_large_chunks: bool = False,
 ) -> list[InferenceChunkUncleaned]:
-    retrieved_chunks: list[InferenceChunkUncleaned] = []
+    start_time = time.monotonic()
+    # requests with a chunk range are grouped into as few searches as Vespa allows
+    capped_request_groups: list[list[VespaChunkRequest]] = []
     capped_requests: list[VespaChunkRequest] = []
     uncapped_requests: list[VespaChunkRequest] = []
     chunk_count = 0
@@ -425,35 +436,45 @@ def batch_search_api_retrieval(
             chunk_count + range > MAX_ID_SEARCH_QUERY_SIZE
             or req_ind % MAX_OR_CONDITIONS == 0
         ):
-            retrieved_chunks.extend(
-                _get_chunks_via_batch_search(
-                    index_name=index_name,
-                    chunk_requests=capped_requests,
-                    filters=filters,
-                    get_large_chunks=get_large_chunks,
-                )
-            )
+            if capped_requests:
+                capped_request_groups.append(capped_requests)
             capped_requests = []
             chunk_count = 0
         capped_requests.append(request)
         chunk_count += range
 
     if capped_requests:
-        retrieved_chunks.extend(
-            _get_chunks_via_batch_search(
-                index_name=index_name,
-                chunk_requests=capped_requests,
-                filters=filters,
-                get_large_chunks=get_large_chunks,
-            )
-        )
+        capped_request_groups.append(capped_requests)
 
+    # the searches are independent, send them at the same time instead of paying
+    # for one round trip after the other
+    functions_with_args: list[tuple[Callable, tuple]] = [
+        (
+            _get_chunks_via_batch_search,
+            (index_name, request_group, filters, get_large_chunks),
+        )
+        for request_group in capped_request_groups
+    ]
     if uncapped_requests:
         logger.debug(f"Retrieving {len(uncapped_requests)} uncapped requests")
-        retrieved_chunks.extend(
-            parallel_visit_api_retrieval(
-                index_name, uncapped_requests, filters, get_large_chunks
+        functions_with_args.append(
+            (
+                parallel_visit_api_retrieval,
+                (index_name, uncapped_requests, filters, get_large_chunks),
             )
         )
 
+    retrieved_chunks: list[InferenceChunkUncleaned] = []
+    for inference_chunks in run_functions_tuples_in_parallel(
+        functions_with_args, max_workers=MAX_PARALLEL_ID_SEARCH_QUERIES
+    ):
+        retrieved_chunks.extend(inference_chunks)
+
+    if LOG_VESPA_TIMING_INFORMATION:
+        logger.debug(
+            f"Vespa id based retrieval of {len(chunk_requests)} documents with "
+            f"{len(capped_request_groups)} batch searches"
+            + (" and the visit API" if uncapped_requests else "")
+            + f" took {time.monotonic() - start_time:.3f}s"
+        )
     return retrieved_chunks
@@ -19,6 +19,7 @@ import httpx  # type: ignore
 import requests  # type: ignore
 from retry import retry
 
+from onyx.configs.app_configs import VESPA_HEX_QUERY_EMBEDDINGS
 from onyx.configs.chat_configs import DOC_TIME_DECAY
 from onyx.configs.chat_configs import NUM_RETURNED_HITS
 from onyx.configs.chat_configs import TITLE_CONTENT_RATIO
@@ -26,6 +27,8 @@ from onyx.configs.chat_configs import VESPA_SEARCHER_THREADS
 from onyx.configs.constants import KV_REINDEX_KEY
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
+from onyx.db.document import fetch_known_chunk_counts_for_documents
+from onyx.db.engine import get_session_with_tenant
 from onyx.db.enums import EmbeddingPrecision
 from onyx.document_index.document_index_utils import get_document_chunk_ids
 from onyx.document_index.interfaces import DocumentIndex
@@ -53,6 +56,9 @@ from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
 )
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_dense_tensor_hex,
+)
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
@@ -406,16 +412,16 @@ class VespaIndex(DocumentIndex):
             # documents that have `chunk_count` in the database, but not for
             # `old_version` documents.
 
-            enriched_doc_infos: list[EnrichedDocumentIndexingInfo] = [
-                VespaIndex.enrich_basic_chunk_info(
-                    index_name=self.index_name,
-                    http_client=http_client,
-                    document_id=doc_id,
-                    previous_chunk_count=doc_id_to_previous_chunk_cnt.get(doc_id, 0),
-                    new_chunk_count=doc_id_to_new_chunk_cnt.get(doc_id, 0),
-                )
-                for doc_id in doc_id_to_new_chunk_cnt.keys()
-            ]
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info_batch(
+                index_name=self.index_name,
+                http_client=http_client,
+                doc_id_to_previous_chunk_cnt={
+                    doc_id: doc_id_to_previous_chunk_cnt.get(doc_id, 0)
+                    for doc_id in doc_id_to_new_chunk_cnt.keys()
+                },
+                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
+                executor=executor,
+            )
 
             for cleaned_doc_info in enriched_doc_infos:
                 # If the document has previously indexed chunks, we know it previously existed
@@ -506,40 +512,57 @@ class VespaIndex(DocumentIndex):
     def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
         logger.debug(f"Updating {len(update_requests)} documents in Vespa")
 
+        # Documents that come in without a chunk count may still have one recorded in
+        # Postgres, look those up in one query (before the ids are cleaned) so that
+        # Vespa only has to be probed for documents whose count is truly unknown
+        known_chunk_counts = self._fetch_known_chunk_counts(
+            [
+                doc_info.doc_id
+                for update_request in update_requests
+                for doc_info in update_request.minimal_document_indexing_info
+                if doc_info.chunk_start_index is None
+            ],
+            tenant_id=tenant_id,
+        )
+
         # Handle Vespa character limitations
         # Mutating update_requests but it's not used later anyway
+        doc_id_to_previous_chunk_cnt: dict[str, int | None] = {}
         for update_request in update_requests:
             for doc_info in update_request.minimal_document_indexing_info:
+                chunk_count = doc_info.chunk_start_index
+                if chunk_count is None:
+                    chunk_count = known_chunk_counts.get(doc_info.doc_id)
+
                 doc_info.doc_id = replace_invalid_doc_id_characters(doc_info.doc_id)
+                doc_id_to_previous_chunk_cnt[doc_info.doc_id] = chunk_count
 
         update_start = time.monotonic()
 
         processed_updates_requests: list[_VespaUpdateRequest] = []
         all_doc_chunk_ids: dict[str, list[UUID]] = {}
 
-        # Fetch all chunks for each document ahead of time
-        index_names = [self.index_name]
-        if self.secondary_index_name:
-            index_names.append(self.secondary_index_name)
-
+        # Fetch all chunks for each document ahead of time. The updates are only sent
+        # to the primary index, so that's the only one whose chunks we need.
         chunk_id_start_time = time.monotonic()
-        with self.httpx_client_context as http_client:
-            for update_request in update_requests:
-                for doc_info in update_request.minimal_document_indexing_info:
-                    for index_name in index_names:
-                        doc_chunk_info = VespaIndex.enrich_basic_chunk_info(
-                            index_name=index_name,
-                            http_client=http_client,
-                            document_id=doc_info.doc_id,
-                            previous_chunk_count=doc_info.chunk_start_index,
-                            new_chunk_count=0,
-                        )
-                        doc_chunk_ids = get_document_chunk_ids(
-                            enriched_document_info_list=[doc_chunk_info],
-                            tenant_id=tenant_id,
-                            large_chunks_enabled=False,
-                        )
-                        all_doc_chunk_ids[doc_info.doc_id] = doc_chunk_ids
+        with (
+            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
+            self.httpx_client_context as http_client,
+        ):
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info_batch(
+                index_name=self.index_name,
+                http_client=http_client,
+                doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
+                doc_id_to_new_chunk_cnt={},
+                executor=executor,
+            )
+
+        for doc_chunk_info in enriched_doc_infos:
+            all_doc_chunk_ids[doc_chunk_info.doc_id] = get_document_chunk_ids(
+                enriched_document_info_list=[doc_chunk_info],
+                tenant_id=tenant_id,
+                large_chunks_enabled=False,
+            )
 
         logger.debug(
             f"Took {time.monotonic() - chunk_id_start_time:.2f} seconds to fetch all Vespa chunk IDs"
@@ -586,25 +609,11 @@ class VespaIndex(DocumentIndex):
             time.monotonic() - update_start,
         )
 
-    @retry(
-        tries=3,
-        delay=1,
-        backoff=2,
-    )
-    def _update_single_chunk(
-        self,
-        doc_chunk_id: UUID,
-        index_name: str,
+    @staticmethod
+    def _build_update_dict(
         fields: VespaDocumentFields | None,
         user_fields: VespaDocumentUserFields | None,
-        doc_id: str,
-        http_client: httpx.Client,
-    ) -> None:
-        """
-        Update a single "chunk" (document) in Vespa using its chunk ID.
-        Retries if we encounter transient HTTPStatusError (e.g., overload).
-        """
-
+    ) -> dict[str, dict]:
         update_dict: dict[str, dict] = {"fields": {}}
 
         if fields is not None:
@@ -633,10 +642,25 @@ class VespaIndex(DocumentIndex):
                     "assign": user_fields.user_folder_id
                 }
 
-        if not update_dict["fields"]:
-            logger.error("Update request received but nothing to update.")
-            return
+        return update_dict
 
+    @retry(
+        tries=3,
+        delay=1,
+        backoff=2,
+    )
+    def _update_single_chunk(
+        self,
+        doc_chunk_id: UUID,
+        index_name: str,
+        update_dict: dict[str, dict],
+        doc_id: str,
+        http_client: httpx.Client,
+    ) -> None:
+        """
+        Update a single "chunk" (document) in Vespa using its chunk ID.
+        Retries if we encounter transient HTTPStatusError (e.g., overload).
+        """
         vespa_url = (
             f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}"
             "?create=true"
@@ -669,12 +693,28 @@ class VespaIndex(DocumentIndex):
         """Note: if the document id does not exist, the update will be a no-op and the
         function will complete with no errors or exceptions.
         Handle other exceptions if you wish to implement retry behavior
+
+        The chunks are updated in parallel, each with its own retries. If any chunk
+        still fails, the rest are updated anyway and the first failure is raised
+        afterwards.
         """
         doc_chunk_count = 0
 
         doc_id = replace_invalid_doc_id_characters(doc_id)
 
-        with self.httpx_client_context as httpx_client:
+        update_dict = self._build_update_dict(fields, user_fields)
+        if not update_dict["fields"]:
+            logger.error("Update request received but nothing to update.")
+
+        future_to_chunk_id: dict[concurrent.futures.Future[None], UUID] = {}
+        failures: list[tuple[UUID, Exception]] = []
+
+        # NOTE: the httpx client is shared by all threads, with HTTP2 the updates
+        # are multiplexed over the same connection
+        with (
+            self.httpx_client_context as httpx_client,
+            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
+        ):
             for (
                 index_name,
                 large_chunks_enabled,
@@ -695,15 +735,39 @@ class VespaIndex(DocumentIndex):
 
                 doc_chunk_count += len(doc_chunk_ids)
 
+                if not update_dict["fields"]:
+                    continue
+
                 for doc_chunk_id in doc_chunk_ids:
-                    self._update_single_chunk(
+                    future = executor.submit(
+                        self._update_single_chunk,
                         doc_chunk_id,
                         index_name,
-                        fields,
-                        user_fields,
+                        update_dict,
                         doc_id,
                         httpx_client,
                     )
+                    future_to_chunk_id[future] = doc_chunk_id
+
+            for future in concurrent.futures.as_completed(future_to_chunk_id):
+                try:
+                    future.result()
+                except Exception as e:
+                    failures.append((future_to_chunk_id[future], e))
+
+        if failures:
+            failed_chunk_ids = [str(doc_chunk_id) for doc_chunk_id, _ in failures]
+            failure_msg = (
+                f"Failed to update {len(failures)} of {len(future_to_chunk_id)} "
+                f"chunks of doc_id={doc_id}: {', '.join(failed_chunk_ids[:10])}"
+                f"{' ...' if len(failed_chunk_ids) > 10 else ''}"
+            )
+            logger.error(failure_msg)
+            # raise the original exception so callers can still tell timeouts and
+            # bad requests apart
+            first_exception = failures[0][1]
+            first_exception.add_note(failure_msg)
+            raise first_exception
 
         return doc_chunk_count
 
@@ -822,7 +886,13 @@ class VespaIndex(DocumentIndex):
         params: dict[str, str | int | float] = {
             "yql": yql,
             "query": final_query,
-            "input.query(query_embedding)": str(query_embedding),
+            # declared as a float tensor by the rank profile, whatever the precision
+            # of the embedding fields
+            "input.query(query_embedding)": (
+                build_vespa_dense_tensor_hex(query_embedding)
+                if VESPA_HEX_QUERY_EMBEDDINGS
+                else str(query_embedding)
+            ),
             "input.query(decay_factor)": str(DOC_TIME_DECAY * time_decay_multiplier),
             "input.query(alpha)": hybrid_alpha,
             "input.query(title_content_ratio)": (
@@ -905,6 +975,74 @@ class VespaIndex(DocumentIndex):
         )
         return enriched_doc_info
 
+    @classmethod
+    def enrich_basic_chunk_info_batch(
+        cls,
+        index_name: str,
+        http_client: httpx.Client,
+        doc_id_to_previous_chunk_cnt: dict[str, int | None],
+        doc_id_to_new_chunk_cnt: dict[str, int],
+        executor: concurrent.futures.ThreadPoolExecutor,
+    ) -> list[EnrichedDocumentIndexingInfo]:
+        """enrich_basic_chunk_info for a batch of documents, in the order of
+        doc_id_to_previous_chunk_cnt.
+
+        Documents with a known chunk count are resolved without touching Vespa. Only
+        documents on the old chunk ID system (count is None) need to be probed, those
+        lookups run concurrently on the executor."""
+        enriched_doc_infos: dict[str, EnrichedDocumentIndexingInfo] = {}
+        future_to_doc_id: dict[
+            concurrent.futures.Future[EnrichedDocumentIndexingInfo], str
+        ] = {}
+        for doc_id, previous_chunk_count in doc_id_to_previous_chunk_cnt.items():
+            new_chunk_count = doc_id_to_new_chunk_cnt.get(doc_id, 0)
+            if previous_chunk_count is not None:
+                enriched_doc_infos[doc_id] = cls.enrich_basic_chunk_info(
+                    index_name=index_name,
+                    http_client=http_client,
+                    document_id=doc_id,
+                    previous_chunk_count=previous_chunk_count,
+                    new_chunk_count=new_chunk_count,
+                )
+                continue
+
+            future = executor.submit(
+                cls.enrich_basic_chunk_info,
+                index_name=index_name,
+                http_client=http_client,
+                document_id=doc_id,
+                previous_chunk_count=None,
+                new_chunk_count=new_chunk_count,
+            )
+            future_to_doc_id[future] = doc_id
+
+        for future in concurrent.futures.as_completed(future_to_doc_id):
+            enriched_doc_infos[future_to_doc_id[future]] = future.result()
+
+        if future_to_doc_id:
+            logger.debug(
+                f"Resolved chunk counts: known={len(enriched_doc_infos) - len(future_to_doc_id)} "
+                f"probed={len(future_to_doc_id)}"
+            )
+
+        return [enriched_doc_infos[doc_id] for doc_id in doc_id_to_previous_chunk_cnt]
+
+    @staticmethod
+    def _fetch_known_chunk_counts(
+        document_ids: list[str], tenant_id: str
+    ) -> dict[str, int]:
+        """Chunk counts recorded in Postgres. Best effort, an empty result just means
+        the counts get discovered through Vespa instead."""
+        if not document_ids:
+            return {}
+
+        try:
+            with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+                return fetch_known_chunk_counts_for_documents(document_ids, db_session)
+        except Exception:
+            logger.exception("Failed to fetch chunk counts from Postgres")
+            return {}
+
     @classmethod
     def delete_entries_by_tenant_id(
         cls,
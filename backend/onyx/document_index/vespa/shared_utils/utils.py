@@ -1,18 +1,33 @@
 import re
 import time
+from typing import Any
 from typing import cast
 
 import httpx
+from prometheus_client import Counter
 
 from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
+from onyx.configs.app_configs import VESPA_QUERY_HTTP_KEEPALIVE_EXPIRY
+from onyx.configs.app_configs import VESPA_QUERY_HTTP_MAX_CONNECTIONS
+from onyx.configs.app_configs import VESPA_QUERY_HTTP_MAX_KEEPALIVE_CONNECTIONS
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
 from onyx.document_index.vespa_constants import VESPA_APP_CONTAINER_URL
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+VESPA_QUERY_HTTPX_POOL_NAME = "vespa_query"
+
+vespa_query_http_requests = Counter(
+    "vespa_query_http_requests",
+    "Number of Vespa search / visit requests, by whether they had to open a new "
+    "connection or reused a pooled one",
+    ["connection"],
+)
+
 # NOTE: This does not seem to be used in reality despite the Vespa Docs pointing to this code
 # See here for reference: https://docs.vespa.ai/en/documents.html
 # https://github.com/vespa-engine/vespa/blob/master/vespajlib/src/main/java/com/yahoo/text/Text.java
@@ -80,6 +95,50 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
     )
 
 
+def _track_connection_reuse(request: httpx.Request) -> None:
+    opened_connection = False
+
+    def trace(event_name: str, info: dict[str, Any]) -> None:
+        nonlocal opened_connection
+        if event_name == "connection.connect_tcp.started":
+            opened_connection = True
+        elif event_name.endswith(".send_request_headers.started"):
+            vespa_query_http_requests.labels(
+                connection="new" if opened_connection else "reused"
+            ).inc()
+
+    request.extensions["trace"] = trace
+
+
+def get_vespa_query_http_client() -> httpx.Client:
+    """
+    Returns the process wide, pooled HTTP client for searches and visits, which keeps
+    connections to Vespa alive between requests. Don't close it.
+    """
+    client = HttpxPool.get_if_initialized(VESPA_QUERY_HTTPX_POOL_NAME)
+    if client is not None:
+        return client
+
+    HttpxPool.init_client(
+        name=VESPA_QUERY_HTTPX_POOL_NAME,
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=VESPA_QUERY_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=VESPA_QUERY_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=VESPA_QUERY_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        event_hooks={"request": [_track_connection_reuse]},
+    )
+    return HttpxPool.get(VESPA_QUERY_HTTPX_POOL_NAME)
+
+
 def wait_for_vespa_with_timeout(wait_interval: int = 5, wait_limit: int = 60) -> bool:
     """Waits for Vespa to become ready subject to a timeout.
     Returns True if Vespa is ready, False otherwise."""
@@ -2,6 +2,8 @@ from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 
+import numpy as np
+
 from onyx.configs.constants import INDEX_SEPARATOR
 from onyx.context.search.models import IndexFilters
 from onyx.document_index.interfaces import VespaChunkRequest
@@ -18,6 +20,7 @@ from onyx.document_index.vespa_constants import USER_FILE
 from onyx.document_index.vespa_constants import USER_FOLDER
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import MULTI_TENANT
+from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
 
@@ -130,3 +133,10 @@ def build_vespa_id_based_retrieval_yql(
 
     id_based_retrieval_yql_section += ")"
     return id_based_retrieval_yql_section
+
+
+def build_vespa_dense_tensor_hex(values: Embedding) -> str:
+    """Vespa's hex form of a dense float tensor: the big endian binary representation
+    of every cell, in order. A fraction of the size of the list literal, and much
+    cheaper to produce and for Vespa to parse."""
+    return np.asarray(values, dtype=">f4").tobytes().hex()
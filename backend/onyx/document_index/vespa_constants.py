@@ -44,6 +44,9 @@ NUM_THREADS = (
     32  # since Vespa doesn't allow batching of inserts / updates, we use threads
 )
 MAX_ID_SEARCH_QUERY_SIZE = 400
+# id based retrieval splits its requests into several searches, at most this many are
+# sent at a time
+MAX_PARALLEL_ID_SEARCH_QUERIES = 8
 # Suspect that adding too many "or" conditions will cause Vespa to timeout and return
 # an empty list of hits (with no error status and coverage: 0 and degraded)
 MAX_OR_CONDITIONS = 10
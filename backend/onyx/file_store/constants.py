@@ -1,2 +1,5 @@
 MAX_IN_MEMORY_SIZE = 30 * 1024 * 1024  # 30MB
 STANDARD_CHUNK_SIZE = 10 * 1024 * 1024  # 10MB chunks
+# Read ahead of streamed large objects, small reads (e.g. of zip headers) are served from
+# this buffer instead of making a round trip to Postgres each
+LARGE_OBJECT_READ_BUFFER_SIZE = 1024 * 1024  # 1MB
@@ -50,7 +50,11 @@ class FileStore(ABC):
 
     @abstractmethod
     def read_file(
-        self, file_name: str, mode: str | None, use_tempfile: bool = False
+        self,
+        file_name: str,
+        mode: str | None,
+        use_tempfile: bool = False,
+        stream: bool = False,
     ) -> IO:
         """
         Read the content of a given file by the name
@@ -60,6 +64,9 @@ class FileStore(ABC):
         - mode: Mode to open the file (e.g. 'b' for binary)
         - use_tempfile: Whether to use a temporary file to store the contents
                         in order to avoid loading the entire file into memory
+        - stream: Whether to return a seekable binary file object that reads the
+                  contents on demand. It is only usable while the file store's
+                  session is open
 
         Returns:
             Contents of the file and metadata dict
@@ -115,7 +122,11 @@ class PostgresBackedFileStore(FileStore):
             raise
 
     def read_file(
-        self, file_name: str, mode: str | None = None, use_tempfile: bool = False
+        self,
+        file_name: str,
+        mode: str | None = None,
+        use_tempfile: bool = False,
+        stream: bool = False,
     ) -> IO:
         file_record = get_pgfilestore_by_file_name(
             file_name=file_name, db_session=self.db_session
@@ -125,6 +136,7 @@ class PostgresBackedFileStore(FileStore):
             db_session=self.db_session,
             mode=mode,
             use_tempfile=use_tempfile,
+            stream=stream,
         )
 
     def read_file_record(self, file_name: str) -> PGFileStore:
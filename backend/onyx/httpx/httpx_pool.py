@@ -1,3 +1,4 @@
+import os
 import threading
 from typing import Any
 
@@ -25,6 +26,15 @@ class HttpxPool:
         merged_kwargs = {**cls.DEFAULT_KWARGS, **kwargs}
         return httpx.Client(**merged_kwargs)
 
+    @classmethod
+    def _after_fork_in_child(cls) -> None:
+        """A forked child inherits the parent's clients along with their open
+        connections, which it must neither use nor close (closing would e.g. send an
+        HTTP/2 GOAWAY over the parent's connection). Drop them so the child creates its
+        own, along with the lock, which may have been held by another thread."""
+        cls._clients = {}
+        cls._lock = threading.Lock()
+
     @classmethod
     def init_client(cls, name: str, **kwargs: Any) -> None:
         """Allow the caller to init the client with extra params."""
@@ -48,6 +58,12 @@ class HttpxPool:
                 client.close()
             cls._clients.clear()
 
+    @classmethod
+    def get_if_initialized(cls, name: str) -> httpx.Client | None:
+        """Gets the httpx.Client without taking the lock, for hot paths that only
+        need to init it once. A single dict lookup is atomic."""
+        return cls._clients.get(name)
+
     @classmethod
     def get(cls, name: str) -> httpx.Client:
         """Gets the httpx.Client. Will init to default settings if not init'd."""
@@ -55,3 +71,6 @@ class HttpxPool:
             if name not in cls._clients:
                 cls._clients[name] = cls._init_client()
             return cls._clients[name]
+
+
+os.register_at_fork(after_in_child=HttpxPool._after_fork_in_child)
@@ -1,3 +1,13 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
 from llama_index.core.node_parser import SentenceSplitter
 
 from onyx.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
@@ -20,10 +30,12 @@ from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import DocAwareChunk
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
 from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.utils.logger import setup_logger
 from onyx.utils.text_processing import clean_text
 from onyx.utils.text_processing import shared_precompare_cleanup
 from shared_configs.configs import STRICT_CHUNK_TOKEN_LIMIT
+from shared_configs.enums import EmbeddingProvider
 
 # Not supporting overlaps, we need a clean combination of chunks and it is unclear if overlaps
 # actually help quality at all
@@ -36,6 +48,14 @@ CHUNK_MIN_CONTENT = 256
 logger = setup_logger()
 
 
+def _is_utf8_encodable(text: str) -> bool:
+    try:
+        text.encode("utf-8")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
 def _get_metadata_suffix_for_document_index(
     metadata: dict[str, str | list[str]], include_separator: bool = False
 ) -> tuple[str, str]:
@@ -156,21 +176,28 @@ class Chunker:
         self.max_context = 0
         self.prompt_tokens = 0
 
+        # Texts of the current document are tokenized once, the same texts come up
+        # again when counting, splitting, extracting blurbs and mini chunks
+        self._tokens_cache: dict[str, list[str]] = {}
+        self._token_count_cache: dict[str, int] = {}
+        self._separator_token_count = len(tokenizer.encode(SECTION_SEPARATOR))
+        self._separator_offset = len(shared_precompare_cleanup(SECTION_SEPARATOR))
+
         self.blurb_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+            tokenizer=self._tokenize,
             chunk_size=blurb_size,
             chunk_overlap=0,
         )
 
         self.chunk_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+            tokenizer=self._tokenize,
             chunk_size=chunk_token_limit,
             chunk_overlap=chunk_overlap,
         )
 
         self.mini_chunk_splitter = (
             SentenceSplitter(
-                tokenizer=tokenizer.tokenize,
+                tokenizer=self._tokenize,
                 chunk_size=mini_chunk_size,
                 chunk_overlap=0,
             )
@@ -178,12 +205,34 @@ class Chunker:
             else None
         )
 
+    def _tokenize(self, text: str) -> list[str]:
+        tokens = self._tokens_cache.get(text)
+        if tokens is None:
+            tokens = self.tokenizer.tokenize(text)
+            self._tokens_cache[text] = tokens
+        return tokens
+
+    def _count_tokens(self, text: str) -> int:
+        if text in self._tokens_cache:
+            return len(self._tokens_cache[text])
+
+        token_count = self._token_count_cache.get(text)
+        if token_count is None:
+            token_count = len(self.tokenizer.encode(text))
+            self._token_count_cache[text] = token_count
+        return token_count
+
+    def _can_sum_token_counts(self, text: str) -> bool:
+        # HuggingFaceTokenizer falls back to encoding texts it can't handle as ASCII,
+        # which applies to the whole joined text
+        return self.tokenizer.whitespace_joins_are_additive and _is_utf8_encodable(text)
+
     def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
         """
         Splits the text into smaller chunks based on token count to ensure
         no chunk exceeds the content_token_limit.
         """
-        tokens = self.tokenizer.tokenize(text)
+        tokens = self._tokenize(text)
         chunks = []
         start = 0
         total_tokens = len(tokens)
@@ -259,10 +308,18 @@ class Chunker:
         """
         Loops through sections of the document, converting them into one or more chunks.
         Works with processed sections that are base Section objects.
+
+        Each section is tokenized once. The token count and link offset of the chunk
+        being built are kept as running totals, the token count is only re-counted
+        for tokenizers where joining texts can change the number of tokens.
         """
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # None when the chunk text has to be re-counted
+        chunk_token_count: int | None = 0
+        chunk_counts_add_up = True
+        chunk_offset = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -294,6 +351,9 @@ class Chunker:
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = 0
+                    chunk_counts_add_up = True
+                    chunk_offset = 0
 
                 # Create a chunk specifically for this image section
                 # (Using the text summary that was generated during processing)
@@ -311,7 +371,7 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_token_count = self._count_tokens(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -328,13 +388,16 @@ class Chunker:
                     )
                     chunk_text = ""
                     link_offsets = {}
+                    chunk_token_count = 0
+                    chunk_counts_add_up = True
+                    chunk_offset = 0
 
                 split_texts = self.chunk_splitter.split_text(section_text)
                 for i, split_text in enumerate(split_texts):
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and len(self._tokenize(split_text)) > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -364,17 +427,29 @@ class Chunker:
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
-            current_offset = len(shared_precompare_cleanup(chunk_text))
-            next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
-            )
-
-            if next_section_tokens + current_token_count <= content_token_limit:
+            if chunk_token_count is None:
+                chunk_token_count = len(self.tokenizer.encode(chunk_text))
+            next_section_tokens = self._separator_token_count + section_token_count
+            # shared_precompare_cleanup works character by character, so the offsets
+            # of joined texts add up
+            section_offset = len(shared_precompare_cleanup(section_text))
+
+            if next_section_tokens + chunk_token_count <= content_token_limit:
+                link_offsets[chunk_offset] = section_link_text
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    chunk_offset += self._separator_offset
+                    chunk_token_count += self._separator_token_count
                 chunk_text += section_text
-                link_offsets[current_offset] = section_link_text
+                chunk_offset += section_offset
+                chunk_counts_add_up = (
+                    chunk_counts_add_up and self._can_sum_token_counts(section_text)
+                )
+                chunk_token_count = (
+                    chunk_token_count + section_token_count
+                    if chunk_counts_add_up
+                    else None
+                )
             else:
                 # finalize the existing chunk
                 self._create_chunk(
@@ -390,6 +465,9 @@ class Chunker:
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                chunk_token_count = section_token_count
+                chunk_counts_add_up = self._can_sum_token_counts(section_text)
+                chunk_offset = section_offset
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -408,6 +486,13 @@ class Chunker:
     def _handle_single_document(
         self, document: IndexingDocument
     ) -> list[DocAwareChunk]:
+        try:
+            return self._chunk_single_document(document)
+        finally:
+            self._tokens_cache.clear()
+            self._token_count_cache.clear()
+
+    def _chunk_single_document(self, document: IndexingDocument) -> list[DocAwareChunk]:
         # Specifically for reproducing an issue with gmail
         if document.source == DocumentSource.GMAIL:
             logger.debug(f"Chunking {document.semantic_identifier}")
@@ -415,7 +500,7 @@ class Chunker:
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.encode(title_prefix))
+        title_tokens = self._count_tokens(title_prefix)
 
         # Metadata prep
         metadata_suffix_semantic = ""
@@ -428,7 +513,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.encode(metadata_suffix_semantic))
+            metadata_tokens = self._count_tokens(metadata_suffix_semantic)
 
         # If metadata is too large, skip it in the semantic content
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
@@ -438,9 +523,8 @@ class Chunker:
         single_chunk_fits = True
         doc_token_count = 0
         if self.enable_contextual_rag:
-            doc_content = document.get_text_content()
-            tokenized_doc = self.tokenizer.tokenize(doc_content)
-            doc_token_count = len(tokenized_doc)
+            # only the count is needed, encoding skips building the token strings
+            doc_token_count = len(self.tokenizer.encode(document.get_text_content()))
 
             # check if doc + title + metadata fits in a single chunk. If so, no need for contextual RAG
             single_chunk_fits = (
@@ -519,3 +603,192 @@ class Chunker:
                 self.callback.progress("Chunker.chunk", len(chunks))
 
         return final_chunks
+
+
+# Documents of a batch are split into this many shards per worker process, so workers
+# that get the smaller documents can pick up more of them
+_SHARDS_PER_PROCESS = 4
+# How often to check for a stop signal (and heartbeat) while waiting on the workers
+_WORKER_WAIT_INTERVAL_SECONDS = 5.0
+# How often a chunking worker checks that the indexing process is still around
+_WORKER_PARENT_CHECK_INTERVAL_SECONDS = 1.0
+
+# The chunker of a chunking worker process, built once by the pool initializer so the
+# tokenizer stays warm across batches
+_worker_chunker: Chunker | None = None
+
+_chunking_pools: dict[tuple, ProcessPoolExecutor] = {}
+_chunking_pools_lock = threading.Lock()
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    while True:
+        time.sleep(_WORKER_PARENT_CHECK_INTERVAL_SECONDS)
+        # once the parent is gone, the worker is reparented
+        if os.getppid() != parent_pid:
+            logger.warning(
+                f"Chunking worker exiting, its parent is gone: parent_pid={parent_pid}"
+            )
+            os._exit(1)
+
+
+def _start_parent_watcher() -> None:
+    """The indexing process can be killed without shutting down its pool (e.g. by the
+    watchdog's SIGTERM), in which case the workers would wait on the call queue
+    forever."""
+    threading.Thread(
+        target=_exit_with_parent, args=(os.getppid(),), daemon=True
+    ).start()
+
+
+def _init_chunking_worker(
+    tokenizer_model_name: str | None,
+    tokenizer_provider_type: EmbeddingProvider | None,
+    chunker_kwargs: dict[str, Any],
+) -> None:
+    global _worker_chunker
+    _start_parent_watcher()
+    _worker_chunker = Chunker(
+        tokenizer=get_tokenizer(tokenizer_model_name, tokenizer_provider_type),
+        **chunker_kwargs,
+    )
+
+
+def _chunk_documents_in_worker(
+    documents: list[IndexingDocument],
+) -> list[list[DocAwareChunk]]:
+    if _worker_chunker is None:
+        raise RuntimeError("Chunking worker was not initialized")
+    return [_worker_chunker._handle_single_document(document) for document in documents]
+
+
+def shutdown_chunking_pools() -> None:
+    """Stops the chunking workers of this process. Work that hasn't started yet is
+    dropped."""
+    with _chunking_pools_lock:
+        pools = list(_chunking_pools.values())
+        _chunking_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ParallelChunker(Chunker):
+    """
+    Chunks batches of documents in a pool of worker processes, since chunking is CPU
+    bound. Workers are spawned once per tokenizer and chunker settings and reused
+    across batches. The chunks come back in document order and are the same as when
+    chunking in process.
+    """
+
+    def __init__(
+        self,
+        tokenizer_model_name: str | None,
+        tokenizer_provider_type: EmbeddingProvider | None,
+        num_processes: int,
+        enable_multipass: bool = False,
+        enable_large_chunks: bool = False,
+        enable_contextual_rag: bool = False,
+        callback: IndexingHeartbeatInterface | None = None,
+    ) -> None:
+        self._chunker_kwargs: dict[str, Any] = {
+            "enable_multipass": enable_multipass,
+            "enable_large_chunks": enable_large_chunks,
+            "enable_contextual_rag": enable_contextual_rag,
+        }
+        super().__init__(
+            tokenizer=get_tokenizer(tokenizer_model_name, tokenizer_provider_type),
+            callback=callback,
+            **self._chunker_kwargs,
+        )
+        self.tokenizer_model_name = tokenizer_model_name
+        self.tokenizer_provider_type = tokenizer_provider_type
+        self.num_processes = num_processes
+
+    def _pool_key(self) -> tuple:
+        return (
+            self.tokenizer_model_name,
+            self.tokenizer_provider_type,
+            self.num_processes,
+            tuple(sorted(self._chunker_kwargs.items())),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with _chunking_pools_lock:
+            pool = _chunking_pools.get(self._pool_key())
+            if pool is None:
+                # spawn rather than fork, the indexing process holds db connections
+                # and threads
+                pool = ProcessPoolExecutor(
+                    max_workers=self.num_processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_chunking_worker,
+                    initargs=(
+                        self.tokenizer_model_name,
+                        self.tokenizer_provider_type,
+                        self._chunker_kwargs,
+                    ),
+                )
+                _chunking_pools[self._pool_key()] = pool
+            return pool
+
+    def _drop_pool(self) -> None:
+        with _chunking_pools_lock:
+            pool = _chunking_pools.pop(self._pool_key(), None)
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _wait_for_shard(
+        self, future: Future[list[list[DocAwareChunk]]]
+    ) -> list[list[DocAwareChunk]]:
+        while True:
+            if self.callback and self.callback.should_stop():
+                raise RuntimeError("Chunker.chunk: Stop signal detected")
+            try:
+                return future.result(timeout=_WORKER_WAIT_INTERVAL_SECONDS)
+            except TimeoutError:
+                # keep the heartbeat going while a shard of large documents is chunked
+                if self.callback:
+                    self.callback.progress("Chunker.chunk", 0)
+
+    def chunk(self, documents: list[IndexingDocument]) -> list[DocAwareChunk]:
+        if self.num_processes <= 1 or len(documents) <= 1:
+            return super().chunk(documents)
+
+        if multiprocessing.current_process().daemon:
+            logger.warning(
+                "Chunking in process, daemonic processes can't start chunking workers"
+            )
+            return super().chunk(documents)
+
+        shard_size = math.ceil(
+            len(documents) / (self.num_processes * _SHARDS_PER_PROCESS)
+        )
+        shards = [
+            documents[i : i + shard_size] for i in range(0, len(documents), shard_size)
+        ]
+
+        pool = self._get_pool()
+        futures: list[Future[list[list[DocAwareChunk]]]] = []
+        final_chunks: list[DocAwareChunk] = []
+        try:
+            futures = [
+                pool.submit(_chunk_documents_in_worker, shard) for shard in shards
+            ]
+            for shard, future in zip(shards, futures):
+                for document, chunks in zip(shard, self._wait_for_shard(future)):
+                    # the chunks were built from a copy of the document
+                    for chunk in chunks:
+                        chunk.source_document = document
+                    final_chunks.extend(chunks)
+
+                    if self.callback:
+                        self.callback.progress("Chunker.chunk", len(chunks))
+        except BrokenProcessPool:
+            logger.exception("Chunking workers died, chunking the batch in process")
+            self._drop_pool()
+            return super().chunk(documents)
+        finally:
+            for future in futures:
+                future.cancel()
+
+        return final_chunks
@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+
+import litellm  # type: ignore
+from pydantic import BaseModel
+
+from onyx.configs.app_configs import CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS
+from onyx.configs.app_configs import CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS_BY_PROVIDER
+from onyx.configs.app_configs import CONTEXTUAL_RAG_RATE_LIMIT_RETRIES
+from onyx.llm.chat_llm import LLMRateLimitError
+from onyx.llm.interfaces import LLM
+from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.llm.utils import message_to_string
+from onyx.llm.utils import model_supports_prompt_caching
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_RATE_LIMIT_BACKOFF_BASE_SECONDS = 1.0
+_RATE_LIMIT_BACKOFF_MAX_SECONDS = 30.0
+
+_provider_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_provider_semaphores_lock = threading.Lock()
+
+
+def get_max_concurrent_requests(model_provider: str) -> int:
+    return max(
+        1,
+        CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS_BY_PROVIDER.get(
+            model_provider, CONTEXTUAL_RAG_MAX_CONCURRENT_REQUESTS
+        ),
+    )
+
+
+def _get_provider_semaphore(model_provider: str) -> threading.BoundedSemaphore:
+    """Shared by every executor in the process, so concurrent batches can't exceed
+    the in-flight limit of a provider together."""
+    with _provider_semaphores_lock:
+        semaphore = _provider_semaphores.get(model_provider)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(
+                get_max_concurrent_requests(model_provider)
+            )
+            _provider_semaphores[model_provider] = semaphore
+        return semaphore
+
+
+class ContextualRAGUsage(BaseModel):
+    """LLM usage of contextual RAG, token counts are estimated with the LLM's
+    tokenizer."""
+
+    llm_calls: int = 0
+    failed_calls: int = 0
+    rate_limit_retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # wall clock time spent adding contextual summaries
+    seconds: float = 0.0
+    cost_usd: float = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        total_tokens = self.prompt_tokens + self.completion_tokens
+        return total_tokens / self.seconds if self.seconds else 0.0
+
+    def add(self, other: "ContextualRAGUsage") -> None:
+        self.llm_calls += other.llm_calls
+        self.failed_calls += other.failed_calls
+        self.rate_limit_retries += other.rate_limit_retries
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.seconds += other.seconds
+        self.cost_usd += other.cost_usd
+
+    def to_log_str(self) -> str:
+        return (
+            f"llm_calls={self.llm_calls} "
+            f"failed_calls={self.failed_calls} "
+            f"rate_limit_retries={self.rate_limit_retries} "
+            f"prompt_tokens={self.prompt_tokens} "
+            f"completion_tokens={self.completion_tokens} "
+            f"seconds={self.seconds:.2f} "
+            f"tokens_per_second={self.tokens_per_second:.1f} "
+            f"cost_usd={self.cost_usd:.4f}"
+        )
+
+
+class ContextualRAGExecutor:
+    """Runs the contextual RAG LLM calls of an indexing batch.
+
+    Calls can be made from many threads at once, the number actually in flight is
+    capped per LLM provider. Rate limited calls are retried with exponential backoff,
+    without holding a slot while waiting. Tracks the usage of every call."""
+
+    def __init__(self, llm: LLM, tokenizer: BaseTokenizer) -> None:
+        self.llm = llm
+        self.tokenizer = tokenizer
+        self.max_in_flight = get_max_concurrent_requests(llm.config.model_provider)
+        self.supports_prompt_caching = model_supports_prompt_caching(
+            model_name=llm.config.model_name,
+            model_provider=llm.config.model_provider,
+        )
+
+        self._semaphore = _get_provider_semaphore(llm.config.model_provider)
+        self._usage = ContextualRAGUsage()
+        self._usage_lock = threading.Lock()
+        # prompt prefixes (the document) are shared by all chunks of a document
+        self._prefix_token_counts: dict[str, int] = {}
+        self._start_time = time.monotonic()
+
+    def invoke(self, prompt_prefix: str, prompt_suffix: str = "") -> str:
+        """The prompt is `prompt_prefix + prompt_suffix`. Calls that share the prefix
+        send byte identical leading content, so providers with prompt caching can
+        reuse it."""
+        prompt = prompt_prefix + prompt_suffix
+        rate_limit_retries = 0
+        try:
+            while True:
+                try:
+                    with self._semaphore:
+                        response = self.llm.invoke(
+                            prompt, max_tokens=MAX_CONTEXT_TOKENS
+                        )
+                    break
+                except (LLMRateLimitError, litellm.RateLimitError):
+                    if rate_limit_retries >= CONTEXTUAL_RAG_RATE_LIMIT_RETRIES:
+                        raise
+                    delay = min(
+                        _RATE_LIMIT_BACKOFF_MAX_SECONDS,
+                        _RATE_LIMIT_BACKOFF_BASE_SECONDS * 2**rate_limit_retries,
+                    )
+                    rate_limit_retries += 1
+                    time.sleep(delay * random.uniform(0.5, 1.5))
+        except Exception:
+            with self._usage_lock:
+                self._usage.failed_calls += 1
+                self._usage.rate_limit_retries += rate_limit_retries
+            raise
+
+        result = message_to_string(response)
+
+        prompt_tokens = self._count_prefix_tokens(prompt_prefix) + len(
+            self.tokenizer.encode(prompt_suffix)
+        )
+        completion_tokens = len(self.tokenizer.encode(result))
+        with self._usage_lock:
+            self._usage.llm_calls += 1
+            self._usage.rate_limit_retries += rate_limit_retries
+            self._usage.prompt_tokens += prompt_tokens
+            self._usage.completion_tokens += completion_tokens
+
+        return result
+
+    def _count_prefix_tokens(self, prompt_prefix: str) -> int:
+        num_tokens = self._prefix_token_counts.get(prompt_prefix)
+        if num_tokens is None:
+            num_tokens = len(self.tokenizer.encode(prompt_prefix))
+            self._prefix_token_counts[prompt_prefix] = num_tokens
+        return num_tokens
+
+    def get_usage(self) -> ContextualRAGUsage:
+        with self._usage_lock:
+            usage = self._usage.model_copy()
+
+        usage.seconds = time.monotonic() - self._start_time
+        try:
+            usd_per_prompt, usd_per_completion = litellm.cost_per_token(
+                model=self.llm.config.model_name,
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+            )
+            usage.cost_usd = usd_per_prompt + usd_per_completion
+        except Exception:
+            # no pricing info for the model (e.g. self hosted)
+            usage.cost_usd = 0.0
+        return usage
@@ -2,10 +2,13 @@ import time
 from abc import ABC
 from abc import abstractmethod
 from collections import defaultdict
+from collections.abc import Callable
 
+from onyx.configs.app_configs import ENABLE_EMBEDDING_CACHE
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import DocumentFailure
 from onyx.db.models import SearchSettings
+from onyx.indexing.embedding_cache import PassageEmbeddingCache
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -93,6 +96,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
         callback: IndexingHeartbeatInterface | None = None,
+        use_embedding_cache: bool = False,
     ):
         super().__init__(
             model_name,
@@ -108,6 +112,34 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             callback,
         )
 
+        self.embedding_cache = (
+            PassageEmbeddingCache(
+                model_name=model_name,
+                normalize=normalize,
+                passage_prefix=passage_prefix,
+                provider_type=provider_type,
+                deployment_name=deployment_name,
+                reduced_dimension=reduced_dimension,
+            )
+            if use_embedding_cache
+            else None
+        )
+
+    def _encode_passages(
+        self,
+        texts: list[str],
+        large_chunks_present: bool,
+        encode_func: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        if self.embedding_cache is None:
+            return encode_func(texts)
+
+        return self.embedding_cache.encode(
+            texts=texts,
+            large_chunks_present=large_chunks_present,
+            encode_func=encode_func,
+        )
+
     @log_function_time()
     def embed_chunks(
         self,
@@ -143,12 +175,16 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
+        embeddings = self._encode_passages(
             texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
             large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
+            encode_func=lambda texts: self.embedding_model.encode(
+                texts=texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            ),
         )
 
         chunk_titles = {
@@ -163,11 +199,15 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
         if chunk_titles_list:
-            title_embeddings = self.embedding_model.encode(
-                chunk_titles_list,
-                text_type=EmbedTextType.PASSAGE,
-                tenant_id=tenant_id,
-                request_id=request_id,
+            title_embeddings = self._encode_passages(
+                texts=chunk_titles_list,
+                large_chunks_present=False,
+                encode_func=lambda texts: self.embedding_model.encode(
+                    texts,
+                    text_type=EmbedTextType.PASSAGE,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                ),
             )
             title_embed_dict.update(
                 {
@@ -237,6 +277,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
             callback=callback,
+            use_embedding_cache=ENABLE_EMBEDDING_CACHE,
         )
 
 
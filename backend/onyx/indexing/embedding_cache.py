@@ -0,0 +1,137 @@
+import hashlib
+from collections.abc import Callable
+
+import numpy as np
+
+from onyx.configs.app_configs import EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import EMBEDDING_CACHE_PRUNE_INTERVAL
+from onyx.configs.app_configs import EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS
+from onyx.db.embedding_cache import get_cached_embeddings
+from onyx.db.embedding_cache import prune_embedding_cache
+from onyx.db.embedding_cache import upsert_cached_embeddings
+from onyx.db.engine import get_session_with_current_tenant
+from onyx.db.lru_cache_table import CachePruneThrottle
+from onyx.utils.logger import setup_logger
+from shared_configs.enums import EmbeddingProvider
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_CACHE_DTYPE = np.dtype("<f4")
+
+_prune_throttle = CachePruneThrottle(EMBEDDING_CACHE_PRUNE_INTERVAL)
+
+
+def _maybe_prune_cache() -> None:
+    if not _prune_throttle.should_prune():
+        return
+
+    with get_session_with_current_tenant() as db_session:
+        num_evicted = prune_embedding_cache(db_session, EMBEDDING_CACHE_MAX_ENTRIES)
+    if num_evicted:
+        logger.info(f"Evicted {num_evicted} entries from the embedding cache")
+
+
+class PassageEmbeddingCache:
+    """Content-hash cache in front of the passage embedding calls of the indexing embedder.
+
+    The key covers everything that changes the vector for a given text, so swapping search
+    settings naturally misses instead of returning vectors from a different model. Any
+    failure to read or write the cache falls back to embedding normally."""
+
+    def __init__(
+        self,
+        model_name: str,
+        normalize: bool,
+        passage_prefix: str | None,
+        provider_type: EmbeddingProvider | None,
+        deployment_name: str | None,
+        reduced_dimension: int | None,
+    ) -> None:
+        self.key_prefix = "|".join(
+            [
+                model_name,
+                str(provider_type),
+                deployment_name or "",
+                str(normalize),
+                passage_prefix or "",
+                str(reduced_dimension),
+            ]
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def build_key(self, text: str, large_chunks_present: bool) -> str:
+        # large chunk batches are trimmed to a larger context so the vector can differ
+        hasher = hashlib.sha256(self.key_prefix.encode("utf-8"))
+        hasher.update(b"|large|" if large_chunks_present else b"|")
+        hasher.update(text.encode("utf-8"))
+        return hasher.hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def encode(
+        self,
+        texts: list[str],
+        large_chunks_present: bool,
+        encode_func: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        """Returns embeddings for `texts` in order, only passing the texts that are not
+        cached (deduplicated) to `encode_func`."""
+        keys = [self.build_key(text, large_chunks_present) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        cached: dict[str, bytes] = {}
+        try:
+            with get_session_with_current_tenant() as db_session:
+                cached = get_cached_embeddings(
+                    db_session, unique_keys, EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS
+                )
+        except Exception:
+            logger.exception("Failed to read from the embedding cache")
+
+        embeddings_by_key: dict[str, Embedding] = {
+            key: np.frombuffer(value, dtype=_CACHE_DTYPE).tolist()
+            for key, value in cached.items()
+        }
+
+        missing_texts: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in embeddings_by_key:
+                missing_texts.setdefault(key, text)
+
+        if missing_texts:
+            new_embeddings = encode_func(list(missing_texts.values()))
+            embeddings_by_key.update(zip(missing_texts.keys(), new_embeddings))
+
+            try:
+                with get_session_with_current_tenant() as db_session:
+                    upsert_cached_embeddings(
+                        db_session,
+                        {
+                            key: np.asarray(
+                                embeddings_by_key[key], dtype=_CACHE_DTYPE
+                            ).tobytes()
+                            for key in missing_texts
+                        },
+                    )
+                _maybe_prune_cache()
+            except Exception:
+                logger.exception("Failed to write to the embedding cache")
+
+        num_hits = len(unique_keys) - len(missing_texts)
+        self.hits += num_hits
+        self.misses += len(missing_texts)
+        logger.info(
+            f"event=embedding_cache "
+            f"texts={len(texts)} "
+            f"unique={len(unique_keys)} "
+            f"hits={num_hits} "
+            f"misses={len(missing_texts)} "
+            f"cumulative_hit_rate={self.hit_rate:.2f}"
+        )
+
+        return [embeddings_by_key[key] for key in keys]
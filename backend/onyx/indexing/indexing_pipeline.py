@@ -1,3 +1,4 @@
+import hashlib
 from collections import defaultdict
 from collections.abc import Callable
 from functools import partial
@@ -12,6 +13,14 @@ from onyx.access.models import DocumentAccess
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import ENABLE_IMAGE_SUMMARY_CACHE
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_WORKERS
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARY_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import IMAGE_SUMMARY_CACHE_PRUNE_INTERVAL
+from onyx.configs.app_configs import IMAGE_SUMMARY_CACHE_TOUCH_INTERVAL_SECONDS
+from onyx.configs.app_configs import INDEXING_CHUNKING_PROCESSES
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
@@ -42,6 +51,10 @@ from onyx.db.document import upsert_document_by_connector_credential_pair
 from onyx.db.document import upsert_documents
 from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.engine import get_session_with_current_tenant
+from onyx.db.image_summary_cache import get_cached_image_summaries
+from onyx.db.image_summary_cache import prune_image_summary_cache
+from onyx.db.image_summary_cache import upsert_cached_image_summaries
+from onyx.db.lru_cache_table import CachePruneThrottle
 from onyx.db.models import Document as DBDocument
 from onyx.db.models import IndexModelStatus
 from onyx.db.pg_file_store import get_pgfilestore_by_file_name
@@ -61,6 +74,9 @@ from onyx.document_index.interfaces import IndexBatchParams
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.utils import store_user_file_plaintext
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunker import ParallelChunker
+from onyx.indexing.contextual_rag import ContextualRAGExecutor
+from onyx.indexing.contextual_rag import ContextualRAGUsage
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
@@ -76,7 +92,6 @@ from onyx.llm.factory import get_llm_for_contextual_rag
 from onyx.llm.interfaces import LLM
 from onyx.llm.utils import get_max_input_tokens
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
-from onyx.llm.utils import message_to_string
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
@@ -116,6 +131,9 @@ class IndexingPipelineResult(BaseModel):
 
     failures: list[ConnectorFailure]
 
+    # only set when contextual RAG ran for the batch
+    contextual_rag_usage: ContextualRAGUsage | None = None
+
 
 class IndexingPipelineProtocol(Protocol):
     def __call__(
@@ -439,6 +457,114 @@ def filter_documents(document_batch: list[Document]) -> list[Document]:
     return documents
 
 
+_image_summary_prune_throttle = CachePruneThrottle(IMAGE_SUMMARY_CACHE_PRUNE_INTERVAL)
+
+
+def _build_image_summary_cache_key(image_data: bytes, llm: LLM) -> str:
+    # the file name is left out on purpose, the same image under a different name
+    # (e.g. a logo repeated across documents) should reuse the summary
+    hasher = hashlib.sha256(
+        "|".join(
+            [
+                llm.config.model_provider,
+                llm.config.model_name,
+                IMAGE_SUMMARIZATION_SYSTEM_PROMPT,
+                IMAGE_SUMMARIZATION_USER_PROMPT,
+            ]
+        ).encode("utf-8")
+    )
+    hasher.update(b"|")
+    hasher.update(image_data)
+    return hasher.hexdigest()
+
+
+def _summarize_image_files(image_file_names: list[str], llm: LLM) -> dict[str, str]:
+    """Returns the section text for each image file. All images are read with a single
+    DB session, images with a cached summary skip the LLM, and the remaining unique
+    images are summarized concurrently."""
+    section_texts: dict[str, str] = {}
+    file_name_to_key: dict[str, str] = {}
+    # cache key -> (image data, display name), so duplicate images are summarized once
+    images_by_key: dict[str, tuple[bytes, str]] = {}
+    cached_summaries: dict[str, str] = {}
+
+    with get_session_with_current_tenant() as db_session:
+        for file_name in image_file_names:
+            try:
+                pgfilestore = get_pgfilestore_by_file_name(
+                    file_name=file_name, db_session=db_session
+                )
+                image_data = read_lobj(
+                    pgfilestore.lobj_oid, db_session, mode="rb"
+                ).read()
+            except Exception as e:
+                logger.error(f"Error processing image section: {e}")
+                section_texts[file_name] = "[Error processing image]"
+                continue
+
+            key = _build_image_summary_cache_key(image_data, llm)
+            file_name_to_key[file_name] = key
+            images_by_key.setdefault(key, (image_data, pgfilestore.display_name))
+
+        if ENABLE_IMAGE_SUMMARY_CACHE and images_by_key:
+            try:
+                cached_summaries = get_cached_image_summaries(
+                    db_session,
+                    list(images_by_key),
+                    IMAGE_SUMMARY_CACHE_TOUCH_INTERVAL_SECONDS,
+                )
+            except Exception:
+                logger.exception("Failed to read from the image summary cache")
+
+    keys_to_summarize = [key for key in images_by_key if key not in cached_summaries]
+    # failed summarizations come back as None
+    results = run_functions_tuples_in_parallel(
+        [
+            (
+                summarize_image_with_error_handling,
+                (llm, images_by_key[key][0], images_by_key[key][1] or "Image"),
+            )
+            for key in keys_to_summarize
+        ],
+        allow_failures=True,
+        max_workers=IMAGE_SUMMARIZATION_MAX_WORKERS,
+    )
+    key_to_result: dict[str, str | None] = dict(zip(keys_to_summarize, results))
+    new_summaries = {key: result for key, result in key_to_result.items() if result}
+
+    if ENABLE_IMAGE_SUMMARY_CACHE and new_summaries:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                upsert_cached_image_summaries(db_session, new_summaries)
+                if _image_summary_prune_throttle.should_prune():
+                    prune_image_summary_cache(
+                        db_session, IMAGE_SUMMARY_CACHE_MAX_ENTRIES
+                    )
+        except Exception:
+            logger.exception("Failed to write to the image summary cache")
+
+    for file_name, key in file_name_to_key.items():
+        if key in cached_summaries:
+            section_texts[file_name] = cached_summaries[key]
+        elif new_summaries.get(key):
+            section_texts[file_name] = new_summaries[key]
+        elif key_to_result.get(key) is None:
+            section_texts[file_name] = "[Error processing image]"
+        else:
+            section_texts[file_name] = "[Image could not be summarized]"
+
+    logger.info(
+        f"event=image_summarization "
+        f"images={len(image_file_names)} "
+        f"unique={len(images_by_key)} "
+        f"cache_hits={len(cached_summaries)} "
+        f"summarized={len(new_summaries)} "
+        f"failed={len(keys_to_summarize) - len(new_summaries)}"
+    )
+
+    return section_texts
+
+
 def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     """
     Process all sections in documents by:
@@ -480,56 +606,32 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
             for document in documents
         ]
 
+    image_section_texts = _summarize_image_files(
+        image_file_names=list(
+            dict.fromkeys(
+                section.image_file_name
+                for document in documents
+                for section in document.sections
+                if isinstance(section, ImageSection)
+            )
+        ),
+        llm=llm,
+    )
+
     indexed_documents: list[IndexingDocument] = []
 
     for document in documents:
         processed_sections: list[Section] = []
 
         for section in document.sections:
-            # For ImageSection, process and create base Section with both text and image_file_name
+            # For ImageSection, create base Section with both the summary and image_file_name
             if isinstance(section, ImageSection):
-                # Default section with image path preserved - ensure text is always a string
                 processed_section = Section(
                     link=section.link,
                     image_file_name=section.image_file_name,
-                    text="",  # Initialize with empty string
+                    text=image_section_texts[section.image_file_name],
                 )
 
-                # Try to get image summary
-                try:
-                    with get_session_with_current_tenant() as db_session:
-                        pgfilestore = get_pgfilestore_by_file_name(
-                            file_name=section.image_file_name, db_session=db_session
-                        )
-
-                        if not pgfilestore:
-                            logger.warning(
-                                f"Image file {section.image_file_name} not found in PGFileStore"
-                            )
-
-                            processed_section.text = "[Image could not be processed]"
-                        else:
-                            # Get the image data
-                            image_data_io = read_lobj(
-                                pgfilestore.lobj_oid, db_session, mode="rb"
-                            )
-                            pgfilestore_data = image_data_io.read()
-                            summary = summarize_image_with_error_handling(
-                                llm=llm,
-                                image_data=pgfilestore_data,
-                                context_name=pgfilestore.display_name or "Image",
-                            )
-
-                            if summary:
-                                processed_section.text = summary
-                            else:
-                                processed_section.text = (
-                                    "[Image could not be summarized]"
-                                )
-                except Exception as e:
-                    logger.error(f"Error processing image section: {e}")
-                    processed_section.text = "[Error processing image]"
-
                 processed_sections.append(processed_section)
                 logger.info(f"Успешно обработано изображение! {processed_section}")
 
@@ -566,11 +668,13 @@ def add_document_summaries(
     llm: LLM,
     tokenizer: BaseTokenizer,
     trunc_doc_tokens: int,
+    executor: ContextualRAGExecutor | None = None,
 ) -> list[int] | None:
     """
     Adds a document summary to a list of chunks from the same document.
     Returns the number of tokens in the document.
     """
+    executor = executor or ContextualRAGExecutor(llm, tokenizer)
 
     doc_tokens = []
     # this is value is the same for each chunk in the document; 0 indicates
@@ -582,9 +686,7 @@ def add_document_summaries(
     doc_tokens = tokenizer.encode(chunks_by_doc[0].source_document.get_text_content())
     doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_tokens, tokenizer)
     summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-    doc_summary = message_to_string(
-        llm.invoke(summary_prompt, max_tokens=MAX_CONTEXT_TOKENS)
-    )
+    doc_summary = executor.invoke(summary_prompt)
 
     for chunk in chunks_by_doc:
         chunk.doc_summary = doc_summary
@@ -598,12 +700,15 @@ def add_chunk_summaries(
     tokenizer: BaseTokenizer,
     trunc_doc_chunk_tokens: int,
     doc_tokens: list[int] | None,
+    executor: ContextualRAGExecutor | None = None,
 ) -> None:
     """
     Adds chunk summaries to the chunks grouped by document id.
     Chunk summaries look at the chunk as well as the entire document (or a summary,
     if the document is too long) and describe how the chunk relates to the document.
     """
+    executor = executor or ContextualRAGExecutor(llm, tokenizer)
+
     # all chunks within a document have the same contextual_rag_reserved_tokens
     if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
         return
@@ -623,35 +728,36 @@ def add_chunk_summaries(
     if not doc_info:
         # This happens if the document is too long AND document summaries are turned off
         # In this case we compute a doc summary using the LLM
-        doc_info = message_to_string(
-            llm.invoke(
-                DOCUMENT_SUMMARY_PROMPT.format(document=doc_content),
-                max_tokens=MAX_CONTEXT_TOKENS,
-            )
-        )
+        doc_info = executor.invoke(DOCUMENT_SUMMARY_PROMPT.format(document=doc_content))
 
+    # the same document prefix is sent for every chunk of the document
     context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
 
     def assign_context(chunk: DocAwareChunk) -> None:
         context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
         try:
-            chunk.chunk_context = message_to_string(
-                llm.invoke(
-                    context_prompt1 + context_prompt2,
-                    max_tokens=MAX_CONTEXT_TOKENS,
-                )
-            )
+            chunk.chunk_context = executor.invoke(context_prompt1, context_prompt2)
         except LLMRateLimitError as e:
             # Erroring during chunker is undesirable, so we log the error and continue
-            # TODO: for v2, add robust retry logic
-            logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
+            logger.exception(
+                f"Rate limit adding chunk summary after retries: {e}", exc_info=e
+            )
             chunk.chunk_context = ""
         except Exception as e:
             logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
             chunk.chunk_context = ""
 
+    remaining_chunks = chunks_by_doc
+    if executor.supports_prompt_caching and len(chunks_by_doc) > 1:
+        # let the first call write the document prefix into the provider's prompt
+        # cache, so the calls for the other chunks can read it instead of all of
+        # them missing the cache at the same time
+        assign_context(chunks_by_doc[0])
+        remaining_chunks = chunks_by_doc[1:]
+
     run_functions_tuples_in_parallel(
-        [(assign_context, (chunk,)) for chunk in chunks_by_doc]
+        [(assign_context, (chunk,)) for chunk in remaining_chunks],
+        max_workers=executor.max_in_flight,
     )
 
 
@@ -660,11 +766,15 @@ def add_contextual_summaries(
     llm: LLM,
     tokenizer: BaseTokenizer,
     chunk_token_limit: int,
+    executor: ContextualRAGExecutor | None = None,
 ) -> list[DocAwareChunk]:
     """
     Adds Document summary and chunk-within-document context to the chunks
-    based on which environment variables are set.
+    based on which environment variables are set. Documents are processed
+    concurrently, `executor` caps the number of LLM calls in flight.
     """
+    executor = executor or ContextualRAGExecutor(llm, tokenizer)
+
     max_context = get_max_input_tokens(
         model_name=llm.config.model_name,
         model_provider=llm.config.model_provider,
@@ -685,18 +795,32 @@ def add_contextual_summaries(
     # The number of tokens allowed for the document when computing a
     # "chunk in context of document" summary
     trunc_doc_chunk_tokens = max_context - prompt_tokens - chunk_token_limit
-    for chunks_by_doc in doc2chunks.values():
+
+    def add_summaries_for_doc(chunks_by_doc: list[DocAwareChunk]) -> None:
         doc_tokens = None
         if USE_DOCUMENT_SUMMARY:
             doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
+                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens, executor
             )
 
         if USE_CHUNK_SUMMARY:
             add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
+                chunks_by_doc,
+                llm,
+                tokenizer,
+                trunc_doc_chunk_tokens,
+                doc_tokens,
+                executor,
             )
 
+    run_functions_tuples_in_parallel(
+        [
+            (add_summaries_for_doc, (chunks_by_doc,))
+            for chunks_by_doc in doc2chunks.values()
+        ],
+        max_workers=executor.max_in_flight,
+    )
+
     return chunks
 
 
@@ -775,6 +899,7 @@ def index_doc_batch(
     # a common source of failure for the indexing pipeline
     chunks: list[DocAwareChunk] = chunker.chunk(ctx.indexable_docs)
     llm_tokenizer: BaseTokenizer | None = None
+    contextual_rag_usage: ContextualRAGUsage | None = None
 
     # contextual RAG
     if enable_contextual_rag:
@@ -784,10 +909,22 @@ def index_doc_batch(
             provider_type=llm.config.model_provider,
         )
 
+        contextual_rag_executor = ContextualRAGExecutor(llm, llm_tokenizer)
         # Because the chunker's tokens are different from the LLM's tokens,
         # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
         chunks = add_contextual_summaries(
-            chunks, llm, llm_tokenizer, chunker.chunk_token_limit * 2
+            chunks,
+            llm,
+            llm_tokenizer,
+            chunker.chunk_token_limit * 2,
+            contextual_rag_executor,
+        )
+        contextual_rag_usage = contextual_rag_executor.get_usage()
+        logger.info(
+            f"event=contextual_rag_usage "
+            f"request_id={index_attempt_metadata.request_id} "
+            f"chunks={len(chunks)} "
+            f"{contextual_rag_usage.to_log_str()}"
         )
 
     logger.debug("Starting embedding")
@@ -1042,6 +1179,7 @@ def index_doc_batch(
         total_docs=len(filtered_documents),
         total_chunks=len(access_aware_chunks),
         failures=vector_db_write_failures + embedding_failures,
+        contextual_rag_usage=contextual_rag_usage,
     )
 
     return result
@@ -1057,8 +1195,12 @@ def build_indexing_pipeline(
     chunker: Chunker | None = None,
     ignore_time_skip: bool = False,
     callback: IndexingHeartbeatInterface | None = None,
+    chunking_processes: int = INDEXING_CHUNKING_PROCESSES,
 ) -> IndexingPipelineProtocol:
-    """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
+    """Builds a pipeline which takes in a list (batch) of docs and indexes them.
+
+    With `chunking_processes` > 1, documents are chunked in a pool of that many
+    worker processes."""
     all_search_settings = get_active_search_settings(db_session)
     if (
         all_search_settings.secondary
@@ -1081,6 +1223,17 @@ def build_indexing_pipeline(
             or DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER,
         )
 
+    if chunker is None and chunking_processes > 1:
+        chunker = ParallelChunker(
+            tokenizer_model_name=embedder.model_name,
+            tokenizer_provider_type=embedder.provider_type,
+            num_processes=chunking_processes,
+            enable_multipass=multipass_config.multipass_indexing,
+            enable_large_chunks=multipass_config.enable_large_chunks,
+            enable_contextual_rag=enable_contextual_rag,
+            callback=callback,
+        )
+
     chunker = chunker or Chunker(
         tokenizer=embedder.embedding_model.tokenizer,
         enable_multipass=multipass_config.multipass_indexing,
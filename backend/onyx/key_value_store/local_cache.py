@@ -0,0 +1,166 @@
+import copy
+import json
+import os
+import threading
+import time
+
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_TTL_SECONDS
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+from onyx.utils.special_types import JSON_ro
+from onyx.utils.ttl_cache import TTLCache
+
+logger = setup_logger()
+
+# pub/sub channels aren't namespaced by db or tenant, messages carry the tenant id
+KV_STORE_INVALIDATION_CHANNEL = "onyx_kv_store:invalidations"
+
+_LISTENER_POLL_SECONDS = 5.0
+_LISTENER_RETRY_SECONDS = 5.0
+
+
+class KvStoreLocalCache:
+    """Process local cache of key value store values, in front of Redis.
+
+    Writers publish the keys they change, a background thread of every process
+    subscribes to those and drops the keys from its cache. The cache is only served
+    while the subscription is up: anything published while it was down may have been
+    missed, so the cache is cleared whenever the subscription is (re)established.
+
+    Loads take the generation before reading from Redis / Postgres and only cache the
+    value if no invalidation happened in the meantime, so a value read before a
+    concurrent write can't be cached after that write's invalidation went by."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        # values are wrapped in a tuple since None is a valid value, keys that don't
+        # exist are cached as an empty tuple
+        self._cache: TTLCache[tuple[str, str], tuple[JSON_ro] | tuple[()]] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._subscribed = False
+        self._listener: threading.Thread | None = None
+        self._pid = os.getpid()
+
+    def _ensure_listener(self) -> bool:
+        """Returns whether the cache is currently usable."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked, the listener thread and its subscription stayed in the parent
+                self._pid = os.getpid()
+                self._listener = None
+                self._subscribed = False
+                self._cache.clear()
+
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    name="kv-store-cache-invalidation",
+                    daemon=True,
+                )
+                self._listener.start()
+
+            return self._subscribed
+
+    def _listen(self) -> None:
+        log_failure = True
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_raw_redis_client().pubsub()
+                pubsub.subscribe(KV_STORE_INVALIDATION_CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=_LISTENER_POLL_SECONDS)
+                    if message is None:
+                        continue
+
+                    if message["type"] == "subscribe":
+                        with self._lock:
+                            self._generation += 1
+                            self._cache.clear()
+                            self._subscribed = True
+                        log_failure = True
+                    elif message["type"] == "message":
+                        tenant_id, key = json.loads(message["data"])
+                        self.invalidate_local(tenant_id, key)
+            except Exception:
+                # only once until it resubscribes, Redis may be down for a while
+                if log_failure:
+                    logger.warning(
+                        "KV store cache invalidation listener failed, "
+                        "bypassing the cache until it resubscribes",
+                        exc_info=True,
+                    )
+                    log_failure = False
+            finally:
+                with self._lock:
+                    self._subscribed = False
+                    self._cache.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+            time.sleep(_LISTENER_RETRY_SECONDS)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, tenant_id: str, key: str) -> tuple[JSON_ro] | tuple[()] | None:
+        """Returns None on a miss. Otherwise the value wrapped in a tuple (a copy,
+        callers are free to mutate it), or an empty tuple if the key doesn't exist."""
+        if not self._ensure_listener():
+            return None
+
+        entry = self._cache.get((tenant_id, key))
+        if not entry:
+            return entry
+        return (copy.deepcopy(entry[0]),)
+
+    def set(
+        self,
+        tenant_id: str,
+        key: str,
+        entry: tuple[JSON_ro] | tuple[()],
+        generation: int,
+    ) -> None:
+        """`entry` is as returned by `get`, `generation` is the generation from before
+        it was read."""
+        with self._lock:
+            if not self._subscribed or generation != self._generation:
+                return
+            self._cache.set((tenant_id, key), copy.deepcopy(entry))
+
+    def invalidate_local(self, tenant_id: str, key: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.delete((tenant_id, key))
+
+    def invalidate(self, tenant_id: str, key: str) -> None:
+        """Drops the key from the cache of every process."""
+        self.invalidate_local(tenant_id, key)
+        try:
+            get_raw_redis_client().publish(
+                KV_STORE_INVALIDATION_CHANNEL, json.dumps([tenant_id, key])
+            )
+        except Exception:
+            # other processes will pick up the change once their entry expires
+            logger.exception(f"Failed to publish KV store invalidation for '{key}'")
+
+
+_local_cache: KvStoreLocalCache | None = (
+    KvStoreLocalCache(
+        maxsize=KV_STORE_LOCAL_CACHE_MAX_ENTRIES,
+        ttl=KV_STORE_LOCAL_CACHE_TTL_SECONDS,
+    )
+    if KV_STORE_LOCAL_CACHE_TTL_SECONDS > 0
+    else None
+)
+
+
+def get_kv_store_local_cache() -> KvStoreLocalCache | None:
+    return _local_cache
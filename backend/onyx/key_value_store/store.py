@@ -13,6 +13,7 @@ from onyx.db.engine import is_valid_schema_name
 from onyx.db.models import KVStore
 from onyx.key_value_store.interface import KeyValueStore
 from onyx.key_value_store.interface import KvKeyNotFoundError
+from onyx.key_value_store.local_cache import get_kv_store_local_cache
 from onyx.redis.redis_pool import get_redis_client
 from onyx.server.utils import BasicAuthenticationError
 from onyx.utils.logger import setup_logger
@@ -39,6 +40,8 @@ class PgRedisKVStore(KeyValueStore):
         else:
             self.redis_client = get_redis_client(tenant_id=self.tenant_id)
 
+        self.local_cache = get_kv_store_local_cache()
+
     @contextmanager
     def _get_session(self) -> Iterator[Session]:
         engine = get_sqlalchemy_engine()
@@ -77,7 +80,30 @@ class PgRedisKVStore(KeyValueStore):
                 session.add(obj)
             session.commit()
 
+        if self.local_cache:
+            self.local_cache.invalidate(self.tenant_id, key)
+
     def load(self, key: str) -> JSON_ro:
+        if not self.local_cache:
+            return self._load(key)
+
+        cached = self.local_cache.get(self.tenant_id, key)
+        if cached is not None:
+            if not cached:
+                raise KvKeyNotFoundError
+            return cached[0]
+
+        generation = self.local_cache.generation
+        try:
+            value = self._load(key)
+        except KvKeyNotFoundError:
+            # optional keys (e.g. API keys that were never set) are read just as often
+            self.local_cache.set(self.tenant_id, key, (), generation)
+            raise
+        self.local_cache.set(self.tenant_id, key, (value,), generation)
+        return value
+
+    def _load(self, key: str) -> JSON_ro:
         try:
             redis_value = self.redis_client.get(REDIS_KEY_PREFIX + key)
             if redis_value:
@@ -111,8 +137,12 @@ class PgRedisKVStore(KeyValueStore):
         except Exception as e:
             logger.error(f"Failed to delete value from Redis for key '{key}': {str(e)}")
 
-        with self._get_session() as session:
-            result = session.query(KVStore).filter_by(key=key).delete()  # type: ignore
-            if result == 0:
-                raise KvKeyNotFoundError
-            session.commit()
+        try:
+            with self._get_session() as session:
+                result = session.query(KVStore).filter_by(key=key).delete()  # type: ignore
+                if result == 0:
+                    raise KvKeyNotFoundError
+                session.commit()
+        finally:
+            if self.local_cache:
+                self.local_cache.invalidate(self.tenant_id, key)
@@ -1,8 +1,12 @@
 import copy
 import io
 import json
+import threading
 from collections.abc import Callable
 from collections.abc import Iterator
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Any
 from typing import cast
 
@@ -159,11 +163,11 @@ def _build_content(
                 file_content = extract_file_text(
                     file=file_stream,
                     file_name=file_name_for_parser,
-                    break_on_unprocessable=False  # Не роняем все, если парсинг не удался
+                    break_on_unprocessable=False,  # Не роняем все, если парсинг не удался
                 )
 
                 if not file_content:
-                     file_content = f"[Binary file content - {file.file_type} format - could not parse]"
+                    file_content = f"[Binary file content - {file.file_type} format - could not parse]"
 
             except Exception as e:
                 file_content = f"[Binary file content - {file.file_type} format]"
@@ -392,7 +396,11 @@ def test_llm(llm: LLM) -> str | None:
     return error_msg
 
 
-def get_model_map() -> dict:
+_MODEL_MAP_LOCK = threading.Lock()
+_MODEL_MAP: Mapping[str, Mapping[str, Any]] | None = None
+
+
+def _build_model_map() -> dict[str, Any]:
     starting_map = copy.deepcopy(cast(dict, litellm.model_cost))
     starting_map[f"ollama/gemma3:27b"] = {
         "max_tokens": 32000,
@@ -440,6 +448,38 @@ def get_model_map() -> dict:
     return starting_map
 
 
+def get_model_map() -> Mapping[str, Mapping[str, Any]]:
+    """Returns litellm's model map plus our overrides. It is built once per process
+    and frozen, so it is shared between callers without copying and can't be
+    modified. Use `refresh_model_map` to pick up changes."""
+    global _MODEL_MAP
+
+    model_map = _MODEL_MAP
+    if model_map is not None:
+        return model_map
+
+    with _MODEL_MAP_LOCK:
+        if _MODEL_MAP is None:
+            _MODEL_MAP = MappingProxyType(
+                {
+                    key: MappingProxyType(value) if isinstance(value, dict) else value
+                    for key, value in _build_model_map().items()
+                }
+            )
+        return _MODEL_MAP
+
+
+def refresh_model_map() -> None:
+    """Drops the cached model map and the model lookups done against it. Should be
+    called whenever litellm's model data changes (e.g. `litellm.register_model`) or
+    the configured LLM providers change."""
+    global _MODEL_MAP
+
+    with _MODEL_MAP_LOCK:
+        _MODEL_MAP = None
+        _find_cached_model_obj.cache_clear()
+
+
 def _strip_extra_provider_from_model_name(model_name: str) -> str:
     return model_name.split("/")[1] if "/" in model_name else model_name
 
@@ -448,7 +488,24 @@ def _strip_colon_from_model_name(model_name: str) -> str:
     return ":".join(model_name.split(":")[:-1]) if ":" in model_name else model_name
 
 
-def _find_model_obj(model_map: dict, provider: str, model_name: str) -> dict | None:
+def _find_model_obj(
+    model_map: Mapping[str, Any], provider: str, model_name: str
+) -> Mapping[str, Any] | None:
+    if model_map is _MODEL_MAP:
+        return _find_cached_model_obj(provider, model_name)
+    return _search_model_obj(model_map, provider, model_name)
+
+
+@lru_cache(maxsize=4096)
+def _find_cached_model_obj(provider: str, model_name: str) -> Mapping[str, Any] | None:
+    """Memoized lookup against the cached model map, so resolving a
+    (provider, model) pair only has to try the name variants once."""
+    return _search_model_obj(get_model_map(), provider, model_name)
+
+
+def _search_model_obj(
+    model_map: Mapping[str, Any], provider: str, model_name: str
+) -> Mapping[str, Any] | None:
     stripped_model_name = _strip_extra_provider_from_model_name(model_name)
 
     model_names = [
@@ -555,7 +612,7 @@ def get_llm_contextual_cost(
 
 
 def get_llm_max_tokens(
-    model_map: dict,
+    model_map: Mapping[str, Any],
     model_name: str,
     model_provider: str,
 ) -> int:
@@ -594,7 +651,7 @@ def get_llm_max_tokens(
 
 
 def get_llm_max_output_tokens(
-    model_map: dict,
+    model_map: Mapping[str, Any],
     model_name: str,
     model_provider: str,
 ) -> int:
@@ -676,6 +733,17 @@ def model_supports_image_input(model_name: str, model_provider: str) -> bool:
         return False
 
 
+def model_supports_prompt_caching(model_name: str, model_provider: str) -> bool:
+    try:
+        model_obj = _find_model_obj(get_model_map(), model_provider, model_name)
+        return bool(model_obj and model_obj.get("supports_prompt_caching", False))
+    except Exception:
+        logger.exception(
+            f"Failed to get model object for {model_provider}/{model_name}"
+        )
+        return False
+
+
 def model_is_reasoning_model(model_name: str) -> bool:
     _REASONING_MODEL_NAMES = [
         "o1",
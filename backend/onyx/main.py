@@ -25,6 +25,7 @@ from sqlalchemy.orm import Session
 from starlette.types import Lifespan
 
 from onyx import __version__
+from onyx.agents.agent_search.run_graph import warm_up_compiled_graphs
 from onyx.auth.schemas import UserCreate
 from onyx.auth.schemas import UserRead
 from onyx.auth.schemas import UserUpdate
@@ -51,6 +52,7 @@ from onyx.configs.constants import AuthType
 from onyx.configs.constants import POSTGRES_WEB_APP_NAME
 from onyx.db.engine import SqlEngine
 from onyx.db.engine import warm_up_connections
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.server.api_key.api import router as api_key_router
 from onyx.server.features.knowledge_map.api import router as knowledge_map_router
 from onyx.server.documents.cc_pair import router as cc_pair_router
@@ -267,9 +269,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     setup_validators_configs()
 
+    if not DISABLE_GENERATIVE_AI:
+        # so the first chat requests of this process don't pay for it
+        warm_up_compiled_graphs()
+
     yield
 
     SqlEngine.reset_engine()
+    HttpxPool.close_all()
 
     if AUTH_RATE_LIMITING_ENABLED:
         await close_auth_limiter()
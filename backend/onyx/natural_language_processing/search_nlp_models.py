@@ -32,6 +32,8 @@ from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
 from shared_configs.configs import INDEXING_MODEL_SERVER_PORT
+from shared_configs.configs import MODEL_SERVER_BINARY_EMBEDDINGS
+from shared_configs.configs import MODEL_SERVER_EMBEDDING_WIRE_DTYPE
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.enums import EmbeddingProvider
@@ -49,6 +51,10 @@ from shared_configs.model_server_models import IntentResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
 from shared_configs.utils import batch_list
+from shared_configs.utils import BINARY_EMBEDDING_MEDIA_TYPE
+from shared_configs.utils import decode_embeddings_binary
+from shared_configs.utils import EMBEDDING_DTYPE_HEADER
+from shared_configs.utils import EMBEDDING_SHAPE_HEADER
 
 logger = setup_logger()
 
@@ -78,6 +84,24 @@ def build_model_server_url(
     return f"http://{model_server_url}"
 
 
+def _parse_embed_response(response: Response) -> EmbedResponse:
+    """Model servers that support it reply with a raw float buffer, anything else
+    (older model servers, error handlers) is JSON."""
+    content_type = response.headers.get("content-type", "")
+    if not content_type.startswith(BINARY_EMBEDDING_MEDIA_TYPE):
+        return EmbedResponse(**response.json())
+
+    embeddings = decode_embeddings_binary(
+        payload=response.content,
+        shape_header=response.headers[EMBEDDING_SHAPE_HEADER],
+        dtype_name=response.headers.get(EMBEDDING_DTYPE_HEADER, "float32"),
+    )
+    # Chunks, the embedding cache and the Vespa feed all hold embeddings as lists of
+    # floats, so they are converted once here, straight from the buffer. The buffer
+    # was already validated while decoding, skip re-validating every float
+    return EmbedResponse.model_construct(embeddings=embeddings.tolist())
+
+
 class EmbeddingModel:
     def __init__(
         self,
@@ -129,6 +153,12 @@ class EmbeddingModel:
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
+            if MODEL_SERVER_BINARY_EMBEDDINGS:
+                headers["Accept"] = (
+                    f"{BINARY_EMBEDDING_MEDIA_TYPE}, application/json;q=0.9"
+                )
+                headers[EMBEDDING_DTYPE_HEADER] = MODEL_SERVER_EMBEDDING_WIRE_DTYPE
+
             response = requests.post(
                 self.embed_server_endpoint,
                 headers=headers,
@@ -160,7 +190,7 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
-            return EmbedResponse(**response.json())
+            return _parse_embed_response(response)
         except requests.HTTPError as e:
             if not response:
                 raise HTTPError("HTTP error occurred - response is None.") from e
@@ -1,3 +1,4 @@
+import json
 import os
 from abc import ABC
 from abc import abstractmethod
@@ -23,6 +24,11 @@ os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
 
 
 class BaseTokenizer(ABC):
+    # Whether the number of tokens of two texts joined by whitespace is always the sum
+    # of the number of tokens of each text, which lets callers keep running counts
+    # instead of re-encoding the joined text
+    whitespace_joins_are_additive: bool = False
+
     @abstractmethod
     def encode(self, string: str) -> list[int]:
         pass
@@ -69,9 +75,71 @@ class TiktokenTokenizer(BaseTokenizer):
         return self.encoder.decode(tokens)
 
 
+# Normalizers that work character by character
+_PER_CHARACTER_NORMALIZERS = {
+    "BertNormalizer",
+    "Lowercase",
+    "NFC",
+    "NFD",
+    "NFKC",
+    "NFKD",
+    "StripAccents",
+}
+# Pre-tokenizers that split on whitespace and drop it
+_WHITESPACE_PRE_TOKENIZERS = {"BertPreTokenizer", "Whitespace", "WhitespaceSplit"}
+# Pre-tokenizers that only split further within whitespace separated words
+_WORD_PRE_TOKENIZERS = _WHITESPACE_PRE_TOKENIZERS | {"Digits", "Punctuation"}
+
+
+def _whitespace_joins_are_additive(encoder: Tokenizer) -> bool:
+    """True for tokenizers that normalize character by character and split words on
+    whitespace before tokenizing them (e.g. BERT's WordPiece), so no token can span
+    the whitespace between two texts. Byte level BPE tokenizers (and tiktoken) keep
+    whitespace and can merge it with neighbouring characters."""
+    config = json.loads(encoder.to_str())
+    if config.get("truncation") or config.get("padding"):
+        return False
+    if any(
+        any(char.isspace() for char in added_token["content"])
+        for added_token in config.get("added_tokens") or []
+    ):
+        return False
+
+    normalizer = config.get("normalizer")
+    normalizers = (
+        []
+        if normalizer is None
+        else (
+            normalizer["normalizers"]
+            if normalizer["type"] == "Sequence"
+            else [normalizer]
+        )
+    )
+    if any(n["type"] not in _PER_CHARACTER_NORMALIZERS for n in normalizers):
+        return False
+
+    pre_tokenizer = config.get("pre_tokenizer")
+    if pre_tokenizer is None:
+        return False
+    pre_tokenizers = (
+        pre_tokenizer["pretokenizers"]
+        if pre_tokenizer["type"] == "Sequence"
+        else [pre_tokenizer]
+    )
+    return all(p["type"] in _WORD_PRE_TOKENIZERS for p in pre_tokenizers) and any(
+        p["type"] in _WHITESPACE_PRE_TOKENIZERS for p in pre_tokenizers
+    )
+
+
 class HuggingFaceTokenizer(BaseTokenizer):
     def __init__(self, model_name: str):
         self.encoder: Tokenizer = Tokenizer.from_pretrained(model_name)
+        try:
+            self.whitespace_joins_are_additive = _whitespace_joins_are_additive(
+                self.encoder
+            )
+        except Exception:
+            logger.exception(f"Failed to inspect the tokenizer of {model_name}")
 
     def _safer_encode(self, string: str) -> Encoding:
         """
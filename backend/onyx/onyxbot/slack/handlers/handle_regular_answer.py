@@ -33,29 +33,25 @@ from onyx.onyxbot.slack.blocks import build_slack_response_blocks
 from onyx.onyxbot.slack.handlers.utils import send_team_member_message
 from onyx.onyxbot.slack.handlers.utils import slackify_message_thread
 from onyx.onyxbot.slack.models import SlackMessageInfo
+from onyx.onyxbot.slack.rate_limiter import SlackRateLimiter
 from onyx.onyxbot.slack.utils import respond_in_thread_or_channel
-from onyx.onyxbot.slack.utils import SlackRateLimiter
 from onyx.onyxbot.slack.utils import update_emote_react
 from onyx.server.query_and_chat.models import CreateChatMessageRequest
 from onyx.utils.logger import OnyxLoggingAdapter
-
-srl = SlackRateLimiter()
+from shared_configs.contextvars import get_current_tenant_id
 
 RT = TypeVar("RT")  # return type
 
 
 def rate_limits(
-    client: WebClient, channel: str, thread_ts: Optional[str]
+    client: WebClient, channel: str, thread_ts: Optional[str], slack_bot_id: int
 ) -> Callable[[Callable[..., RT]], Callable[..., RT]]:
     def decorator(func: Callable[..., RT]) -> Callable[..., RT]:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> RT:
-            if not srl.is_available():
-                func_randid, position = srl.init_waiter()
-                srl.notify(client, channel, position, thread_ts)
-                while not srl.is_available():
-                    srl.waiter(func_randid)
-            srl.acquire_slot()
+            SlackRateLimiter(
+                tenant_id=get_current_tenant_id(), slack_bot_id=slack_bot_id
+            ).acquire(client, channel, thread_ts)
             return func(*args, **kwargs)
 
         return wrapper
@@ -176,7 +172,12 @@ def handle_regular_answer(
         delay=0.25,
         backoff=2,
     )
-    @rate_limits(client=client, channel=channel, thread_ts=message_ts_to_respond_to)
+    @rate_limits(
+        client=client,
+        channel=channel,
+        thread_ts=message_ts_to_respond_to,
+        slack_bot_id=slack_channel_config.slack_bot_id,
+    )
     def _get_slack_answer(
         new_message_request: CreateChatMessageRequest, onyx_user: User | None
     ) -> ChatOnyxBotResponse:
@@ -84,7 +84,7 @@ from onyx.onyxbot.slack.handlers.handle_message import (
 )
 from onyx.onyxbot.slack.handlers.handle_message import schedule_feedback_reminder
 from onyx.onyxbot.slack.models import SlackMessageInfo
-from onyx.onyxbot.slack.utils import check_message_limit
+from onyx.onyxbot.slack.rate_limiter import check_message_limit
 from onyx.onyxbot.slack.utils import decompose_action_id
 from onyx.onyxbot.slack.utils import get_channel_name_from_id
 from onyx.onyxbot.slack.utils import get_onyx_bot_slack_bot_id
@@ -682,7 +682,7 @@ def prefilter_requests(req: SocketModeRequest, client: TenantSocketModeClient) -
             )
             return False
 
-    if not check_message_limit():
+    if not check_message_limit(get_current_tenant_id(), client.slack_bot_id):
         return False
 
     logger.debug(f"Handling Slack request with Payload: '{req.payload}'")
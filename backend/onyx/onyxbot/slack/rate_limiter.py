@@ -0,0 +1,313 @@
+"""Rate limits for OnyxBot, shared by every Slack listener pod through Redis.
+
+Two limits are enforced per tenant and Slack bot:
+- `SlackRateLimiter` caps the questions answered per minute (DANSWER_BOT_MAX_QPM)
+  with a token bucket. Questions that don't get a token wait in a FIFO queue. A waiter
+  blocks on its own Redis list and is woken by the waiter ahead of it when that one
+  gets through, rather than polling.
+- `check_message_limit` caps the responses sent per time period
+  (DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD) with a sliding window counter.
+
+The scripts build some of their keys at runtime, which is fine since the keys of a
+tenant and bot all live on the same (non clustered) Redis."""
+
+import time
+import uuid
+
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from redis import Redis
+from redis.exceptions import RedisError
+from slack_sdk import WebClient
+
+from onyx.configs.onyxbot_configs import DANSWER_BOT_MAX_QPM
+from onyx.configs.onyxbot_configs import DANSWER_BOT_MAX_WAIT_TIME
+from onyx.configs.onyxbot_configs import (
+    DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD,
+)
+from onyx.configs.onyxbot_configs import (
+    DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS,
+)
+from onyx.onyxbot.slack.utils import respond_in_thread_or_channel
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Upper bound on a single blocking wait, so waiters regularly refresh their liveness
+# and notice when the waiter ahead of them went away without leaving the queue
+_MAX_BLOCK_SECONDS = 5.0
+# A waiter that hasn't checked in for this long is dropped from the queue
+_WAITER_TTL_SECONDS = 3 * int(_MAX_BLOCK_SECONDS)
+
+slack_bot_rate_limit_queue_depth = Gauge(
+    "slack_bot_rate_limit_queue_depth",
+    "Number of questions waiting for a rate limit slot",
+    ["tenant_id", "slack_bot_id"],
+)
+slack_bot_rate_limit_wait_seconds = Histogram(
+    "slack_bot_rate_limit_wait_seconds",
+    "Time questions spent waiting for a rate limit slot",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+slack_bot_rate_limit_rejections = Counter(
+    "slack_bot_rate_limit_rejections",
+    "Number of Slack requests rejected by the rate limits",
+    ["reason"],
+)
+
+# KEYS: bucket, queue, ticket counter
+# ARGV: capacity, refill per ms, waiter id, key prefix, waiter ttl (s)
+# Returns {acquired, position in queue, ms until the next token, queue depth}
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local capacity = tonumber(ARGV[1])
+local refill_per_ms = tonumber(ARGV[2])
+local waiter_id = ARGV[3]
+local prefix = ARGV[4]
+local waiter_ttl = tonumber(ARGV[5])
+local bucket_ttl_ms = math.ceil(capacity / refill_per_ms) + 1000
+
+-- drop waiters at the head of the queue that went away without leaving it
+while true do
+    local head = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+    if not head or head == waiter_id
+        or redis.call('EXISTS', prefix .. ':waiter:' .. head) == 1 then
+        break
+    end
+    redis.call('ZREM', KEYS[2], head)
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local last_refill = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - last_refill) * refill_per_ms)
+
+-- first come first served, only the head of the queue (or a new question when
+-- nobody is waiting) may take a token
+local rank = redis.call('ZRANK', KEYS[2], waiter_id)
+local is_next = rank == 0 or (not rank and redis.call('ZCARD', KEYS[2]) == 0)
+
+if is_next and tokens >= 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], bucket_ttl_ms)
+    if rank then
+        redis.call('ZREM', KEYS[2], waiter_id)
+        redis.call('DEL', prefix .. ':waiter:' .. waiter_id, prefix .. ':wake:' .. waiter_id)
+        local next_head = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+        if next_head then
+            redis.call('RPUSH', prefix .. ':wake:' .. next_head, 1)
+            redis.call('EXPIRE', prefix .. ':wake:' .. next_head, waiter_ttl)
+        end
+    end
+    return {1, 0, 0, redis.call('ZCARD', KEYS[2])}
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], bucket_ttl_ms)
+if not rank then
+    redis.call('ZADD', KEYS[2], redis.call('INCR', KEYS[3]), waiter_id)
+    rank = redis.call('ZRANK', KEYS[2], waiter_id)
+end
+redis.call('SET', prefix .. ':waiter:' .. waiter_id, 1, 'EX', waiter_ttl)
+redis.call('EXPIRE', KEYS[2], waiter_ttl)
+redis.call('EXPIRE', KEYS[3], waiter_ttl)
+
+local retry_after_ms = math.ceil((1 - tokens) / refill_per_ms)
+return {0, rank + 1, retry_after_ms, redis.call('ZCARD', KEYS[2])}
+"""
+
+# KEYS: queue
+# ARGV: waiter id, key prefix, waiter ttl (s)
+# Returns the queue depth
+_LEAVE_SCRIPT = """
+local waiter_id = ARGV[1]
+local prefix = ARGV[2]
+local was_head = redis.call('ZRANK', KEYS[1], waiter_id) == 0
+redis.call('ZREM', KEYS[1], waiter_id)
+redis.call('DEL', prefix .. ':waiter:' .. waiter_id, prefix .. ':wake:' .. waiter_id)
+if was_head then
+    local next_head = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+    if next_head then
+        redis.call('RPUSH', prefix .. ':wake:' .. next_head, 1)
+        redis.call('EXPIRE', prefix .. ':wake:' .. next_head, tonumber(ARGV[3]))
+    end
+end
+return redis.call('ZCARD', KEYS[1])
+"""
+
+# Sliding window counter, the count of the previous window is weighted by how much
+# of it still overlaps the sliding window.
+# KEYS: counter key prefix
+# ARGV: limit, period (s)
+# Returns 1 if the message is allowed, 0 otherwise
+_MESSAGE_LIMIT_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local window = math.floor(now / period)
+
+local current_key = KEYS[1] .. ':' .. string.format('%d', window)
+local previous_key = KEYS[1] .. ':' .. string.format('%d', window - 1)
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', previous_key) or '0')
+
+local elapsed = (now - window * period) / period
+if previous * (1 - elapsed) + current + 1 > limit then
+    return 0
+end
+
+redis.call('INCR', current_key)
+redis.call('EXPIRE', current_key, period * 2)
+return 1
+"""
+
+
+def _key_prefix(tenant_id: str, slack_bot_id: int) -> str:
+    return f"slack_bot_rate_limit:{tenant_id}:{slack_bot_id}"
+
+
+class SlackRateLimiter:
+    def __init__(
+        self,
+        tenant_id: str,
+        slack_bot_id: int,
+        redis_client: Redis | None = None,
+    ) -> None:
+        self.tenant_id = tenant_id
+        self.slack_bot_id = slack_bot_id
+        self.max_qpm: int | None = DANSWER_BOT_MAX_QPM
+        self.max_wait_time = DANSWER_BOT_MAX_WAIT_TIME
+
+        self._redis = redis_client or get_raw_redis_client()
+        self._prefix = _key_prefix(tenant_id, slack_bot_id)
+        self._acquire_script = self._redis.register_script(_ACQUIRE_SCRIPT)
+        self._leave_script = self._redis.register_script(_LEAVE_SCRIPT)
+        self._queue_depth = slack_bot_rate_limit_queue_depth.labels(
+            tenant_id=tenant_id, slack_bot_id=str(slack_bot_id)
+        )
+
+    def notify(
+        self, client: WebClient, channel: str, position: int, thread_ts: str | None
+    ) -> None:
+        respond_in_thread_or_channel(
+            client=client,
+            channel=channel,
+            receiver_ids=None,
+            text=f"Your question has been queued. You are in position {position}.\n"
+            f"Please wait a moment :hourglass_flowing_sand:",
+            thread_ts=thread_ts,
+        )
+
+    def get_queue_depth(self) -> int:
+        return int(self._redis.zcard(f"{self._prefix}:queue"))
+
+    def _try_acquire(self, waiter_id: str) -> tuple[bool, int, float]:
+        """Returns whether a slot was acquired, otherwise the position in the queue
+        and the seconds until the next slot frees up."""
+        assert self.max_qpm is not None
+        acquired, position, retry_after_ms, queue_depth = self._acquire_script(
+            keys=[
+                f"{self._prefix}:bucket",
+                f"{self._prefix}:queue",
+                f"{self._prefix}:ticket",
+            ],
+            args=[
+                self.max_qpm,
+                self.max_qpm / 60_000,
+                waiter_id,
+                self._prefix,
+                _WAITER_TTL_SECONDS,
+            ],
+        )
+        self._queue_depth.set(queue_depth)
+        return bool(acquired), int(position), int(retry_after_ms) / 1000
+
+    def _leave(self, waiter_id: str) -> None:
+        queue_depth = self._leave_script(
+            keys=[f"{self._prefix}:queue"],
+            args=[waiter_id, self._prefix, _WAITER_TTL_SECONDS],
+        )
+        self._queue_depth.set(queue_depth)
+
+    def acquire(self, client: WebClient, channel: str, thread_ts: str | None) -> None:
+        """Blocks until the question may be answered. If it has to wait, the user is
+        told their position in the queue. Raises TimeoutError after waiting for
+        longer than DANSWER_BOT_MAX_WAIT_TIME."""
+        if self.max_qpm is None:
+            return
+
+        waiter_id = uuid.uuid4().hex
+        try:
+            acquired, position, retry_after = self._try_acquire(waiter_id)
+        except RedisError:
+            logger.exception("Failed to check the OnyxBot rate limit, not limiting")
+            return
+        if acquired:
+            return
+
+        self.notify(client, channel, position, thread_ts)
+
+        start = time.monotonic()
+        wake_key = f"{self._prefix}:wake:{waiter_id}"
+        try:
+            while not acquired:
+                remaining = self.max_wait_time - (time.monotonic() - start)
+                if remaining <= 0:
+                    slack_bot_rate_limit_rejections.labels(reason="timeout").inc()
+                    raise TimeoutError
+
+                # the waiter ahead of us wakes us up when it gets through, the head
+                # of the queue only has to wait for the next token
+                block = min(remaining, _MAX_BLOCK_SECONDS)
+                if position == 1:
+                    block = min(block, retry_after)
+                self._redis.blpop([wake_key], timeout=max(block, 0.01))
+
+                acquired, position, retry_after = self._try_acquire(waiter_id)
+        except RedisError:
+            logger.exception("Failed to wait for the OnyxBot rate limit, not limiting")
+            acquired = True
+        finally:
+            if not acquired:
+                try:
+                    self._leave(waiter_id)
+                except RedisError:
+                    logger.exception("Failed to leave the OnyxBot rate limit queue")
+
+        slack_bot_rate_limit_wait_seconds.observe(time.monotonic() - start)
+
+
+def check_message_limit(
+    tenant_id: str, slack_bot_id: int, redis_client: Redis | None = None
+) -> bool:
+    """Whether OnyxBot may send another response, counted across all listener pods
+    for the tenant's bot."""
+    if DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD == 0:
+        return True
+
+    redis_client = redis_client or get_raw_redis_client()
+    try:
+        allowed = redis_client.register_script(_MESSAGE_LIMIT_SCRIPT)(
+            keys=[f"{_key_prefix(tenant_id, slack_bot_id)}:messages"],
+            args=[
+                DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD,
+                DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS,
+            ],
+        )
+    except RedisError:
+        logger.exception("Failed to check the OnyxBot message limit, not limiting")
+        return True
+
+    if not allowed:
+        slack_bot_rate_limit_rejections.labels(reason="message_limit").inc()
+        logger.error(
+            f"OnyxBot has reached the message limit {DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD}"
+            f" for the time period {DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS} seconds."
+            " These limits are configurable in backend/onyx/configs/onyxbot_configs.py"
+        )
+        return False
+    return True
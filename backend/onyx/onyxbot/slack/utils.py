@@ -2,7 +2,6 @@ import logging
 import random
 import re
 import string
-import time
 import uuid
 from collections.abc import Generator
 from contextlib import contextmanager
@@ -21,15 +20,7 @@ from onyx.configs.app_configs import DISABLE_TELEMETRY
 from onyx.configs.constants import ID_SEPARATOR
 from onyx.configs.constants import MessageType
 from onyx.configs.onyxbot_configs import DANSWER_BOT_FEEDBACK_VISIBILITY
-from onyx.configs.onyxbot_configs import DANSWER_BOT_MAX_QPM
-from onyx.configs.onyxbot_configs import DANSWER_BOT_MAX_WAIT_TIME
 from onyx.configs.onyxbot_configs import DANSWER_BOT_NUM_RETRIES
-from onyx.configs.onyxbot_configs import (
-    DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD,
-)
-from onyx.configs.onyxbot_configs import (
-    DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS,
-)
 from onyx.connectors.slack.utils import SlackTextCleaner
 from onyx.db.engine import get_session_with_current_tenant
 from onyx.db.users import get_user_by_email
@@ -50,8 +41,6 @@ logger = setup_logger()
 
 
 _DANSWER_BOT_SLACK_BOT_ID: str | None = None
-_DANSWER_BOT_MESSAGE_COUNT: int = 0
-_DANSWER_BOT_COUNT_START_TIME: float = time.time()
 
 
 def get_onyx_bot_slack_bot_id(web_client: WebClient) -> Any:
@@ -61,31 +50,6 @@ def get_onyx_bot_slack_bot_id(web_client: WebClient) -> Any:
     return _DANSWER_BOT_SLACK_BOT_ID
 
 
-def check_message_limit() -> bool:
-    """
-    This isnt a perfect solution.
-    High traffic at the end of one period and start of another could cause
-    the limit to be exceeded.
-    """
-    if DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD == 0:
-        return True
-    global _DANSWER_BOT_MESSAGE_COUNT
-    global _DANSWER_BOT_COUNT_START_TIME
-    time_since_start = time.time() - _DANSWER_BOT_COUNT_START_TIME
-    if time_since_start > DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS:
-        _DANSWER_BOT_MESSAGE_COUNT = 0
-        _DANSWER_BOT_COUNT_START_TIME = time.time()
-    if (_DANSWER_BOT_MESSAGE_COUNT + 1) > DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD:
-        logger.error(
-            f"OnyxBot has reached the message limit {DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD}"
-            f" for the time period {DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS} seconds."
-            " These limits are configurable in backend/onyx/configs/onyxbot_configs.py"
-        )
-        return False
-    _DANSWER_BOT_MESSAGE_COUNT += 1
-    return True
-
-
 def rephrase_slack_message(msg: str) -> str:
     def _get_rephrase_message() -> list[dict[str, str]]:
         messages = [
@@ -603,67 +567,6 @@ def slack_usage_report(action: str, sender_id: str | None, client: WebClient) ->
     )
 
 
-class SlackRateLimiter:
-    def __init__(self) -> None:
-        self.max_qpm: int | None = DANSWER_BOT_MAX_QPM
-        self.max_wait_time = DANSWER_BOT_MAX_WAIT_TIME
-        self.active_question = 0
-        self.last_reset_time = time.time()
-        self.waiting_questions: list[int] = []
-
-    def refill(self) -> None:
-        # If elapsed time is greater than the period, reset the active question count
-        if (time.time() - self.last_reset_time) > 60:
-            self.active_question = 0
-            self.last_reset_time = time.time()
-
-    def notify(
-        self, client: WebClient, channel: str, position: int, thread_ts: str | None
-    ) -> None:
-        respond_in_thread_or_channel(
-            client=client,
-            channel=channel,
-            receiver_ids=None,
-            text=f"Your question has been queued. You are in position {position}.\n"
-            f"Please wait a moment :hourglass_flowing_sand:",
-            thread_ts=thread_ts,
-        )
-
-    def is_available(self) -> bool:
-        if self.max_qpm is None:
-            return True
-
-        self.refill()
-        return self.active_question < self.max_qpm
-
-    def acquire_slot(self) -> None:
-        self.active_question += 1
-
-    def init_waiter(self) -> tuple[int, int]:
-        func_randid = random.getrandbits(128)
-        self.waiting_questions.append(func_randid)
-        position = self.waiting_questions.index(func_randid) + 1
-
-        return func_randid, position
-
-    def waiter(self, func_randid: int) -> None:
-        if self.max_qpm is None:
-            return
-
-        wait_time = 0
-        while (
-            self.active_question >= self.max_qpm
-            or self.waiting_questions[0] != func_randid
-        ):
-            if wait_time > self.max_wait_time:
-                raise TimeoutError
-            time.sleep(2)
-            wait_time += 2
-            self.refill()
-
-        del self.waiting_questions[0]
-
-
 def get_feedback_visibility() -> FeedbackVisibility:
     try:
         return FeedbackVisibility(DANSWER_BOT_FEEDBACK_VISIBILITY.lower())
@@ -9,6 +9,7 @@ from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
@@ -85,22 +86,9 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
         )
 
         num_docs = 0
+        doc_id_batch: list[str] = []
 
-        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-            doc_id = cast(str, doc_id)
-            current_time = time.monotonic()
-            if current_time - last_lock_time >= (
-                CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
-            ):
-                lock.reacquire()
-                last_lock_time = current_time
-
-            num_docs += 1
-
-            # check if we should skip the document (typically because it's already syncing)
-            if doc_id in self.skip_docs:
-                continue
-
+        def send_batch() -> None:
             # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
             # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
             # we prefix the task id so it's easier to keep track of who created the task
@@ -115,20 +103,45 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
 
             # Priority on sync's triggered by new indexing should be medium
             celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
+                OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+                kwargs=dict(document_ids=doc_id_batch, tenant_id=tenant_id),
                 queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
                 task_id=custom_task_id,
                 priority=OnyxCeleryPriority.MEDIUM,
                 ignore_result=True,
             )
 
-            num_tasks_sent += 1
+        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
+            doc_id = cast(str, doc_id)
+            current_time = time.monotonic()
+            if current_time - last_lock_time >= (
+                CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
+            ):
+                lock.reacquire()
+                last_lock_time = current_time
+
+            num_docs += 1
+
+            # check if we should skip the document (typically because it's already syncing)
+            if doc_id in self.skip_docs:
+                continue
+
+            doc_id_batch.append(doc_id)
             self.skip_docs.add(doc_id)
+            if len(doc_id_batch) < VESPA_SYNC_BATCH_SIZE:
+                continue
+
+            send_batch()
+            doc_id_batch = []
+            num_tasks_sent += 1
 
             if num_tasks_sent >= max_tasks:
                 break
 
+        if doc_id_batch:
+            send_batch()
+            num_tasks_sent += 1
+
         return num_tasks_sent, num_docs
 
 
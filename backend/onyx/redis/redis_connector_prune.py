@@ -1,4 +1,5 @@
 import time
+from collections.abc import Iterable
 from datetime import datetime
 from typing import cast
 from uuid import uuid4
@@ -46,6 +47,16 @@ class RedisConnectorPrune:
     TASKSET_PREFIX = f"{PREFIX}_taskset"  # connectorpruning_taskset
     SUBTASK_PREFIX = f"{PREFIX}+sub"  # connectorpruning+sub
 
+    # document ids of the source, for streaming pruning
+    SOURCE_DOC_IDS_PREFIX = (
+        f"{PREFIX}_source_doc_ids"  # connectorpruning_source_doc_ids
+    )
+    SOURCE_DOC_IDS_TTL = CELERY_PRUNING_LOCK_TIMEOUT * 2
+    # added to the set once all ids of the source are in it. Kept in the set itself so
+    # that a set that expired or was deleted can't be mistaken for an empty source.
+    # Postgres text can't hold NUL, so no document id can collide with it
+    SOURCE_DOC_IDS_COMPLETE = "\x00complete"
+
     # used to signal the overall workflow is still active
     # it's impossible to get the exact state of the system at a single point in time
     # so we need a signal with a TTL to bridge gaps in our checks
@@ -63,6 +74,7 @@ class RedisConnectorPrune:
         self.generator_complete_key = f"{self.GENERATOR_COMPLETE_PREFIX}_{id}"
 
         self.taskset_key = f"{self.TASKSET_PREFIX}_{id}"
+        self.source_doc_ids_key = f"{self.SOURCE_DOC_IDS_PREFIX}_{id}"
 
         self.subtask_prefix: str = f"{self.SUBTASK_PREFIX}_{id}"
         self.active_key = f"{self.ACTIVE_PREFIX}_{id}"
@@ -156,16 +168,55 @@ class RedisConnectorPrune:
 
         self.redis.set(self.generator_complete_key, payload)
 
+    def source_doc_ids_add(self, doc_ids: set[str]) -> None:
+        if not doc_ids:
+            return
+
+        self.redis.sadd(self.source_doc_ids_key, *doc_ids)
+        # refreshed as long as the ids are being used
+        self.redis.expire(self.source_doc_ids_key, self.SOURCE_DOC_IDS_TTL)
+
+    def source_doc_ids_set_complete(self) -> None:
+        self.redis.sadd(self.source_doc_ids_key, self.SOURCE_DOC_IDS_COMPLETE)
+        self.redis.expire(self.source_doc_ids_key, self.SOURCE_DOC_IDS_TTL)
+
+    def source_doc_ids_missing(self, doc_ids: list[str]) -> list[str]:
+        """Returns the ids that aren't document ids of the source, in order.
+
+        Raises if the source's ids aren't all there (anymore), instead of reporting
+        every id as missing."""
+        if not doc_ids:
+            return []
+
+        complete, *is_member = cast(
+            list[int],
+            self.redis.smismember(
+                self.source_doc_ids_key, [self.SOURCE_DOC_IDS_COMPLETE, *doc_ids]
+            ),
+        )
+        if not complete:
+            raise RuntimeError(
+                f"Source document ids of the prune are incomplete or gone: "
+                f"key={self.source_doc_ids_key}"
+            )
+
+        self.redis.expire(self.source_doc_ids_key, self.SOURCE_DOC_IDS_TTL)
+        return [doc_id for doc_id, found in zip(doc_ids, is_member) if not found]
+
+    def source_doc_ids_clear(self) -> None:
+        self.redis.delete(self.source_doc_ids_key)
+
     def generate_tasks(
         self,
-        documents_to_prune: set[str],
+        documents_to_prune: Iterable[str],
         celery_app: Celery,
         db_session: Session,
         lock: RedisLock | None,
     ) -> int | None:
         last_lock_time = time.monotonic()
 
-        async_results = []
+        # only counted, documents_to_prune may be streamed
+        tasks_generated = 0
         cc_pair = get_connector_credential_pair_from_id(
             db_session=db_session,
             cc_pair_id=int(self.id),
@@ -191,7 +242,7 @@ class RedisConnectorPrune:
             self.redis.sadd(self.taskset_key, custom_task_id)
 
             # Priority on sync's triggered by new indexing should be medium
-            result = celery_app.send_task(
+            celery_app.send_task(
                 OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
                 kwargs=dict(
                     document_id=doc_id,
@@ -205,9 +256,9 @@ class RedisConnectorPrune:
                 ignore_result=True,
             )
 
-            async_results.append(result)
+            tasks_generated += 1
 
-        return len(async_results)
+        return tasks_generated
 
     def reset(self) -> None:
         self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
@@ -215,6 +266,7 @@ class RedisConnectorPrune:
         self.redis.delete(self.generator_progress_key)
         self.redis.delete(self.generator_complete_key)
         self.redis.delete(self.taskset_key)
+        self.redis.delete(self.source_doc_ids_key)
         self.redis.delete(self.fence_key)
 
     @staticmethod
@@ -232,6 +284,9 @@ class RedisConnectorPrune:
         for key in r.scan_iter(RedisConnectorPrune.TASKSET_PREFIX + "*"):
             r.delete(key)
 
+        for key in r.scan_iter(RedisConnectorPrune.SOURCE_DOC_IDS_PREFIX + "*"):
+            r.delete(key)
+
         for key in r.scan_iter(RedisConnectorPrune.GENERATOR_COMPLETE_PREFIX + "*"):
             r.delete(key)
 
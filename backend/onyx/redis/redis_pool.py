@@ -118,6 +118,7 @@ class TenantRedis(redis.Redis):
             "startswith",
             "smembers",
             "sismember",
+            "smismember",
             "sadd",
             "srem",
             "scard",
@@ -126,6 +127,7 @@ class TenantRedis(redis.Redis):
             "hdel",
             "ttl",
             "pttl",
+            "expire",
         ]  # Regular methods that need simple prefixing
 
         if item == "scan_iter" or item == "sscan_iter":
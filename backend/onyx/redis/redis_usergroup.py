@@ -9,12 +9,14 @@ from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.redis.redis_object_helper import RedisObjectHelper
+from onyx.utils.batching import batch_generator
 from onyx.utils.variable_functionality import fetch_versioned_implementation
 from onyx.utils.variable_functionality import global_version
 
@@ -79,8 +81,11 @@ class RedisUserGroup(RedisObjectHelper):
             return 0, 0
 
         stmt = construct_document_id_select_by_usergroup(int(self._id))
-        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-            doc_id = cast(str, doc_id)
+        doc_ids = (
+            cast(str, doc_id)
+            for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT)
+        )
+        for doc_id_batch in batch_generator(doc_ids, VESPA_SYNC_BATCH_SIZE):
             current_time = time.monotonic()
             if current_time - last_lock_time >= (
                 CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
@@ -97,9 +102,10 @@ class RedisUserGroup(RedisObjectHelper):
             # add to the set BEFORE creating the task.
             redis_client.sadd(self.taskset_key, custom_task_id)
 
+            # each task syncs a batch of documents
             celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
+                OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+                kwargs=dict(document_ids=doc_id_batch, tenant_id=tenant_id),
                 queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
                 task_id=custom_task_id,
                 priority=OnyxCeleryPriority.LOW,
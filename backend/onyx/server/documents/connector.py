@@ -2,7 +2,6 @@ import mimetypes
 import os
 import uuid
 import zipfile
-from io import BytesIO
 from typing import cast
 
 from fastapi import APIRouter
@@ -414,7 +413,6 @@ def upload_files(files: list[UploadFile], db_session: Session) -> FileUploadResp
                         if not should_process_file(file_info):
                             continue
 
-                        sub_file_bytes = zf.read(file_info)
                         sub_file_name = os.path.join(str(uuid.uuid4()), file_info)
                         deduped_file_paths.append(sub_file_name)
 
@@ -422,13 +420,15 @@ def upload_files(files: list[UploadFile], db_session: Session) -> FileUploadResp
                         if mime_type is None:
                             mime_type = "application/octet-stream"
 
-                        file_store.save_file(
-                            file_name=sub_file_name,
-                            content=BytesIO(sub_file_bytes),
-                            display_name=os.path.basename(file_info),
-                            file_origin=FileOrigin.CONNECTOR,
-                            file_type=mime_type,
-                        )
+                        # decompressed and saved chunk by chunk
+                        with zf.open(file_info) as sub_file:
+                            file_store.save_file(
+                                file_name=sub_file_name,
+                                content=sub_file,
+                                display_name=os.path.basename(file_info),
+                                file_origin=FileOrigin.CONNECTOR,
+                                file_type=mime_type,
+                            )
                 continue
 
             # Special handling for docx files - only store the plaintext version
@@ -26,6 +26,7 @@ from onyx.llm.llm_provider_options import WellKnownLLMProviderDescriptor
 from onyx.llm.utils import get_llm_contextual_cost
 from onyx.llm.utils import litellm_exception_to_error_msg
 from onyx.llm.utils import model_supports_image_input
+from onyx.llm.utils import refresh_model_map
 from onyx.llm.utils import test_llm
 from onyx.server.manage.llm.models import LLMCost
 from onyx.server.manage.llm.models import LLMProviderDescriptor
@@ -207,7 +208,7 @@ def put_llm_provider(
         llm_provider.api_key = existing_provider.api_key
 
     try:
-        return upsert_llm_provider(
+        upserted_provider = upsert_llm_provider(
             llm_provider=llm_provider,
             db_session=db_session,
         )
@@ -215,6 +216,9 @@ def put_llm_provider(
         logger.exception("Failed to upsert LLM Provider")
         raise HTTPException(status_code=400, detail=str(e))
 
+    refresh_model_map()
+    return upserted_provider
+
 
 @admin_router.delete("/provider/{provider_id}")
 def delete_llm_provider(
@@ -223,6 +227,7 @@ def delete_llm_provider(
     db_session: Session = Depends(get_session),
 ) -> None:
     remove_llm_provider(db_session, provider_id)
+    refresh_model_map()
 
 
 @admin_router.post("/provider/{provider_id}/default")
@@ -0,0 +1,134 @@
+"""
+Benchmark for Chunker.chunk over a corpus of synthetic long documents.
+
+The documents mix many short sections (where the chunker keeps joining sections into
+the chunk being built), some sections longer than a chunk and a few empty ones.
+
+Each corpus is chunked twice: once as usual and once with the running token counts
+turned off, so that the chunk text is re-counted every time a section is added. The
+two outputs must be identical, the timings show what the running counts save for the
+tokenizer in use (tokenizers that can merge tokens across whitespace, e.g. tiktoken,
+always re-count).
+
+python scripts/chunking_benchmark.py --num-docs 50 --sections-per-doc 2000
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import IndexingDocument
+from onyx.connectors.models import Section
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.models import DocAwareChunk
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+
+_WORDS = (
+    "the a revenue growth report shows that in quarter customers team pipeline "
+    "deployment latency regression Q3 2024 e.g. API v2 naïve résumé 東京"
+).split()
+
+
+def _synthetic_text(rng: random.Random, num_words: int) -> str:
+    words = []
+    for _ in range(num_words):
+        words.append(rng.choice(_WORDS))
+        if rng.random() < 0.08:
+            words[-1] += "."
+    return " ".join(words)
+
+
+def _synthetic_document(
+    rng: random.Random, doc_num: int, sections_per_doc: int
+) -> IndexingDocument:
+    sections: list[Section] = []
+    for section_num in range(sections_per_doc):
+        roll = rng.random()
+        if roll < 0.02:
+            text = ""
+        elif roll < 0.05:
+            text = _synthetic_text(rng, rng.randint(400, 1500))
+        else:
+            text = _synthetic_text(rng, rng.randint(3, 40))
+        sections.append(
+            Section(text=text, link=f"https://example.com/{doc_num}#{section_num}")
+        )
+
+    return IndexingDocument(
+        id=f"doc_{doc_num}",
+        source=DocumentSource.FILE,
+        semantic_identifier=f"Synthetic document {doc_num}",
+        title=f"Synthetic document {doc_num}",
+        metadata={"tags": ["synthetic", "benchmark"]},
+        sections=[],
+        processed_sections=sections,
+    )
+
+
+def _run(
+    tokenizer: BaseTokenizer, documents: list[IndexingDocument]
+) -> tuple[float, list[DocAwareChunk]]:
+    chunker = Chunker(tokenizer=tokenizer)
+    start = time.perf_counter()
+    chunks = chunker.chunk(documents)
+    return time.perf_counter() - start, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-docs", type=int, default=20)
+    parser.add_argument("--sections-per-doc", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--model-name", default=None, help="embedding model to take the tokenizer of"
+    )
+    parser.add_argument("--provider-type", default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = [
+        _synthetic_document(rng, doc_num, args.sections_per_doc)
+        for doc_num in range(args.num_docs)
+    ]
+    num_sections = args.num_docs * args.sections_per_doc
+
+    tokenizer = get_tokenizer(args.model_name, args.provider_type)
+    recounting_tokenizer = copy.copy(tokenizer)
+    recounting_tokenizer.whitespace_joins_are_additive = False
+
+    # warm up, the sentence splitter loads its models lazily
+    _run(tokenizer, documents[:1])
+
+    results: dict[str, tuple[float, list[DocAwareChunk]]] = {}
+    for name, run_tokenizer in [
+        ("recount", recounting_tokenizer),
+        ("running_counts", tokenizer),
+    ]:
+        runs = [_run(run_tokenizer, documents) for _ in range(args.repeat)]
+        best = min(seconds for seconds, _ in runs)
+        results[name] = (best, runs[0][1])
+        print(
+            f"mode={name} "
+            f"tokenizer={type(tokenizer).__name__} "
+            f"docs={len(documents)} "
+            f"sections={num_sections} "
+            f"chunks={len(runs[0][1])} "
+            f"total={best:.2f}s "
+            f"per_doc={best / len(documents) * 1000:.1f}ms "
+            f"per_section={best / num_sections * 1_000_000:.1f}us"
+        )
+
+    identical = [chunk.model_dump() for chunk in results["recount"][1]] == [
+        chunk.model_dump() for chunk in results["running_counts"][1]
+    ]
+    print(
+        f"identical_output={identical} "
+        f"speedup={results['recount'][0] / results['running_counts'][0]:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
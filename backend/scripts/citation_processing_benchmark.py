@@ -0,0 +1,128 @@
+"""
+Micro-benchmark for CitationProcessor.process_token.
+
+Replays token streams through the processor and reports the time per token. With the
+processor doing constant work per token, the per token time should stay flat as the
+answers get longer.
+
+By default a synthetic stream is used, modeled after real answers (prose with citations,
+a few code blocks, ~4 chars per token). Recorded streams can be passed in as JSON files
+containing a list of token strings, e.g. dumped from the chat streaming endpoint:
+
+python scripts/citation_processing_benchmark.py --tokens-file answer_tokens.json
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from onyx.chat.models import LlmDoc
+from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
+from onyx.configs.constants import DocumentSource
+
+NUM_DOCS = 10
+SYNTHETIC_STREAM_LENGTHS = [1_000, 5_000, 20_000]
+
+
+def _build_docs() -> list[LlmDoc]:
+    return [
+        LlmDoc(
+            document_id=f"doc_{i}",
+            content="Document content",
+            blurb=f"Document #{i}",
+            semantic_identifier=f"Doc {i}",
+            source_type=DocumentSource.WEB,
+            metadata={},
+            updated_at=datetime.now(),
+            link=f"https://example.com/{i}" if i % 2 == 0 else None,
+            source_links=None,
+            match_highlights=[],
+        )
+        for i in range(NUM_DOCS)
+    ]
+
+
+def _synthetic_stream(num_tokens: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    words = "the a revenue growth report shows that in quarter customers team".split()
+
+    text_parts: list[str] = []
+    while sum(len(part) for part in text_parts) < num_tokens * 4:
+        roll = rng.random()
+        if roll < 0.05:
+            text_parts.append("\n```\nprint('hello [1]')\nx = a[0]\n```\n")
+        elif roll < 0.25:
+            text_parts.append(f" [{rng.randint(1, NUM_DOCS)}]")
+        else:
+            text_parts.append(" " + " ".join(rng.choices(words, k=rng.randint(3, 12))))
+            text_parts.append(".")
+    text = "".join(text_parts)
+
+    # split into tokens of 1-6 chars, which is roughly what LLM streams look like
+    tokens: list[str] = []
+    position = 0
+    while position < len(text) and len(tokens) < num_tokens:
+        size = rng.randint(1, 6)
+        tokens.append(text[position : position + size])
+        position += size
+    return tokens
+
+
+def _run(tokens: list[str], docs: list[LlmDoc]) -> float:
+    doc_id_to_rank = DocumentIdOrderMapping(
+        order_mapping={doc.document_id: rank for rank, doc in enumerate(docs, 1)}
+    )
+    processor = CitationProcessor(
+        context_docs=docs,
+        final_doc_id_to_rank_map=doc_id_to_rank,
+        display_doc_id_to_rank_map=doc_id_to_rank,
+        stop_stream=None,
+    )
+
+    start = time.perf_counter()
+    for token in tokens:
+        for _ in processor.process_token(token):
+            pass
+    for _ in processor.process_token(None):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--tokens-file",
+        action="append",
+        default=[],
+        help="JSON file with a recorded list of tokens, can be passed multiple times",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    docs = _build_docs()
+
+    streams: list[tuple[str, list[str]]] = []
+    for tokens_file in args.tokens_file:
+        with open(tokens_file) as f:
+            streams.append((tokens_file, json.load(f)))
+    if not streams:
+        streams = [
+            (f"synthetic_{length}", _synthetic_stream(length))
+            for length in SYNTHETIC_STREAM_LENGTHS
+        ]
+
+    for name, tokens in streams:
+        best = min(_run(tokens, docs) for _ in range(args.repeat))
+        print(
+            f"stream={name} "
+            f"tokens={len(tokens)} "
+            f"total={best * 1000:.1f}ms "
+            f"per_token={best / max(len(tokens), 1) * 1_000_000:.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for building the hybrid search request sent to Vespa, comparing the
+query embedding as a list of numbers with the hex tensor form. Reports the time to
+build and serialize the request and the size of the request body.
+
+python scripts/vespa_query_embedding_benchmark.py --dim 1024 --iterations 2000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any
+from unittest.mock import patch
+
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.vespa.index import VespaIndex
+
+
+def _build_request(index: VespaIndex, query_embedding: list[float]) -> str:
+    captured: dict[str, Any] = {}
+
+    def _capture(query_params: dict[str, Any]) -> list:
+        captured.update(query_params)
+        return []
+
+    with patch("onyx.document_index.vespa.index.query_vespa", _capture):
+        index.hybrid_retrieval(
+            query="how do I rotate my api keys",
+            query_embedding=query_embedding,
+            final_keywords=None,
+            filters=IndexFilters(access_control_list=None),
+            hybrid_alpha=0.5,
+            time_decay_multiplier=1.0,
+            num_to_retrieve=50,
+        )
+    # httpx serializes the body the same way
+    return json.dumps(captured)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    index = VespaIndex(
+        index_name="benchmark_index",
+        secondary_index_name=None,
+        large_chunks_enabled=False,
+        secondary_large_chunks_enabled=None,
+    )
+    # normalized model outputs, the worst case for the list form's length
+    query_embedding = [random.uniform(-0.1, 0.1) for _ in range(args.dim)]
+
+    results: dict[str, float] = {}
+    for encoding, hex_embeddings in [("list", False), ("hex", True)]:
+        with patch(
+            "onyx.document_index.vespa.index.VESPA_HEX_QUERY_EMBEDDINGS",
+            hex_embeddings,
+        ):
+            body = _build_request(index, query_embedding)
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                _build_request(index, query_embedding)
+            elapsed = time.perf_counter() - start
+
+        results[encoding] = elapsed / args.iterations
+        print(
+            f"encoding={encoding} "
+            f"dim={args.dim} "
+            f"build_time={results[encoding] * 1_000_000:.1f}us "
+            f"body_size={len(body.encode())}B"
+        )
+
+    print(f"speedup={results['list'] / results['hex']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark for VespaIndex.update_single, the per document update used by the document
+sync and cleanup tasks, against a local stand-in for Vespa's document API.
+
+The stand-in accepts every chunk update after a fixed delay, so the numbers show how
+the number of chunks per document turns into sync latency. Each document is synced
+once with one update in flight at a time (how every chunk used to be updated) and once
+with the chunks updated concurrently. The stand-in speaks HTTP/1.1 and runs in its own
+process, so the concurrent updates use a pool of keep-alive connections instead of
+multiplexing over one HTTP/2 connection and don't compete with it for the GIL.
+
+python scripts/vespa_update_benchmark.py --num-docs 20 --chunks-per-doc 300
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.vespa.index import VespaIndex
+from onyx.document_index.vespa_constants import NUM_THREADS
+
+
+def _serve_vespa_stand_in(
+    latency_seconds: float, port_queue: "multiprocessing.Queue[int]"
+) -> None:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # otherwise delayed ACKs add ~40ms to every keep-alive request
+        disable_nagle_algorithm = True
+
+        def do_PUT(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_seconds)
+            body = b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _sync_documents(
+    index: VespaIndex, num_docs: int, chunks_per_doc: int
+) -> list[float]:
+    fields = VespaDocumentFields(document_sets={"set_a", "set_b"}, boost=1)
+    latencies = []
+    for doc_num in range(num_docs):
+        start = time.perf_counter()
+        chunks_affected = index.update_single(
+            f"benchmark_doc_{doc_num}",
+            chunk_count=chunks_per_doc,
+            tenant_id="public",
+            fields=fields,
+            user_fields=None,
+        )
+        latencies.append(time.perf_counter() - start)
+        assert chunks_affected == chunks_per_doc
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-docs", type=int, default=10)
+    parser.add_argument("--chunks-per-doc", type=int, default=300)
+    parser.add_argument(
+        "--latency-ms", type=float, default=5.0, help="stand-in time per chunk update"
+    )
+    args = parser.parse_args()
+
+    port_queue: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=_serve_vespa_stand_in,
+        args=(args.latency_ms / 1000, port_queue),
+        daemon=True,
+    )
+    server.start()
+    document_endpoint = (
+        f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+        "/document/v1/default/{index_name}/docid"
+    )
+
+    results: dict[str, float] = {}
+    for mode, num_threads in [("sequential", 1), ("concurrent", NUM_THREADS)]:
+        with (
+            httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=NUM_THREADS)
+            ) as http_client,
+            patch(
+                "onyx.document_index.vespa.index.DOCUMENT_ID_ENDPOINT",
+                document_endpoint,
+            ),
+            patch("onyx.document_index.vespa.index.NUM_THREADS", num_threads),
+        ):
+            index = VespaIndex(
+                index_name="benchmark_index",
+                secondary_index_name=None,
+                large_chunks_enabled=False,
+                secondary_large_chunks_enabled=None,
+                httpx_client=http_client,
+            )
+            latencies = _sync_documents(index, args.num_docs, args.chunks_per_doc)
+
+        results[mode] = statistics.mean(latencies)
+        print(
+            f"mode={mode} "
+            f"docs={args.num_docs} "
+            f"chunks_per_doc={args.chunks_per_doc} "
+            f"mean_per_doc={statistics.mean(latencies) * 1000:.1f}ms "
+            f"p50_per_doc={statistics.median(latencies) * 1000:.1f}ms "
+            f"max_per_doc={max(latencies) * 1000:.1f}ms"
+        )
+
+    print(f"speedup={results['sequential'] / results['concurrent']:.2f}x")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
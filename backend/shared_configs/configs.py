@@ -82,6 +82,41 @@ OPENAI_EMBEDDING_TIMEOUT = int(
     os.environ.get("OPENAI_EMBEDDING_TIMEOUT", API_BASED_EMBEDDING_TIMEOUT)
 )
 
+# Embeddings are returned from the model server as raw little-endian floats rather than
+# JSON when the client asks for it. Older model servers ignore the request and reply
+# with JSON, which is still understood by the client.
+MODEL_SERVER_BINARY_EMBEDDINGS = (
+    os.environ.get("MODEL_SERVER_BINARY_EMBEDDINGS", "true").lower() == "true"
+)
+# float32 is lossless w.r.t. the model output, float16 halves the payload again at
+# the cost of ~3 significant digits which is fine for normalized vectors
+MODEL_SERVER_EMBEDDING_WIRE_DTYPE = (
+    os.environ.get("MODEL_SERVER_EMBEDDING_WIRE_DTYPE") or "float32"
+).lower()
+
+# Cloud embedding clients (and their keep-alive connections) are pooled in the model
+# server, keyed by provider / api url / api version / api key
+CLOUD_EMBEDDING_CLIENT_POOL_SIZE = int(
+    os.environ.get("CLOUD_EMBEDDING_CLIENT_POOL_SIZE") or 32
+)
+# clients that haven't been used for this many seconds are closed
+CLOUD_EMBEDDING_CLIENT_IDLE_TIMEOUT = float(
+    os.environ.get("CLOUD_EMBEDDING_CLIENT_IDLE_TIMEOUT") or 300
+)
+
+# Concurrent requests for the same local embedding / reranking model are merged into a
+# single forward pass. A batch is started once MAX_SIZE texts are queued or the first
+# request has waited MAX_WAIT_MS, requests with MAX_SIZE or more texts run on their own.
+MODEL_SERVER_MICRO_BATCHING_ENABLED = (
+    os.environ.get("MODEL_SERVER_MICRO_BATCHING_ENABLED", "true").lower() == "true"
+)
+MODEL_SERVER_MICRO_BATCH_MAX_SIZE = int(
+    os.environ.get("MODEL_SERVER_MICRO_BATCH_MAX_SIZE") or 64
+)
+MODEL_SERVER_MICRO_BATCH_MAX_WAIT_MS = float(
+    os.environ.get("MODEL_SERVER_MICRO_BATCH_MAX_WAIT_MS") or 5
+)
+
 # Whether or not to strictly enforce token limit for chunking.
 STRICT_CHUNK_TOKEN_LIMIT = (
     os.environ.get("STRICT_CHUNK_TOKEN_LIMIT", "").lower() == "true"
@@ -1,11 +1,67 @@
+from collections.abc import Sequence
 from typing import TypeVar
 
+import numpy as np
+
 
 T = TypeVar("T")
 
+# Media type used when embeddings are sent as raw little-endian floats instead of JSON.
+# The vector shape and element type travel in the headers below.
+BINARY_EMBEDDING_MEDIA_TYPE = "application/x-onyx-embeddings"
+EMBEDDING_SHAPE_HEADER = "X-Onyx-Embedding-Shape"
+EMBEDDING_DTYPE_HEADER = "X-Onyx-Embedding-Dtype"
+
+_SUPPORTED_EMBEDDING_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
 
 def batch_list(
     lst: list[T],
     batch_size: int,
 ) -> list[list[T]]:
     return [lst[i : i + batch_size] for i in range(0, len(lst), batch_size)]
+
+
+def get_embedding_wire_dtype(dtype_name: str) -> np.dtype:
+    try:
+        return _SUPPORTED_EMBEDDING_DTYPES[dtype_name]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported embedding wire dtype '{dtype_name}', "
+            f"expected one of {list(_SUPPORTED_EMBEDDING_DTYPES)}"
+        )
+
+
+def encode_embeddings_binary(
+    embeddings: Sequence[Sequence[float]] | Sequence[np.ndarray] | np.ndarray,
+    dtype_name: str = "float32",
+) -> tuple[bytes, dict[str, str]]:
+    """Packs a batch of equal length embeddings into a contiguous buffer.
+
+    Returns the payload along with the headers needed to decode it on the other side."""
+    array = np.asarray(embeddings, dtype=get_embedding_wire_dtype(dtype_name))
+    if array.ndim != 2:
+        raise ValueError(f"Expected a 2D batch of embeddings, got shape {array.shape}")
+
+    headers = {
+        EMBEDDING_SHAPE_HEADER: f"{array.shape[0]},{array.shape[1]}",
+        EMBEDDING_DTYPE_HEADER: dtype_name,
+    }
+    return array.tobytes(), headers
+
+
+def decode_embeddings_binary(
+    payload: bytes, shape_header: str, dtype_name: str
+) -> np.ndarray:
+    """Inverse of encode_embeddings_binary. The returned array is a read-only view over
+    the payload, no copy is made."""
+    rows, dim = (int(part) for part in shape_header.split(","))
+    array = np.frombuffer(payload, dtype=get_embedding_wire_dtype(dtype_name))
+    if array.size != rows * dim:
+        raise ValueError(
+            f"Embedding payload has {array.size} values, expected {rows}x{dim}"
+        )
+    return array.reshape(rows, dim)
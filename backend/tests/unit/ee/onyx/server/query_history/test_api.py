@@ -0,0 +1,38 @@
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from ee.onyx.server.query_history.api import download_query_history_export
+from ee.onyx.server.query_history.api import get_query_history_export_status
+from ee.onyx.server.query_history.api import start_query_history_export
+from onyx.configs.constants import QueryHistoryType
+
+
+@pytest.mark.parametrize(
+    "endpoint,kwargs",
+    [
+        (start_query_history_export, {}),
+        (get_query_history_export_status, {"file_name": "export.csv"}),
+        (download_query_history_export, {"file_name": "export.csv"}),
+    ],
+)
+def test_export_endpoints_respect_disabled_query_history(
+    endpoint: Callable[..., Any], kwargs: dict[str, Any]
+) -> None:
+    db_session = MagicMock()
+    with (
+        patch(
+            "ee.onyx.server.query_history.api.ONYX_QUERY_HISTORY_TYPE",
+            QueryHistoryType.DISABLED,
+        ),
+        pytest.raises(HTTPException) as exc_info,
+    ):
+        endpoint(_=None, db_session=db_session, **kwargs)
+
+    assert exc_info.value.status_code == 403
+    db_session.assert_not_called()
+    assert not db_session.method_calls
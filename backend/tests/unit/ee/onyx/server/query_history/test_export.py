@@ -0,0 +1,136 @@
+import csv
+import io
+from collections.abc import Generator
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+from ee.onyx.server.query_history.export import fetch_chat_session_snapshots
+from ee.onyx.server.query_history.export import stream_query_history_csv
+from onyx.configs.constants import MessageType
+from onyx.db.models import ChatMessage
+from onyx.db.models import ChatSession
+
+_START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+_END = datetime(2025, 2, 1, tzinfo=timezone.utc)
+
+
+def _build_session(
+    message_contents: list[str],
+    first_message_id: int,
+) -> tuple[ChatSession, list[ChatMessage]]:
+    chat_session = ChatSession(
+        id=uuid4(),
+        description="test session",
+        persona_id=None,
+        onyxbot_flow=False,
+        time_created=_START,
+    )
+    root = ChatMessage(
+        id=first_message_id,
+        chat_session_id=chat_session.id,
+        message="",
+        message_type=MessageType.SYSTEM,
+        parent_message=None,
+        latest_child_message=first_message_id + 1,
+        time_sent=_START,
+    )
+    messages = [root]
+    for ind, content in enumerate(message_contents, 1):
+        message_id = first_message_id + ind
+        messages.append(
+            ChatMessage(
+                id=message_id,
+                chat_session_id=chat_session.id,
+                message=content,
+                message_type=MessageType.USER if ind % 2 else MessageType.ASSISTANT,
+                parent_message=message_id - 1,
+                latest_child_message=(
+                    message_id + 1 if ind < len(message_contents) else None
+                ),
+                time_sent=_START,
+            )
+        )
+    return chat_session, messages
+
+
+def _patch_queries(
+    pages: list[list[ChatSession]], messages: list[ChatMessage]
+) -> tuple[MagicMock, MagicMock]:
+    def fetch_pages(**kwargs: object) -> Generator[list[ChatSession], None, None]:
+        yield from pages
+
+    fetch_pages_mock = MagicMock(side_effect=fetch_pages)
+    # roots first, like the real query orders them
+    fetch_messages_mock = MagicMock(
+        return_value=sorted(messages, key=lambda m: m.parent_message is not None)
+    )
+    return fetch_pages_mock, fetch_messages_mock
+
+
+def test_snapshots_fetch_messages_once_per_page() -> None:
+    session_a, messages_a = _build_session(["q1", "a1", "q2", "a2"], 100)
+    session_b, messages_b = _build_session(["q3", "a3"], 200)
+    # no root message, its chain can't be built so it is skipped
+    broken_session, broken_messages = _build_session(["q4", "a4"], 300)
+    broken_messages = broken_messages[1:]
+
+    fetch_pages_mock, fetch_messages_mock = _patch_queries(
+        [[session_a, broken_session, session_b]],
+        messages_a + messages_b + broken_messages,
+    )
+    with (
+        patch(
+            "ee.onyx.server.query_history.export.fetch_chat_session_pages_by_time",
+            fetch_pages_mock,
+        ),
+        patch(
+            "ee.onyx.server.query_history.export.get_chat_messages_by_sessions",
+            fetch_messages_mock,
+        ),
+    ):
+        snapshots = list(
+            fetch_chat_session_snapshots(db_session=MagicMock(), start=_START, end=_END)
+        )
+
+    assert fetch_messages_mock.call_count == 1
+    assert [snapshot.id for snapshot in snapshots] == [session_a.id, session_b.id]
+    assert [message.message for message in snapshots[0].messages] == [
+        "q1",
+        "a1",
+        "q2",
+        "a2",
+    ]
+    assert [message.message for message in snapshots[1].messages] == ["q3", "a3"]
+
+
+def test_stream_query_history_csv() -> None:
+    session_a, messages_a = _build_session(["q1", "a1", "q2", "a2"], 100)
+    session_b, messages_b = _build_session(["q3", "a3"], 200)
+
+    fetch_pages_mock, fetch_messages_mock = _patch_queries(
+        [[session_a], [session_b]], messages_a + messages_b
+    )
+    with (
+        patch(
+            "ee.onyx.server.query_history.export.fetch_chat_session_pages_by_time",
+            fetch_pages_mock,
+        ),
+        patch(
+            "ee.onyx.server.query_history.export.get_chat_messages_by_sessions",
+            fetch_messages_mock,
+        ),
+    ):
+        csv_content = "".join(
+            stream_query_history_csv(db_session=MagicMock(), start=_START, end=_END)
+        )
+
+    rows = list(csv.DictReader(io.StringIO(csv_content)))
+    assert [(row["user_message"], row["ai_response"]) for row in rows] == [
+        ("q1", "a1"),
+        ("q2", "a2"),
+        ("q3", "a3"),
+    ]
+    assert [row["message_pair_num"] for row in rows] == ["1", "2", "1"]
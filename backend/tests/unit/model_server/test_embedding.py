@@ -1,23 +1,34 @@
 import asyncio
 import time
 from collections.abc import AsyncGenerator
+from collections.abc import Generator
 from typing import Any
 from typing import List
 from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
 
 from model_server.encoders import CloudEmbedding
+from model_server.encoders import CloudEmbeddingPool
 from model_server.encoders import embed_text
 from model_server.encoders import local_rerank
 from model_server.encoders import process_embed_request
+from model_server.encoders import router
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import EmbedRequest
+from shared_configs.utils import BINARY_EMBEDDING_MEDIA_TYPE
+from shared_configs.utils import decode_embeddings_binary
+from shared_configs.utils import EMBEDDING_DTYPE_HEADER
+from shared_configs.utils import EMBEDDING_SHAPE_HEADER
+from shared_configs.utils import encode_embeddings_binary
 
 
 @pytest.fixture
@@ -30,6 +41,21 @@ async def mock_http_client() -> AsyncGenerator[AsyncMock, None]:
             yield c
 
 
+@pytest.fixture
+def embed_client() -> Generator[TestClient, None, None]:
+    app = FastAPI()
+    app.include_router(router)
+    app.state.gpu_type = "none"
+
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.array(
+            [[0.1, 0.2, 0.3] for _ in texts], dtype=np.float32
+        )
+        mock_get_model.return_value = mock_model
+        yield TestClient(app)
+
+
 @pytest.fixture
 def sample_embeddings() -> List[List[float]]:
     return [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
@@ -50,6 +76,53 @@ async def test_cloud_embedding_explicit_close() -> None:
     assert embedding._closed
 
 
+@pytest.mark.asyncio
+async def test_cloud_embedding_pool_reuses_clients() -> None:
+    pool = CloudEmbeddingPool(max_size=2, idle_timeout=300)
+
+    async with pool.acquire("key-1", EmbeddingProvider.OPENAI) as first:
+        pass
+    async with pool.acquire("key-1", EmbeddingProvider.OPENAI) as second:
+        pass
+    async with pool.acquire("key-2", EmbeddingProvider.OPENAI) as other_key:
+        pass
+
+    assert first is second
+    assert other_key is not first
+    assert not first._closed
+    assert len(pool) == 2
+
+    # over max_size, the least recently used client is closed
+    async with pool.acquire("key-1", EmbeddingProvider.COHERE):
+        pass
+    assert len(pool) == 2
+    assert first._closed
+    assert not other_key._closed
+
+    await pool.aclose()
+    assert other_key._closed
+    assert len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_cloud_embedding_pool_idle_eviction() -> None:
+    pool = CloudEmbeddingPool(max_size=4, idle_timeout=0)
+
+    async with pool.acquire("key-1", EmbeddingProvider.OPENAI) as in_use:
+        # idle clients are evicted on the next acquire, but never while in use
+        async with pool.acquire("key-2", EmbeddingProvider.OPENAI) as idle:
+            pass
+        time.sleep(0.01)
+        async with pool.acquire("key-3", EmbeddingProvider.OPENAI):
+            pass
+
+        assert idle._closed
+        assert not in_use._closed
+
+    await pool.aclose()
+    assert in_use._closed
+
+
 @pytest.mark.asyncio
 async def test_openai_embedding(
     mock_http_client: AsyncMock, sample_embeddings: List[List[float]]
@@ -118,7 +191,8 @@ async def test_embed_text_local_model() -> None:
             reduced_dimension=None,
         )
 
-        assert result == [[0.1, 0.2], [0.3, 0.4]]
+        # local embeddings stay as arrays until they are serialized
+        assert np.allclose(np.asarray(result), [[0.1, 0.2], [0.3, 0.4]])
         mock_model.encode.assert_called_once()
 
 
@@ -165,9 +239,9 @@ async def test_rate_limit_handling() -> None:
 
 @pytest.mark.asyncio
 async def test_concurrent_embeddings() -> None:
-    def mock_encode(*args: Any, **kwargs: Any) -> List[List[float]]:
+    def mock_encode(texts: list[str], **kwargs: Any) -> List[List[float]]:
         time.sleep(5)
-        return [[0.1, 0.2, 0.3]]
+        return [[0.1, 0.2, 0.3] for _ in texts]
 
     test_req = EmbedRequest(
         texts=["test"],
@@ -200,3 +274,89 @@ async def test_concurrent_embeddings() -> None:
         # However, the developer may still introduce unnecessary blocking above the mock and this test will
         # still pass as long as it's less than (7 - 5) / 5 seconds
         assert end_time - start_time < 7
+
+
+def test_binary_embedding_round_trip(sample_embeddings: List[List[float]]) -> None:
+    payload, headers = encode_embeddings_binary(sample_embeddings, "float32")
+    assert len(payload) == 2 * 3 * 4
+
+    decoded = decode_embeddings_binary(
+        payload, headers[EMBEDDING_SHAPE_HEADER], headers[EMBEDDING_DTYPE_HEADER]
+    )
+    assert decoded.shape == (2, 3)
+    assert np.allclose(decoded, sample_embeddings)
+
+    with pytest.raises(ValueError):
+        decode_embeddings_binary(payload, "3,3", "float32")
+
+
+def test_binary_embedding_float16(sample_embeddings: List[List[float]]) -> None:
+    payload, headers = encode_embeddings_binary(sample_embeddings, "float16")
+    assert len(payload) == 2 * 3 * 2
+
+    decoded = decode_embeddings_binary(
+        payload, headers[EMBEDDING_SHAPE_HEADER], headers[EMBEDDING_DTYPE_HEADER]
+    )
+    assert np.allclose(decoded, sample_embeddings, atol=1e-3)
+
+
+_EMBED_REQUEST = EmbedRequest(
+    texts=["test1", "test2"],
+    model_name="fake-local-model",
+    deployment_name=None,
+    max_context_length=512,
+    normalize_embeddings=True,
+    api_key=None,
+    provider_type=None,
+    text_type=EmbedTextType.QUERY,
+    manual_query_prefix=None,
+    manual_passage_prefix=None,
+    api_url=None,
+    api_version=None,
+    reduced_dimension=None,
+).model_dump(mode="json")
+
+
+def test_embed_route_binary(embed_client: TestClient) -> None:
+    response = embed_client.post(
+        "/encoder/bi-encoder-embed",
+        json=_EMBED_REQUEST,
+        headers={
+            "Accept": f"{BINARY_EMBEDDING_MEDIA_TYPE}, application/json;q=0.9",
+            EMBEDDING_DTYPE_HEADER: "float16",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == BINARY_EMBEDDING_MEDIA_TYPE
+    assert response.headers[EMBEDDING_SHAPE_HEADER] == "2,3"
+    decoded = decode_embeddings_binary(
+        response.content,
+        response.headers[EMBEDDING_SHAPE_HEADER],
+        response.headers[EMBEDDING_DTYPE_HEADER],
+    )
+    assert decoded.dtype == np.float16
+    assert np.allclose(decoded, [[0.1, 0.2, 0.3], [0.1, 0.2, 0.3]], atol=1e-3)
+
+
+def test_embed_route_json_without_accept(embed_client: TestClient) -> None:
+    response = embed_client.post("/encoder/bi-encoder-embed", json=_EMBED_REQUEST)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert np.allclose(
+        response.json()["embeddings"], [[0.1, 0.2, 0.3], [0.1, 0.2, 0.3]]
+    )
+
+
+def test_embed_route_rejects_unsupported_dtype(embed_client: TestClient) -> None:
+    response = embed_client.post(
+        "/encoder/bi-encoder-embed",
+        json=_EMBED_REQUEST,
+        headers={
+            "Accept": BINARY_EMBEDDING_MEDIA_TYPE,
+            EMBEDDING_DTYPE_HEADER: "int8",
+        },
+    )
+
+    assert response.status_code == 400
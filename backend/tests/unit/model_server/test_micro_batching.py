@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from model_server.micro_batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch() -> None:
+    calls: list[list[str]] = []
+
+    def process_batch(items: list[str]) -> list[str]:
+        calls.append(items)
+        return [item.upper() for item in items]
+
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        name="test",
+        process_batch=process_batch,
+        max_batch_size=8,
+        max_wait_seconds=0.05,
+    )
+
+    results = await asyncio.gather(
+        batcher.submit(["a", "b"]),
+        batcher.submit(["c"]),
+        batcher.submit(["d", "e", "f"]),
+    )
+
+    assert results == [["A", "B"], ["C"], ["D", "E", "F"]]
+    assert calls == [["a", "b", "c", "d", "e", "f"]]
+    assert batcher.queue_depth == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_at_max_size() -> None:
+    calls: list[list[int]] = []
+
+    def process_batch(items: list[int]) -> list[int]:
+        calls.append(items)
+        return [item * 2 for item in items]
+
+    # the wait is long enough that only hitting the size cap can start the batches
+    batcher: MicroBatcher[int, int] = MicroBatcher(
+        name="test", process_batch=process_batch, max_batch_size=3, max_wait_seconds=10
+    )
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            batcher.submit([1, 2]),
+            batcher.submit([3]),
+            # at least max_batch_size items, runs on its own
+            batcher.submit([4, 5, 6, 7]),
+        ),
+        timeout=5,
+    )
+
+    assert results == [[2, 4], [6], [8, 10, 12, 14]]
+    assert sorted(calls) == [[1, 2, 3], [4, 5, 6, 7]]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_request() -> None:
+    def process_batch(items: list[str]) -> list[str]:
+        raise ValueError("forward pass failed")
+
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        name="test",
+        process_batch=process_batch,
+        max_batch_size=8,
+        max_wait_seconds=0.01,
+    )
+
+    results = await asyncio.gather(
+        batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
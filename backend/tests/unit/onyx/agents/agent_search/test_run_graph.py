@@ -0,0 +1,68 @@
+import time
+from collections.abc import Callable
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from langgraph.graph import StateGraph
+
+from onyx.agents.agent_search.run_graph import _COMPILED_GRAPHS
+from onyx.agents.agent_search.run_graph import _GRAPH_BUILDERS
+from onyx.agents.agent_search.run_graph import agent_graph_compile_seconds
+from onyx.agents.agent_search.run_graph import AgentGraph
+from onyx.agents.agent_search.run_graph import get_compiled_graph
+from onyx.agents.agent_search.run_graph import warm_up_compiled_graphs
+
+
+@pytest.fixture
+def builder_calls() -> Generator[dict[AgentGraph, int], None, None]:
+    """Counts the builds of every graph, starting from no compiled graphs."""
+    builder_calls = {graph: 0 for graph in AgentGraph}
+
+    def counting(
+        graph: AgentGraph, builder: Callable[[], StateGraph]
+    ) -> Callable[[], StateGraph]:
+        def build() -> StateGraph:
+            builder_calls[graph] += 1
+            # leaves room for concurrent callers to race
+            time.sleep(0.1)
+            return builder()
+
+        return build
+
+    with patch.dict(_COMPILED_GRAPHS, clear=True), patch.dict(
+        _GRAPH_BUILDERS,
+        {graph: counting(graph, builder) for graph, builder in _GRAPH_BUILDERS.items()},
+    ):
+        yield builder_calls
+
+
+def test_warm_up_compiles_every_graph_once(
+    builder_calls: dict[AgentGraph, int],
+) -> None:
+    agent_graph_compile_seconds.clear()
+
+    warm_up_compiled_graphs()
+    warm_up_compiled_graphs()
+
+    assert builder_calls == {graph: 1 for graph in AgentGraph}
+    for graph in AgentGraph:
+        assert get_compiled_graph(graph) is _COMPILED_GRAPHS[graph]
+        compile_seconds = agent_graph_compile_seconds.labels(graph=graph.value)
+        assert compile_seconds._value.get() > 0
+
+
+def test_concurrent_calls_share_one_compiled_graph(
+    builder_calls: dict[AgentGraph, int],
+) -> None:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        compiled_graphs = list(
+            executor.map(lambda _: get_compiled_graph(AgentGraph.BASIC), range(8))
+        )
+
+    assert builder_calls[AgentGraph.BASIC] == 1
+    assert all(
+        compiled_graph is compiled_graphs[0] for compiled_graph in compiled_graphs
+    )
+    assert get_compiled_graph(AgentGraph.BASIC) is compiled_graphs[0]
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+from collections.abc import Generator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.background.celery.tasks.indexing.utils import IndexingCallbackBase
+
+_UTILS_MODULE = "onyx.background.celery.tasks.indexing.utils"
+
+
+@pytest.fixture
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def chunking_in_process_pool() -> Generator[None, None, None]:
+    # the indexing process is spawned non-daemonic in this case
+    with patch(f"{_UTILS_MODULE}.INDEXING_CHUNKING_PROCESSES", 4):
+        yield
+
+
+def _build_callback(parent_pid: int) -> IndexingCallbackBase:
+    callback = IndexingCallbackBase(parent_pid, MagicMock(), MagicMock(), MagicMock())
+    # as if the last check was long enough ago
+    callback.last_parent_check -= IndexingCallbackBase.PARENT_CHECK_INTERVAL + 1
+    return callback
+
+
+def test_exits_when_the_parent_is_gone(
+    chunking_in_process_pool: None, dead_pid: int
+) -> None:
+    callback = _build_callback(dead_pid)
+    with pytest.raises(ProcessLookupError):
+        callback.progress("tag", 1)
+
+
+def test_parent_is_checked_once_per_interval(chunking_in_process_pool: None) -> None:
+    callback = _build_callback(os.getpid())
+    with patch(f"{_UTILS_MODULE}.os.kill") as kill:
+        callback.progress("tag", 1)
+        callback.progress("tag", 1)
+
+    kill.assert_called_once_with(os.getpid(), 0)
+
+
+def test_no_parent_check_for_daemonic_processes(dead_pid: int) -> None:
+    # a daemonic process is taken down along with its parent
+    with patch(f"{_UTILS_MODULE}.INDEXING_CHUNKING_PROCESSES", 0):
+        callback = _build_callback(dead_pid)
+        callback.progress("tag", 1)
+
+    assert callback.last_tag == "tag"
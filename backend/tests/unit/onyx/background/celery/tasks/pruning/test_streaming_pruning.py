@@ -0,0 +1,118 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.background.celery.tasks.pruning.tasks import _stream_doc_ids_to_remove
+from onyx.redis.redis_connector_prune import RedisConnectorPrune
+
+
+class _FakeRedis:
+    """Just the set commands used by the pruning source ids."""
+
+    def __init__(self) -> None:
+        self.sets: dict[str, set[str]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def sadd(self, name: str, *values: str) -> int:
+        self.sets.setdefault(name, set()).update(values)
+        return len(values)
+
+    def smismember(self, name: str, values: list[str]) -> list[int]:
+        members = self.sets.get(name, set())
+        return [int(value in members) for value in values]
+
+    def expire(self, name: str, time: int) -> bool:
+        self.ttls[name] = time
+        return name in self.sets
+
+    def delete(self, *names: str) -> int:
+        return sum(self.sets.pop(name, None) is not None for name in names)
+
+
+def _db_session_streaming(doc_id_batches: list[list[str]]) -> MagicMock:
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value.partitions.return_value = (
+        iter(doc_id_batches)
+    )
+    return db_session
+
+
+def test_stream_doc_ids_to_remove() -> None:
+    redis_client = _FakeRedis()
+    prune = RedisConnectorPrune("tenant", 1, redis_client)  # type: ignore[arg-type]
+    redis_connector = MagicMock(prune=prune)
+
+    # the source, as returned by the connector
+    for doc_id_batch in [{"doc1", "doc2"}, {"doc4"}, set()]:
+        prune.source_doc_ids_add(doc_id_batch)
+    prune.source_doc_ids_set_complete()
+    assert redis_client.ttls[prune.source_doc_ids_key] == prune.SOURCE_DOC_IDS_TTL
+
+    # the local index, as streamed from the db
+    db_session = _db_session_streaming(
+        [["doc1", "doc3"], ["doc4", "doc5", "doc6"], ["doc2"]]
+    )
+    doc_ids_to_remove = _stream_doc_ids_to_remove(
+        db_session, redis_connector, connector_id=1, credential_id=2
+    )
+    assert list(doc_ids_to_remove) == ["doc3", "doc5", "doc6"]
+
+    prune.source_doc_ids_clear()
+    assert prune.source_doc_ids_key not in redis_client.sets
+
+
+def test_stream_doc_ids_to_remove_aborts_without_the_source_ids() -> None:
+    redis_client = _FakeRedis()
+    prune = RedisConnectorPrune("tenant", 1, redis_client)  # type: ignore[arg-type]
+    redis_connector = MagicMock(prune=prune)
+
+    # the source listing never completed
+    prune.source_doc_ids_add({"doc1"})
+    with pytest.raises(RuntimeError):
+        list(
+            _stream_doc_ids_to_remove(
+                _db_session_streaming([["doc1", "doc2"]]),
+                redis_connector,
+                connector_id=1,
+                credential_id=2,
+            )
+        )
+
+    # the set expired while streaming
+    prune.source_doc_ids_set_complete()
+    doc_ids_to_remove = _stream_doc_ids_to_remove(
+        _db_session_streaming([["doc1", "doc2"], ["doc3"]]),
+        redis_connector,
+        connector_id=1,
+        credential_id=2,
+    )
+    assert next(doc_ids_to_remove) == "doc2"
+    redis_client.delete(prune.source_doc_ids_key)
+    with pytest.raises(RuntimeError):
+        next(doc_ids_to_remove)
+
+
+def test_generate_tasks_consumes_a_stream() -> None:
+    redis_client = _FakeRedis()
+    prune = RedisConnectorPrune("tenant", 1, redis_client)  # type: ignore[arg-type]
+    celery_app = MagicMock()
+    consumed = 0
+
+    def stream() -> Iterator[str]:
+        nonlocal consumed
+        for i in range(5):
+            # each task is sent before the next id is read
+            assert celery_app.send_task.call_count == i
+            consumed += 1
+            yield f"doc{i}"
+
+    with patch(
+        "onyx.redis.redis_connector_prune.get_connector_credential_pair_from_id",
+        return_value=MagicMock(connector_id=1, credential_id=2),
+    ):
+        tasks_generated = prune.generate_tasks(stream(), celery_app, MagicMock(), None)
+
+    assert tasks_generated == consumed == 5
+    assert len(redis_client.sets[prune.taskset_key]) == 5
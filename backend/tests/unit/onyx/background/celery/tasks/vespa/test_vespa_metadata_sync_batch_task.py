@@ -0,0 +1,148 @@
+from collections.abc import Generator
+from types import SimpleNamespace
+from unittest.mock import ANY
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+from celery.exceptions import Retry
+
+from onyx.background.celery.tasks.vespa.tasks import vespa_metadata_sync_batch_task
+
+_TASKS_MODULE = "onyx.background.celery.tasks.vespa.tasks"
+
+
+def _doc(doc_id: str) -> SimpleNamespace:
+    return SimpleNamespace(id=doc_id, boost=0, hidden=False, chunk_count=2)
+
+
+@pytest.fixture
+def document_index() -> Generator[MagicMock, None, None]:
+    document_index = MagicMock()
+    with patch(f"{_TASKS_MODULE}.get_session_with_current_tenant"), patch(
+        f"{_TASKS_MODULE}.get_active_search_settings"
+    ), patch(f"{_TASKS_MODULE}.HttpxPool"), patch(
+        f"{_TASKS_MODULE}.get_default_document_index", return_value=document_index
+    ), patch(
+        f"{_TASKS_MODULE}.fetch_document_sets_for_documents",
+        return_value=[("doc1", ["set1", "set2"])],
+    ), patch(
+        f"{_TASKS_MODULE}.get_access_for_documents",
+        side_effect=lambda doc_ids, _: {
+            doc_id: f"access_{doc_id}" for doc_id in doc_ids
+        },
+    ):
+        yield document_index
+
+
+@pytest.fixture
+def mark_documents_as_synced() -> Generator[MagicMock, None, None]:
+    with patch(f"{_TASKS_MODULE}.mark_documents_as_synced") as mark_documents_as_synced:
+        yield mark_documents_as_synced
+
+
+@pytest.fixture
+def retry() -> Generator[MagicMock, None, None]:
+    with patch.object(
+        vespa_metadata_sync_batch_task, "retry", side_effect=Retry()
+    ) as retry:
+        yield retry
+
+
+def test_sync_batch(
+    document_index: MagicMock, mark_documents_as_synced: MagicMock, retry: MagicMock
+) -> None:
+    with patch(
+        f"{_TASKS_MODULE}.get_documents_by_ids",
+        return_value=[_doc("doc1"), _doc("doc2")],
+    ):
+        # doc3 was deleted in the meantime
+        assert vespa_metadata_sync_batch_task.run(
+            ["doc1", "doc2", "doc3"], tenant_id="tenant"
+        )
+
+    assert document_index.update_single.call_count == 2
+    doc1_call, doc2_call = document_index.update_single.call_args_list
+    assert doc1_call.args == ("doc1",)
+    assert doc1_call.kwargs["tenant_id"] == "tenant"
+    assert doc1_call.kwargs["chunk_count"] == 2
+    assert doc1_call.kwargs["fields"].document_sets == {"set1", "set2"}
+    assert doc1_call.kwargs["fields"].access == "access_doc1"
+    assert doc2_call.kwargs["fields"].document_sets == set()
+    assert doc2_call.kwargs["fields"].access == "access_doc2"
+
+    mark_documents_as_synced.assert_called_once_with(["doc1", "doc2"], ANY)
+    retry.assert_not_called()
+
+
+def test_only_failed_documents_are_retried(
+    document_index: MagicMock, mark_documents_as_synced: MagicMock, retry: MagicMock
+) -> None:
+    connect_error = httpx.ConnectError("vespa is restarting")
+    bad_request = httpx.HTTPStatusError(
+        "bad request",
+        request=httpx.Request("PUT", "http://vespa"),
+        response=httpx.Response(400),
+    )
+
+    def update_single(doc_id: str, **kwargs: object) -> int:
+        if doc_id == "doc2":
+            raise connect_error
+        if doc_id == "doc3":
+            raise bad_request
+        return 2
+
+    document_index.update_single.side_effect = update_single
+    with patch(
+        f"{_TASKS_MODULE}.get_documents_by_ids",
+        return_value=[_doc("doc1"), _doc("doc2"), _doc("doc3"), _doc("doc4")],
+    ):
+        with pytest.raises(Retry):
+            vespa_metadata_sync_batch_task.run(
+                ["doc1", "doc2", "doc3", "doc4"], tenant_id="tenant"
+            )
+
+    # the documents that made it are not redone
+    mark_documents_as_synced.assert_called_once_with(["doc1", "doc4"], ANY)
+    # and the bad request isn't worth retrying
+    retry.assert_called_once()
+    assert retry.call_args.kwargs["exc"] is connect_error
+    assert retry.call_args.kwargs["kwargs"] == dict(
+        document_ids=["doc2"], tenant_id="tenant"
+    )
+
+
+def test_whole_batch_is_retried_on_other_failures(
+    document_index: MagicMock, mark_documents_as_synced: MagicMock, retry: MagicMock
+) -> None:
+    db_error = RuntimeError("the db went away")
+    with patch(f"{_TASKS_MODULE}.get_documents_by_ids", side_effect=db_error):
+        with pytest.raises(Retry):
+            vespa_metadata_sync_batch_task.run(["doc1", "doc2"], tenant_id="tenant")
+
+    document_index.update_single.assert_not_called()
+    mark_documents_as_synced.assert_not_called()
+    assert retry.call_args.kwargs["exc"] is db_error
+    assert retry.call_args.kwargs["kwargs"] == dict(
+        document_ids=["doc1", "doc2"], tenant_id="tenant"
+    )
+
+
+def test_no_retry_after_max_retries(
+    document_index: MagicMock, mark_documents_as_synced: MagicMock, retry: MagicMock
+) -> None:
+    document_index.update_single.side_effect = httpx.ConnectError("still down")
+    vespa_metadata_sync_batch_task.push_request(
+        retries=vespa_metadata_sync_batch_task.max_retries
+    )
+    try:
+        with patch(
+            f"{_TASKS_MODULE}.get_documents_by_ids", return_value=[_doc("doc1")]
+        ):
+            assert not vespa_metadata_sync_batch_task.run(["doc1"], tenant_id="tenant")
+    finally:
+        vespa_metadata_sync_batch_task.pop_request()
+
+    retry.assert_not_called()
+    mark_documents_as_synced.assert_called_once_with([], ANY)
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from onyx.background.indexing.prefetch import BackgroundPrefetcher
+
+
+def test_prefetcher_preserves_order_and_overlaps() -> None:
+    def _slow_gen() -> Iterator[int]:
+        for i in range(5):
+            time.sleep(0.05)
+            yield i
+
+    start = time.monotonic()
+    results = []
+    prefetcher = BackgroundPrefetcher(_slow_gen, max_prefetch=2)
+    for item in prefetcher:
+        # "processing" takes as long as producing, so the two should overlap
+        time.sleep(0.05)
+        results.append(item)
+    elapsed = time.monotonic() - start
+
+    assert results == [0, 1, 2, 3, 4]
+    assert elapsed < 0.45
+    assert prefetcher.stats.items_produced == 5
+    assert prefetcher.stats.items_consumed == 5
+    assert prefetcher.stats.max_queue_depth <= 2
+
+
+def test_prefetcher_applies_backpressure() -> None:
+    produced: list[int] = []
+
+    def _fast_gen() -> Iterator[int]:
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    prefetcher = BackgroundPrefetcher(_fast_gen, max_prefetch=3)
+    iterator = iter(prefetcher)
+    assert next(iterator) == 0
+    time.sleep(0.1)
+
+    # one handed out, 3 queued and at most one more waiting on the full queue
+    assert len(produced) <= 5
+    prefetcher.close()
+
+
+def test_prefetcher_propagates_producer_errors() -> None:
+    def _failing_gen() -> Iterator[int]:
+        yield 1
+        raise ValueError("connector failed")
+
+    results = []
+    with pytest.raises(ValueError, match="connector failed"):
+        for item in BackgroundPrefetcher(_failing_gen, max_prefetch=2):
+            results.append(item)
+    assert results == [1]
+
+
+def test_prefetcher_stops_producer_when_consumer_fails() -> None:
+    finished = threading.Event()
+
+    def _endless_gen() -> Iterator[int]:
+        i = 0
+        try:
+            while True:
+                yield i
+                i += 1
+        finally:
+            finished.set()
+
+    with pytest.raises(RuntimeError):
+        for item in BackgroundPrefetcher(_endless_gen, max_prefetch=1):
+            if item == 3:
+                raise RuntimeError("indexing failed")
+
+    # the producer notices the stop on its next put and closes the generator
+    assert finished.wait(timeout=5)
@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.queues import Queue
+from typing import Any
+from unittest.mock import patch
+
+import psutil
+
+from onyx.background.indexing.run_indexing import run_indexing_entrypoint
+from onyx.indexing import chunker as chunker_module
+
+_RUN_INDEXING_MODULE = "onyx.background.indexing.run_indexing"
+
+# the processes below are spawned, so they start with a fresh import of onyx
+_PROCESS_START_TIMEOUT = 120
+
+
+def _spawn_chunking_workers(queue: Queue, initializer: Any = None) -> None:
+    pool = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+    )
+    chunker_module._chunking_pools[("test",)] = pool
+    queue.put(pool.submit(os.getpid).result())
+    # indexing until cancelled
+    time.sleep(_PROCESS_START_TIMEOUT)
+
+
+def _run_indexing_process(queue: Queue) -> None:
+    with (
+        patch(f"{_RUN_INDEXING_MODULE}.INDEXING_CHUNKING_PROCESSES", 4),
+        patch(f"{_RUN_INDEXING_MODULE}.get_session_with_current_tenant"),
+        patch(f"{_RUN_INDEXING_MODULE}.transition_attempt_to_in_progress"),
+        patch(
+            f"{_RUN_INDEXING_MODULE}._run_indexing",
+            side_effect=lambda *args: _spawn_chunking_workers(queue),
+        ),
+    ):
+        run_indexing_entrypoint(1, "tenant", 1)
+
+
+def _chunking_workers_process(queue: Queue) -> None:
+    _spawn_chunking_workers(queue, initializer=chunker_module._start_parent_watcher)
+
+
+def _wait_for_exit(pid: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(pid).status() == psutil.STATUS_ZOMBIE:
+                return True
+        except psutil.NoSuchProcess:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _start(target: Any) -> tuple[multiprocessing.process.BaseProcess, int]:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    # non-daemonic, like the indexing process when chunking in a pool
+    process = ctx.Process(target=target, args=(queue,), daemon=False)
+    process.start()
+    return process, queue.get(timeout=_PROCESS_START_TIMEOUT)
+
+
+def test_terminating_indexing_shuts_down_the_chunking_workers() -> None:
+    process, worker_pid = _start(_run_indexing_process)
+
+    # what the watchdog does when it cancels the attempt
+    process.terminate()
+    process.join(timeout=30)
+
+    assert process.exitcode == 128 + signal.SIGTERM
+    assert _wait_for_exit(worker_pid, timeout=10)
+
+
+def test_chunking_workers_exit_with_their_parent() -> None:
+    process, worker_pid = _start(_chunking_workers_process)
+
+    # no chance to clean up at all
+    process.kill()
+    process.join(timeout=30)
+
+    assert _wait_for_exit(
+        worker_pid, timeout=chunker_module._WORKER_PARENT_CHECK_INTERVAL_SECONDS + 10
+    )
@@ -6,6 +6,8 @@ from onyx.chat.models import CitationInfo
 from onyx.chat.models import LlmDoc
 from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.citation_processing import CodeFenceTracker
+from onyx.chat.stream_processing.citation_processing import in_code_block
 from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
 from onyx.configs.constants import DocumentSource
 
@@ -436,3 +438,40 @@ def test_citation_extraction(
     ] == expected_citations, (
         f"Test '{test_name}' failed: Citations do not match expected output."
     )
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        ["```", "python\n", "x = 1\n", "```"],
+        ["`", "``", "\ncode", "`", "`", "`\n"],
+        ["````", "\n", "`````", "``", "text"],
+        ["no code", " here ", "`inline`", " ``"],
+    ],
+)
+def test_code_fence_tracker_matches_full_scan(tokens: list[str]) -> None:
+    tracker = CodeFenceTracker()
+    text = ""
+    for token in tokens:
+        tracker.feed(token)
+        text += token
+        assert tracker.in_code_block == in_code_block(text)
+
+
+def test_long_bracket_runs_are_not_held_back(
+    mock_data: tuple[list[LlmDoc], dict[str, int]],
+) -> None:
+    # can never become a citation, so it shouldn't be buffered until the end of the stream
+    mock_docs, mock_doc_id_to_rank_map = mock_data
+    doc_id_to_rank = DocumentIdOrderMapping(order_mapping=mock_doc_id_to_rank_map)
+    processor = CitationProcessor(
+        context_docs=mock_docs,
+        final_doc_id_to_rank_map=doc_id_to_rank,
+        display_doc_id_to_rank_map=doc_id_to_rank,
+        stop_stream=None,
+    )
+
+    pieces = list(processor.process_token("x" + "[" * 40))
+    assert [
+        piece.answer_piece for piece in pieces if isinstance(piece, OnyxAnswerPiece)
+    ] == ["x" + "[" * 40]
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.retrieval.search_runner import get_query_embedding
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+
+def test_query_embedding_cache_is_per_tenant() -> None:
+    # every tenant schema numbers its search settings from 1
+    search_settings = SimpleNamespace(id=1)
+    models = {
+        "tenant_a": MagicMock(**{"encode.return_value": [[1.0, 2.0]]}),
+        "tenant_b": MagicMock(**{"encode.return_value": [[3.0, 4.0, 5.0]]}),
+    }
+
+    with patch(
+        "onyx.context.search.retrieval.search_runner.get_current_search_settings",
+        return_value=search_settings,
+    ), patch(
+        "onyx.context.search.retrieval.search_runner._get_query_embedding_model",
+        side_effect=lambda _: models[CURRENT_TENANT_ID_CONTEXTVAR.get()],
+    ), patch(
+        "onyx.context.search.retrieval.search_runner.QUERY_EMBEDDING_REDIS_CACHE_ENABLED",
+        False,
+    ):
+        embeddings = {}
+        for tenant_id in ["tenant_a", "tenant_b", "tenant_a", "tenant_b"]:
+            token = CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+            try:
+                embeddings[tenant_id] = get_query_embedding(
+                    "what is our pto policy", db_session=MagicMock()
+                )
+            finally:
+                CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+
+    assert embeddings == {"tenant_a": [1.0, 2.0], "tenant_b": [3.0, 4.0, 5.0]}
+    # the repeated lookups were served from the cache
+    assert models["tenant_a"].encode.call_count == 1
+    assert models["tenant_b"].encode.call_count == 1
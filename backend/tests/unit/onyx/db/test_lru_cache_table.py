@@ -0,0 +1,75 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from onyx.db.embedding_cache import get_cached_embeddings
+from onyx.db.image_summary_cache import get_cached_image_summaries
+from onyx.db.lru_cache_table import CachePruneThrottle
+
+_HOUR = 60 * 60
+
+
+def _db_session(rows: list[tuple[str, bytes, datetime]]) -> MagicMock:
+    db_session = MagicMock()
+    db_session.execute.return_value.all.return_value = rows
+    return db_session
+
+
+def test_recently_used_hits_are_not_written() -> None:
+    now = datetime.now(timezone.utc)
+    db_session = _db_session(
+        [("a", b"1", now - timedelta(minutes=5)), ("b", b"2", now)]
+    )
+
+    cached = get_cached_embeddings(db_session, ["a", "b", "c"], _HOUR)
+
+    assert cached == {"a": b"1", "b": b"2"}
+    # just the lookup
+    assert db_session.execute.call_count == 1
+    db_session.commit.assert_not_called()
+
+
+def test_stale_hits_are_touched_without_waiting_on_locks() -> None:
+    now = datetime.now(timezone.utc)
+    db_session = _db_session(
+        [
+            ("c", b"3", now - timedelta(days=2)),
+            ("b", b"2", now),
+            ("a", b"1", now - timedelta(hours=2)),
+        ]
+    )
+
+    cached = get_cached_embeddings(db_session, ["a", "b", "c"], _HOUR)
+
+    assert cached == {"a": b"1", "b": b"2", "c": b"3"}
+    assert db_session.execute.call_count == 2
+    update_stmt = db_session.execute.call_args_list[1].args[0]
+    compiled = update_stmt.compile(dialect=postgresql.dialect())
+    assert "FOR UPDATE SKIP LOCKED" in str(compiled)
+    assert ["a", "c"] in compiled.params.values()
+    db_session.commit.assert_called_once()
+
+
+def test_image_summaries_share_the_cache_logic() -> None:
+    now = datetime.now(timezone.utc)
+    db_session = _db_session([("a", "a logo", now - timedelta(days=2))])
+
+    assert get_cached_image_summaries(db_session, ["a"], _HOUR) == {"a": "a logo"}
+    update_stmt = db_session.execute.call_args_list[1].args[0]
+    assert update_stmt.table.name == "image_summary_cache"
+
+
+def test_prune_throttle() -> None:
+    throttle = CachePruneThrottle(3)
+    assert [throttle.should_prune() for _ in range(7)] == [
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
@@ -0,0 +1,110 @@
+import io
+import zipfile
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import psycopg2
+
+from onyx.db.pg_file_store import read_lobj
+from onyx.file_store.constants import LARGE_OBJECT_READ_BUFFER_SIZE
+
+
+class _FakeLargeObject:
+    """Behaves like a psycopg2 lobject, which is only valid in the transaction it was
+    opened in."""
+
+    def __init__(self, connection: "_FakeConnection", data: bytes) -> None:
+        self.connection = connection
+        self._data = data
+        self._mark = connection.mark
+        self._position = 0
+
+    def _check_valid(self) -> None:
+        if self.connection.mark != self._mark:
+            raise psycopg2.ProgrammingError("lobject isn't valid anymore")
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._check_valid()
+        base = {
+            io.SEEK_SET: 0,
+            io.SEEK_CUR: self._position,
+            io.SEEK_END: len(self._data),
+        }
+        self._position = base[whence] + offset
+        return self._position
+
+    def tell(self) -> int:
+        self._check_valid()
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        self._check_valid()
+        self.connection.reads.append(size)
+        end = len(self._data) if size < 0 else self._position + size
+        data = self._data[self._position : end]
+        self._position += len(data)
+        return data
+
+    def close(self) -> None:
+        pass
+
+
+class _FakeConnection:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.mark = 0
+        self.reads: list[int] = []
+
+    def lobject(self, oid: int, mode: str | None = None) -> _FakeLargeObject:
+        return _FakeLargeObject(self, self.data)
+
+    def commit(self) -> None:
+        self.mark += 1
+
+
+def test_stream_reads_on_demand() -> None:
+    data = bytes(range(256)) * (LARGE_OBJECT_READ_BUFFER_SIZE // 64)
+    pg_conn = _FakeConnection(data)
+    with patch("onyx.db.pg_file_store.get_pg_conn_from_session", return_value=pg_conn):
+        reader = read_lobj(lobj_oid=1, db_session=MagicMock(), stream=True)
+
+        assert reader.read(10) == data[:10]
+        assert reader.read(10) == data[10:20]
+        # small reads are served from the read ahead buffer
+        assert pg_conn.reads == [LARGE_OBJECT_READ_BUFFER_SIZE]
+
+        assert reader.size == len(data)
+        assert reader.read_range(1000, 50) == data[1000:1050]
+        assert reader.tell() == 1050
+        reader.seek(-5, io.SEEK_END)
+        assert reader.read() == data[-5:]
+
+        reader.seek(0)
+        assert reader.read() == data
+        reader.close()
+
+
+def test_stream_survives_commits() -> None:
+    data = b"0123456789" * 1000
+    pg_conn = _FakeConnection(data)
+    with patch("onyx.db.pg_file_store.get_pg_conn_from_session", return_value=pg_conn):
+        reader = read_lobj(lobj_oid=1, db_session=MagicMock(), stream=True)
+        assert reader.read_range(0, 10) == data[:10]
+
+        # e.g. a file extracted from the stream was saved and committed
+        pg_conn.commit()
+        assert reader.read_range(5000, 10) == data[5000:5010]
+
+
+def test_stream_as_zip_file() -> None:
+    zip_bytes = io.BytesIO()
+    with zipfile.ZipFile(zip_bytes, "w") as zf:
+        zf.writestr("a.txt", "first file")
+        zf.writestr("dir/b.txt", "second file")
+
+    pg_conn = _FakeConnection(zip_bytes.getvalue())
+    with patch("onyx.db.pg_file_store.get_pg_conn_from_session", return_value=pg_conn):
+        reader = read_lobj(lobj_oid=1, db_session=MagicMock(), stream=True)
+        with zipfile.ZipFile(reader) as zf:
+            assert zf.read("dir/b.txt") == b"second file"
+            assert zf.read("a.txt") == b"first file"
@@ -0,0 +1,15 @@
+import struct
+
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_dense_tensor_hex,
+)
+
+
+def test_build_vespa_dense_tensor_hex() -> None:
+    assert build_vespa_dense_tensor_hex([1.0, 2.0]) == "3f80000040000000"
+
+    embedding = [0.1, -0.25, 3.14159, 0.0]
+    hex_value = build_vespa_dense_tensor_hex(embedding)
+    assert len(hex_value) == 8 * len(embedding)
+    decoded = struct.unpack(">4f", bytes.fromhex(hex_value))
+    assert decoded == struct.unpack(">4f", struct.pack(">4f", *embedding))
@@ -0,0 +1,67 @@
+import re
+import threading
+import time
+from collections.abc import Mapping
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.document_index.vespa.chunk_retrieval import batch_search_api_retrieval
+
+
+def test_batch_searches_run_concurrently() -> None:
+    in_flight = 0
+    max_in_flight = 0
+    num_searches = 0
+    lock = threading.Lock()
+
+    def fake_query_vespa(
+        query_params: Mapping[str, str | int | float],
+    ) -> list[SimpleNamespace]:
+        nonlocal in_flight, max_in_flight, num_searches
+        with lock:
+            in_flight += 1
+            num_searches += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        document_ids = re.findall(r'contains "(doc\d+)"', str(query_params["yql"]))
+        # returned out of order, the chunks of every search are sorted
+        return [
+            SimpleNamespace(
+                document_id=document_id,
+                chunk_id=chunk_id,
+                large_chunk_reference_ids=[],
+            )
+            for chunk_id in (2, 0, 1)
+            for document_id in document_ids
+        ]
+
+    chunk_requests = [
+        VespaChunkRequest(document_id=f"doc{i}", min_chunk_ind=0, max_chunk_ind=2)
+        for i in range(25)
+    ]
+    with patch(
+        "onyx.document_index.vespa.chunk_retrieval.query_vespa", fake_query_vespa
+    ):
+        chunks = batch_search_api_retrieval(
+            index_name="test_index",
+            chunk_requests=chunk_requests,
+            filters=IndexFilters(access_control_list=None),
+        )
+
+    # split up by MAX_OR_CONDITIONS
+    assert num_searches == 3
+    assert max_in_flight == 3
+    assert len(chunks) == 75
+    # in the order of the searches
+    searches = [range(0, 9), range(9, 19), range(19, 25)]
+    expected = [
+        (f"doc{i}", chunk_id)
+        for search in searches
+        for chunk_id in range(3)
+        for i in search
+    ]
+    assert [(chunk.document_id, chunk.chunk_id) for chunk in chunks] == expected
@@ -0,0 +1,45 @@
+import concurrent.futures
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.document_index.vespa.index import VespaIndex
+
+
+def test_enrich_basic_chunk_info_batch_only_probes_unknown_counts() -> None:
+    http_client = MagicMock()
+    doc_id_to_previous_chunk_cnt: dict[str, int | None] = {
+        "known_a": 3,
+        "unknown_b": None,
+        "known_c": 0,
+        "unknown_d": None,
+    }
+
+    with (
+        patch(
+            "onyx.document_index.vespa.index.check_for_final_chunk_existence",
+            return_value=7,
+        ) as mock_check,
+        concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor,
+    ):
+        enriched = VespaIndex.enrich_basic_chunk_info_batch(
+            index_name="test_index",
+            http_client=http_client,
+            doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
+            doc_id_to_new_chunk_cnt={"known_a": 2},
+            executor=executor,
+        )
+
+    # order of the input is kept
+    assert [info.doc_id for info in enriched] == list(doc_id_to_previous_chunk_cnt)
+
+    # vespa is only hit for the documents without a known chunk count
+    assert mock_check.call_count == 2
+    probed = {call.kwargs["minimal_doc_info"].doc_id for call in mock_check.mock_calls}
+    assert probed == {"unknown_b", "unknown_d"}
+
+    by_id = {info.doc_id: info for info in enriched}
+    assert by_id["known_a"].chunk_start_index == 2
+    assert by_id["known_a"].chunk_end_index == 3
+    assert not by_id["known_a"].old_version
+    assert by_id["unknown_b"].chunk_end_index == 7
+    assert by_id["unknown_b"].old_version
@@ -0,0 +1,75 @@
+import threading
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_query_http_client
+from onyx.document_index.vespa.shared_utils.utils import vespa_query_http_requests
+from onyx.document_index.vespa.shared_utils.utils import VESPA_QUERY_HTTPX_POOL_NAME
+from onyx.httpx.httpx_pool import HttpxPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Generator[str, None, None]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    HttpxPool.close_client(VESPA_QUERY_HTTPX_POOL_NAME)
+    server.shutdown()
+
+
+def _request_count(connection: str) -> float:
+    return vespa_query_http_requests.labels(connection=connection)._value.get()
+
+
+def test_connections_are_reused(server_url: str) -> None:
+    new_before = _request_count("new")
+    reused_before = _request_count("reused")
+
+    for _ in range(3):
+        get_vespa_query_http_client().get(server_url).raise_for_status()
+
+    assert _request_count("new") - new_before == 1
+    assert _request_count("reused") - reused_before == 2
+
+
+def test_forked_child_creates_its_own_client(server_url: str) -> None:
+    parent_client = get_vespa_query_http_client()
+    assert get_vespa_query_http_client() is parent_client
+
+    # what runs in a forked child
+    HttpxPool._after_fork_in_child()
+
+    child_client = get_vespa_query_http_client()
+    assert child_client is not parent_client
+    assert not parent_client.is_closed
+    child_client.get(server_url).raise_for_status()
+    parent_client.close()
+
+
+def test_initialized_client_is_returned_without_locking(server_url: str) -> None:
+    client = get_vespa_query_http_client()
+
+    with patch.object(HttpxPool, "_lock") as lock:
+        assert get_vespa_query_http_client() is client
+
+    lock.__enter__.assert_not_called()
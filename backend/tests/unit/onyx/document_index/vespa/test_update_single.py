@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.vespa.index import VespaIndex
+
+
+def _build_index(handler: httpx.MockTransport) -> VespaIndex:
+    return VespaIndex(
+        index_name="test_index",
+        secondary_index_name=None,
+        large_chunks_enabled=False,
+        secondary_large_chunks_enabled=None,
+        httpx_client=httpx.Client(transport=handler),
+    )
+
+
+def test_update_single_updates_chunks_concurrently() -> None:
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+    bodies: dict[str, dict] = {}
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+            bodies[request.url.path] = json.loads(request.content)
+        return httpx.Response(200, json={})
+
+    index = _build_index(httpx.MockTransport(handle))
+    chunks_affected = index.update_single(
+        "doc",
+        chunk_count=20,
+        tenant_id="tenant",
+        fields=VespaDocumentFields(boost=2, hidden=True),
+        user_fields=None,
+    )
+
+    assert chunks_affected == 20
+    assert len(bodies) == 20
+    assert all(
+        body == {"fields": {"boost": {"assign": 2}, "hidden": {"assign": True}}}
+        for body in bodies.values()
+    )
+    assert max_in_flight > 1
+
+
+@patch("retry.api.time.sleep")
+def test_update_single_reports_failed_chunks(mock_sleep: object) -> None:
+    attempts: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        chunk_id = request.url.path.rsplit("/", 1)[-1]
+        with lock:
+            attempts[chunk_id] = attempts.get(chunk_id, 0) + 1
+            attempt = attempts[chunk_id]
+        # one chunk never succeeds, every other chunk fails once
+        if chunk_id == failing_chunk_id or attempt == 1:
+            return httpx.Response(503, text="overloaded")
+        return httpx.Response(200, json={})
+
+    index = _build_index(httpx.MockTransport(handle))
+    with patch(
+        "onyx.document_index.vespa.index.get_document_chunk_ids",
+        return_value=[f"chunk{i}" for i in range(10)],
+    ):
+        failing_chunk_id = "chunk3"
+        with pytest.raises(httpx.HTTPStatusError) as exc_info:
+            index.update_single(
+                "doc",
+                chunk_count=10,
+                tenant_id="tenant",
+                fields=VespaDocumentFields(boost=2),
+                user_fields=None,
+            )
+
+    assert exc_info.value.response.status_code == 503
+    assert "Failed to update 1 of 10 chunks of doc_id=doc: chunk3" in (
+        exc_info.value.__notes__
+    )
+    # every chunk was still updated, with retries
+    assert attempts == {f"chunk{i}": 3 if i == 3 else 2 for i in range(10)}
@@ -1,4 +1,5 @@
 import os
+from collections import OrderedDict
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
@@ -206,3 +207,82 @@ class TestPostQueryChunkCensoring:
         assert result[2] == self.mock_chunk_3
         assert self.mock_chunk_4 not in result
         mock_censor_func_impl.assert_called_once()
+
+
+@pytest.mark.skipif(
+    os.environ.get("ENABLE_PAID_ENTERPRISE_EDITION_FEATURES", "").lower() != "true",
+    reason="Permissions tests are enterprise only",
+)
+@patch("ee.onyx.external_permissions.post_query_censoring.get_session_context_manager")
+@patch("ee.onyx.external_permissions.post_query_censoring.get_all_auto_sync_cc_pairs")
+def test_censoring_enabled_sources_are_cached(
+    mock_get_cc_pairs: MagicMock, mock_get_session: MagicMock
+) -> None:
+    from ee.onyx.external_permissions import post_query_censoring
+
+    cc_pair = MagicMock()
+    cc_pair.connector.source = DocumentSource.SALESFORCE
+    mock_get_cc_pairs.return_value = [cc_pair]
+
+    with patch.object(
+        post_query_censoring._CENSORING_ENABLED_SOURCES_CACHE, "_data", OrderedDict()
+    ):
+        for _ in range(3):
+            assert post_query_censoring._get_all_censoring_enabled_sources() == {
+                DocumentSource.SALESFORCE
+            }
+
+    mock_get_cc_pairs.assert_called_once()
+
+
+@pytest.mark.skipif(
+    os.environ.get("ENABLE_PAID_ENTERPRISE_EDITION_FEATURES", "").lower() != "true",
+    reason="Permissions tests are enterprise only",
+)
+@patch(
+    "ee.onyx.external_permissions.salesforce.postprocessing.get_salesforce_user_id_from_email",
+    return_value="user_id",
+)
+@patch(
+    "ee.onyx.external_permissions.salesforce.postprocessing.get_any_salesforce_client_for_doc_id"
+)
+@patch(
+    "ee.onyx.external_permissions.salesforce.postprocessing.get_session_context_manager"
+)
+@patch(
+    "ee.onyx.external_permissions.salesforce.postprocessing.get_objects_access_for_user_id"
+)
+def test_salesforce_object_access_is_cached(
+    mock_get_access: MagicMock,
+    mock_get_session: MagicMock,
+    mock_get_client: MagicMock,
+    mock_get_user_id: MagicMock,
+) -> None:
+    from ee.onyx.external_permissions.salesforce import postprocessing
+
+    mock_get_access.side_effect = lambda client, user_id, object_ids: {
+        object_id: object_id != "hidden" for object_id in object_ids
+    }
+    chunks = [MagicMock(document_id="doc1")]
+
+    with patch.object(postprocessing._OBJECT_ACCESS_CACHE, "_data", OrderedDict()):
+        assert postprocessing._get_objects_access_for_user_email_from_salesforce(
+            {"a", "hidden"}, "test@example.com", chunks
+        ) == {"a": True, "hidden": False}
+        assert postprocessing._get_objects_access_for_user_email_from_salesforce(
+            {"a", "b", "hidden"}, "test@example.com", chunks
+        ) == {"a": True, "b": True, "hidden": False}
+        # everything cached, Salesforce isn't asked at all
+        assert postprocessing._get_objects_access_for_user_email_from_salesforce(
+            {"b", "hidden"}, "test@example.com", chunks
+        ) == {"b": True, "hidden": False}
+        # access is per user
+        postprocessing._get_objects_access_for_user_email_from_salesforce(
+            {"a"}, "other@example.com", chunks
+        )
+
+    assert [sorted(call.args[2]) for call in mock_get_access.call_args_list] == [
+        ["a", "hidden"],
+        ["b"],
+        ["a"],
+    ]
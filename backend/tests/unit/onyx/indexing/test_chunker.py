@@ -1,17 +1,31 @@
+import copy
+import random
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
+from tokenizers import models  # type: ignore
+from tokenizers import normalizers  # type: ignore
+from tokenizers import pre_tokenizers  # type: ignore
+from tokenizers import Tokenizer  # type: ignore
+from tokenizers import trainers  # type: ignore
 
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
+from onyx.connectors.models import IndexingDocument
+from onyx.connectors.models import Section
 from onyx.connectors.models import TextSection
+from onyx.indexing import chunker as chunker_module
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunker import ParallelChunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.natural_language_processing.utils import HuggingFaceTokenizer
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -105,3 +119,143 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+_WORDS = (
+    "the revenue growth report shows that customers naïve 東京 e.g. x=1 Über".split()
+)
+
+
+def _random_text(rng: random.Random, num_words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(num_words))
+    # whitespace at the edges of sections ends up next to the section separator
+    return rng.choice(["", " ", "\n"]) + text + rng.choice(["", ".", " ", "\n"])
+
+
+def _train_tokenizer(word_piece: bool) -> HuggingFaceTokenizer:
+    if word_piece:
+        encoder = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+        encoder.normalizer = normalizers.BertNormalizer(lowercase=True)
+        encoder.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+        trainer = trainers.WordPieceTrainer(vocab_size=200, special_tokens=["[UNK]"])
+    else:
+        encoder = Tokenizer(models.BPE())
+        encoder.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+        trainer = trainers.BpeTrainer(
+            vocab_size=300, initial_alphabet=pre_tokenizers.ByteLevel.alphabet()
+        )
+    rng = random.Random(0)
+    encoder.train_from_iterator([_random_text(rng, 50) for _ in range(50)], trainer)
+
+    with patch(
+        "onyx.natural_language_processing.utils.Tokenizer.from_pretrained",
+        return_value=encoder,
+    ):
+        return HuggingFaceTokenizer("local-test-tokenizer")
+
+
+@pytest.mark.parametrize("word_piece", [True, False])
+def test_running_token_counts_match_recounting(word_piece: bool) -> None:
+    tokenizer = _train_tokenizer(word_piece)
+    # WordPiece drops the whitespace between words, byte level BPE merges it
+    assert tokenizer.whitespace_joins_are_additive == word_piece
+
+    rng = random.Random(1)
+    sections = [
+        Section(text=_random_text(rng, rng.choice([0, 5, 20, 400])), link=f"link{i}")
+        for i in range(200)
+    ]
+    sections.append(Section(text="not \udeb4 encodable", link="surrogate"))
+    sections.extend(
+        Section(text=_random_text(rng, 5), link=f"after{i}") for i in range(20)
+    )
+    document = IndexingDocument(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        doc_updated_at=None,
+        sections=[],
+        processed_sections=sections,
+    )
+
+    recounting_tokenizer = copy.copy(tokenizer)
+    recounting_tokenizer.whitespace_joins_are_additive = False
+
+    chunks = Chunker(tokenizer=tokenizer, chunk_token_limit=128).chunk([document])
+    expected_chunks = Chunker(
+        tokenizer=recounting_tokenizer, chunk_token_limit=128
+    ).chunk([document])
+
+    assert len(chunks) > 20
+    assert [chunk.model_dump() for chunk in chunks] == [
+        chunk.model_dump() for chunk in expected_chunks
+    ]
+
+
+def _thread_pool_executor(
+    max_workers: int, mp_context: Any, initializer: Any, initargs: tuple
+) -> ThreadPoolExecutor:
+    # spawned worker processes wouldn't see the patched tokenizer
+    return ThreadPoolExecutor(
+        max_workers=max_workers, initializer=initializer, initargs=initargs
+    )
+
+
+def test_parallel_chunker_matches_chunker() -> None:
+    tokenizer = _train_tokenizer(word_piece=True)
+    rng = random.Random(2)
+    documents = [
+        IndexingDocument(
+            id=f"test_doc_{doc_num}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Test Document {doc_num}",
+            metadata={},
+            doc_updated_at=None,
+            sections=[],
+            processed_sections=[
+                Section(text=_random_text(rng, rng.randint(5, 600)), link=f"link{i}")
+                for i in range(rng.randint(1, 10))
+            ],
+        )
+        for doc_num in range(25)
+    ]
+    heartbeat = MockHeartbeat()
+
+    with (
+        patch("onyx.indexing.chunker.get_tokenizer", return_value=tokenizer),
+        patch("onyx.indexing.chunker.ProcessPoolExecutor", _thread_pool_executor),
+        patch.dict(chunker_module._chunking_pools, clear=True),
+    ):
+        parallel_chunker = ParallelChunker(
+            tokenizer_model_name="model",
+            tokenizer_provider_type=None,
+            num_processes=3,
+            enable_multipass=True,
+            enable_large_chunks=True,
+            callback=heartbeat,
+        )
+        chunks = parallel_chunker.chunk(documents)
+        # later batches reuse the workers
+        next_batch_chunks = parallel_chunker.chunk(documents[:2])
+        assert len(chunker_module._chunking_pools) == 1
+        for pool in chunker_module._chunking_pools.values():
+            pool.shutdown()
+
+    expected_chunks = Chunker(
+        tokenizer=tokenizer, enable_multipass=True, enable_large_chunks=True
+    ).chunk(documents)
+
+    assert len(chunks) > len(documents)
+    assert [chunk.model_dump() for chunk in chunks] == [
+        chunk.model_dump() for chunk in expected_chunks
+    ]
+    documents_by_id = {document.id: document for document in documents}
+    assert all(
+        chunk.source_document is documents_by_id[chunk.source_document.id]
+        for chunk in chunks
+    )
+    assert next_batch_chunks == [
+        chunk for chunk in chunks if chunk.source_document in documents[:2]
+    ]
+    assert heartbeat.call_count == len(documents) + 2
@@ -0,0 +1,120 @@
+import threading
+import time
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from onyx.indexing.contextual_rag import ContextualRAGExecutor
+from onyx.llm.chat_llm import LLMRateLimitError
+from onyx.llm.utils import MAX_CONTEXT_TOKENS
+
+
+def _build_executor(llm: MagicMock, max_in_flight: int = 4) -> ContextualRAGExecutor:
+    tokenizer = MagicMock()
+    tokenizer.encode.side_effect = lambda text: text.split()
+    with (
+        patch(
+            "onyx.indexing.contextual_rag.get_max_concurrent_requests",
+            return_value=max_in_flight,
+        ),
+        patch(
+            "onyx.indexing.contextual_rag._get_provider_semaphore",
+            return_value=threading.BoundedSemaphore(max_in_flight),
+        ),
+        patch(
+            "onyx.indexing.contextual_rag.model_supports_prompt_caching",
+            return_value=True,
+        ),
+    ):
+        return ContextualRAGExecutor(llm, tokenizer)
+
+
+def test_invoke_counts_usage() -> None:
+    llm = MagicMock()
+    llm.invoke.return_value = AIMessage(content="short summary")
+    executor = _build_executor(llm)
+
+    assert executor.invoke("the whole document ", "chunk one") == "short summary"
+    assert executor.invoke("the whole document ", "chunk two") == "short summary"
+
+    llm.invoke.assert_called_with(
+        "the whole document chunk two", max_tokens=MAX_CONTEXT_TOKENS
+    )
+    usage = executor.get_usage()
+    assert usage.llm_calls == 2
+    assert usage.failed_calls == 0
+    assert usage.prompt_tokens == 2 * 5
+    assert usage.completion_tokens == 2 * 2
+
+
+@patch("onyx.indexing.contextual_rag.time.sleep")
+def test_invoke_retries_rate_limited_calls(mock_sleep: MagicMock) -> None:
+    llm = MagicMock()
+    llm.invoke.side_effect = [
+        LLMRateLimitError(),
+        LLMRateLimitError(),
+        AIMessage(content="summary"),
+    ]
+    executor = _build_executor(llm)
+
+    assert executor.invoke("document") == "summary"
+
+    assert llm.invoke.call_count == 3
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    # exponential backoff with jitter
+    assert 0.5 <= delays[0] <= 1.5
+    assert 1.0 <= delays[1] <= 3.0
+    usage = executor.get_usage()
+    assert usage.llm_calls == 1
+    assert usage.rate_limit_retries == 2
+
+
+@patch("onyx.indexing.contextual_rag.CONTEXTUAL_RAG_RATE_LIMIT_RETRIES", 1)
+@patch("onyx.indexing.contextual_rag.time.sleep")
+def test_invoke_gives_up_after_max_retries(mock_sleep: MagicMock) -> None:
+    llm = MagicMock()
+    llm.invoke.side_effect = LLMRateLimitError()
+    executor = _build_executor(llm)
+
+    with pytest.raises(LLMRateLimitError):
+        executor.invoke("document")
+
+    assert llm.invoke.call_count == 2
+    usage = executor.get_usage()
+    assert usage.llm_calls == 0
+    assert usage.failed_calls == 1
+    assert usage.rate_limit_retries == 1
+
+
+def test_invoke_limits_calls_in_flight() -> None:
+    in_flight = 0
+    max_seen = 0
+    lock = threading.Lock()
+
+    def slow_invoke(prompt: str, max_tokens: int) -> AIMessage:
+        nonlocal in_flight, max_seen
+        with lock:
+            in_flight += 1
+            max_seen = max(max_seen, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return AIMessage(content="summary")
+
+    llm = MagicMock()
+    llm.invoke.side_effect = slow_invoke
+    executor = _build_executor(llm, max_in_flight=2)
+
+    threads = [
+        threading.Thread(target=executor.invoke, args=(f"document {i}",))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_seen == 2
+    assert executor.get_usage().llm_calls == 8
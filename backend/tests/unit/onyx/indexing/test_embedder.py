@@ -2,12 +2,14 @@ from collections.abc import Generator
 from unittest.mock import Mock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.indexing.embedder import DefaultIndexingEmbedder
+from onyx.indexing.embedding_cache import PassageEmbeddingCache
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
@@ -103,3 +105,40 @@ def test_default_indexing_embedder_embed_chunks(
         tenant_id=None,
         request_id=None,
     )
+
+
+def test_passage_embedding_cache_only_embeds_misses() -> None:
+    cache = PassageEmbeddingCache(
+        model_name="test-model",
+        normalize=True,
+        passage_prefix=None,
+        provider_type=None,
+        deployment_name=None,
+        reduced_dimension=None,
+    )
+    cached_key = cache.build_key("cached text", large_chunks_present=False)
+    encode_func = Mock(return_value=[[4.0, 5.0], [6.0, 7.0]])
+
+    with patch("onyx.indexing.embedding_cache.get_session_with_current_tenant"), patch(
+        "onyx.indexing.embedding_cache.get_cached_embeddings",
+        return_value={cached_key: np.array([1.0, 2.0], dtype="<f4").tobytes()},
+    ), patch(
+        "onyx.indexing.embedding_cache.upsert_cached_embeddings"
+    ) as mock_upsert, patch(
+        "onyx.indexing.embedding_cache._maybe_prune_cache"
+    ):
+        result = cache.encode(
+            texts=["new text", "cached text", "other text", "new text"],
+            large_chunks_present=False,
+            encode_func=encode_func,
+        )
+
+    # duplicates and cached texts are not sent to the model server
+    encode_func.assert_called_once_with(["new text", "other text"])
+    assert result == [[4.0, 5.0], [1.0, 2.0], [6.0, 7.0], [4.0, 5.0]]
+    assert len(mock_upsert.call_args[0][1]) == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+    # any setting that changes the vector must change the key
+    assert cached_key != cache.build_key("cached text", large_chunks_present=True)
@@ -13,6 +13,7 @@ from onyx.connectors.models import ImageSection
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
+from onyx.indexing.indexing_pipeline import _build_image_summary_cache_key
 from onyx.indexing.indexing_pipeline import _get_aggregated_chunk_boost_factor
 from onyx.indexing.indexing_pipeline import add_contextual_summaries
 from onyx.indexing.indexing_pipeline import filter_documents
@@ -331,3 +332,87 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+def test_process_image_sections_dedupes_and_uses_cache() -> None:
+    images = {
+        "logo_a.png": b"logo",
+        "logo_b.png": b"logo",
+        "chart.png": b"chart",
+        "diagram.png": b"diagram",
+    }
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        sections=[
+            TextSection(text="intro", link="link1"),
+            *[
+                ImageSection(image_file_name=file_name, link=None)
+                for file_name in images
+            ],
+        ],
+    )
+
+    llm = Mock()
+    llm.config.model_provider = "openai"
+    llm.config.model_name = "gpt-4o"
+
+    summarized: list[bytes] = []
+
+    def mock_summarize(llm: Any, image_data: bytes, context_name: str) -> str:
+        summarized.append(image_data)
+        return f"summary of {image_data.decode()}"
+
+    def mock_get_pgfilestore(file_name: str, db_session: Any) -> Mock:
+        return Mock(lobj_oid=file_name, display_name=file_name)
+
+    def mock_read_lobj(lobj_oid: str, db_session: Any, mode: str) -> Mock:
+        return Mock(read=Mock(return_value=images[lobj_oid]))
+
+    diagram_key = _build_image_summary_cache_key(b"diagram", llm)
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline.get_image_extraction_and_analysis_enabled",
+            return_value=True,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_default_llm_with_vision",
+            return_value=llm,
+        ),
+        patch("onyx.indexing.indexing_pipeline.get_session_with_current_tenant"),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_pgfilestore_by_file_name",
+            side_effect=mock_get_pgfilestore,
+        ),
+        patch("onyx.indexing.indexing_pipeline.read_lobj", side_effect=mock_read_lobj),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_cached_image_summaries",
+            return_value={diagram_key: "cached diagram summary"},
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.upsert_cached_image_summaries"
+        ) as mock_upsert,
+        patch("onyx.indexing.indexing_pipeline.prune_image_summary_cache"),
+        patch(
+            "onyx.indexing.indexing_pipeline.summarize_image_with_error_handling",
+            side_effect=mock_summarize,
+        ),
+    ):
+        indexing_documents = process_image_sections([document])
+
+    # the repeated logo is summarized once and the diagram comes from the cache
+    assert sorted(summarized) == [b"chart", b"logo"]
+    assert [section.text for section in indexing_documents[0].processed_sections] == [
+        "intro",
+        "summary of logo",
+        "summary of logo",
+        "summary of chart",
+        "cached diagram summary",
+    ]
+    assert sorted(mock_upsert.call_args.args[1].values()) == [
+        "summary of chart",
+        "summary of logo",
+    ]
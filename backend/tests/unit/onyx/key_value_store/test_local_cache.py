@@ -0,0 +1,156 @@
+import json
+import queue
+import time
+from collections.abc import Callable
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.key_value_store.interface import KvKeyNotFoundError
+from onyx.key_value_store.local_cache import KvStoreLocalCache
+from onyx.key_value_store.store import PgRedisKVStore
+
+
+class _FakePubSub:
+    def __init__(self, broker: "_FakeRedis") -> None:
+        self._broker = broker
+        self.messages: queue.Queue[dict[str, Any]] = queue.Queue()
+
+    def subscribe(self, channel: str) -> None:
+        self._broker.subscribers.append(self)
+        self.messages.put({"type": "subscribe", "channel": channel, "data": 1})
+
+    def get_message(self, timeout: float) -> dict[str, Any] | None:
+        try:
+            return self.messages.get(timeout=min(timeout, 0.05))
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self._broker.subscribers.remove(self)
+
+
+class _FakeRedis:
+    """Just the pub/sub part of Redis, shared by the caches of all "processes"."""
+
+    def __init__(self) -> None:
+        self.subscribers: list[_FakePubSub] = []
+
+    def pubsub(self) -> _FakePubSub:
+        return _FakePubSub(self)
+
+    def publish(self, channel: str, data: str) -> None:
+        for subscriber in self.subscribers:
+            subscriber.messages.put(
+                {"type": "message", "channel": channel, "data": data.encode()}
+            )
+
+
+def _wait_for(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def fake_redis() -> Generator[_FakeRedis, None, None]:
+    fake_redis = _FakeRedis()
+    with patch(
+        "onyx.key_value_store.local_cache.get_raw_redis_client",
+        return_value=fake_redis,
+    ):
+        yield fake_redis
+
+
+def _build_store(
+    local_cache: KvStoreLocalCache, values: dict[str, Any]
+) -> PgRedisKVStore:
+    redis_client = MagicMock()
+    redis_client.get.side_effect = lambda key: (
+        json.dumps(values[key.removeprefix("onyx_kv_store:")]).encode()
+        if key.removeprefix("onyx_kv_store:") in values
+        else None
+    )
+    with patch(
+        "onyx.key_value_store.store.get_kv_store_local_cache",
+        return_value=local_cache,
+    ):
+        store = PgRedisKVStore(redis_client=redis_client)
+    # every key is in Redis or doesn't exist at all
+    session = MagicMock()
+    session.query.return_value.filter_by.return_value.first.return_value = None
+    store._get_session = MagicMock()  # type: ignore[method-assign]
+    store._get_session.return_value.__enter__.return_value = session
+    return store
+
+
+def _subscribed_cache() -> KvStoreLocalCache:
+    local_cache = KvStoreLocalCache(maxsize=16, ttl=60)
+    # starts the invalidation listener
+    _wait_for(local_cache._ensure_listener)
+    return local_cache
+
+
+def test_load_is_served_from_the_local_cache(fake_redis: _FakeRedis) -> None:
+    local_cache = _subscribed_cache()
+    store = _build_store(local_cache, {"settings": {"flags": ["a"]}})
+
+    value = store.load("settings")
+    value["flags"].append("mutated by the caller")  # type: ignore[index]
+    assert store.load("settings") == {"flags": ["a"]}
+    assert store.load("settings") == {"flags": ["a"]}
+    assert store.redis_client.get.call_count == 1  # type: ignore[attr-defined]
+
+    # missing keys are cached as well
+    for _ in range(3):
+        with pytest.raises(KvKeyNotFoundError):
+            store.load("missing")
+    assert store.redis_client.get.call_count == 2  # type: ignore[attr-defined]
+
+
+def test_invalidation_reaches_other_processes(fake_redis: _FakeRedis) -> None:
+    values = {"settings": "old"}
+    reader_cache = _subscribed_cache()
+    writer_cache = _subscribed_cache()
+    reader = _build_store(reader_cache, values)
+
+    assert reader.load("settings") == "old"
+    values["settings"] = "new"
+    assert reader.load("settings") == "old"
+
+    writer_cache.invalidate(reader.tenant_id, "settings")
+    _wait_for(lambda: reader_cache._cache.get((reader.tenant_id, "settings")) is None)
+    assert reader.load("settings") == "new"
+
+
+def test_value_read_before_an_invalidation_is_not_cached(
+    fake_redis: _FakeRedis,
+) -> None:
+    local_cache = _subscribed_cache()
+
+    generation = local_cache.generation
+    local_cache.invalidate_local("tenant", "settings")
+    local_cache.set("tenant", "settings", ("stale",), generation)
+    assert local_cache.get("tenant", "settings") is None
+
+    local_cache.set("tenant", "settings", ("fresh",), local_cache.generation)
+    assert local_cache.get("tenant", "settings") == ("fresh",)
+
+
+def test_cache_is_bypassed_without_a_subscription() -> None:
+    broken_redis = MagicMock()
+    broken_redis.pubsub.side_effect = ConnectionError("redis is down")
+    with patch(
+        "onyx.key_value_store.local_cache.get_raw_redis_client",
+        return_value=broken_redis,
+    ):
+        local_cache = KvStoreLocalCache(maxsize=16, ttl=60)
+        store = _build_store(local_cache, {"settings": "value"})
+
+        assert store.load("settings") == "value"
+        assert store.load("settings") == "value"
+        assert store.redis_client.get.call_count == 2  # type: ignore[attr-defined]
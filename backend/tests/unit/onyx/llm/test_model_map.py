@@ -0,0 +1,50 @@
+from collections.abc import Generator
+from unittest.mock import patch
+
+import pytest
+
+from onyx.llm.utils import get_model_map
+from onyx.llm.utils import model_supports_image_input
+from onyx.llm.utils import refresh_model_map
+
+
+@pytest.fixture(autouse=True)
+def fresh_model_map() -> Generator[None, None, None]:
+    refresh_model_map()
+    yield
+    refresh_model_map()
+
+
+def test_model_map_is_built_once_and_frozen() -> None:
+    with patch("onyx.llm.utils._build_model_map", return_value={}) as mock_build:
+        first = get_model_map()
+        second = get_model_map()
+
+    assert first is second
+    assert mock_build.call_count == 1
+
+    with pytest.raises(TypeError):
+        first["new-model"] = {}  # type: ignore[index]
+
+
+def test_model_map_entries_are_read_only() -> None:
+    model_map = get_model_map()
+
+    assert "ollama/gemma3:27b" in model_map
+    with pytest.raises(TypeError):
+        model_map["ollama/gemma3:27b"]["max_tokens"] = 1  # type: ignore[index]
+
+
+def test_refresh_model_map_picks_up_changes() -> None:
+    with patch(
+        "onyx.llm.utils._build_model_map",
+        return_value={"custom/vision-model": {"supports_vision": True}},
+    ):
+        assert model_supports_image_input("vision-model", "custom")
+
+    with patch("onyx.llm.utils._build_model_map", return_value={}):
+        # lookups are cached until the map is refreshed
+        assert model_supports_image_input("vision-model", "custom")
+
+        refresh_model_map()
+        assert not model_supports_image_input("vision-model", "custom")
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+from requests import Response
+
+from onyx.natural_language_processing.search_nlp_models import _parse_embed_response
+from shared_configs.utils import BINARY_EMBEDDING_MEDIA_TYPE
+from shared_configs.utils import encode_embeddings_binary
+
+_EMBEDDINGS = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+
+
+def _response(content: bytes, headers: dict[str, str]) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = content
+    response.headers.update(headers)
+    return response
+
+
+def test_parses_binary_embeddings() -> None:
+    payload, headers = encode_embeddings_binary(_EMBEDDINGS, "float32")
+    response = _response(
+        payload, {"content-type": BINARY_EMBEDDING_MEDIA_TYPE, **headers}
+    )
+
+    embeddings = _parse_embed_response(response).embeddings
+
+    assert all(isinstance(embedding, list) for embedding in embeddings)
+    assert np.allclose(embeddings, _EMBEDDINGS)
+
+
+def test_parses_float16_embeddings() -> None:
+    payload, headers = encode_embeddings_binary(_EMBEDDINGS, "float16")
+    response = _response(
+        payload, {"content-type": BINARY_EMBEDDING_MEDIA_TYPE, **headers}
+    )
+
+    embeddings = _parse_embed_response(response).embeddings
+
+    assert all(isinstance(value, float) for value in embeddings[0])
+    assert np.allclose(embeddings, _EMBEDDINGS, atol=1e-3)
+
+
+def test_falls_back_to_json() -> None:
+    # older model servers don't know about the binary format
+    response = _response(
+        json.dumps({"embeddings": _EMBEDDINGS}).encode(),
+        {"content-type": "application/json"},
+    )
+
+    assert _parse_embed_response(response).embeddings == _EMBEDDINGS
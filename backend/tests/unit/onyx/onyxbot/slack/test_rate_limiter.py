@@ -0,0 +1,183 @@
+from collections.abc import Generator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from onyx.onyxbot.slack.rate_limiter import _WAITER_TTL_SECONDS
+from onyx.onyxbot.slack.rate_limiter import check_message_limit
+from onyx.onyxbot.slack.rate_limiter import SlackRateLimiter
+
+# the start of a minute, so that windows of 60 seconds start there
+_START_TIME = 1_800_000_000.0 - 1_800_000_000.0 % 60
+
+
+class _Clock:
+    """Stands in for the time the Redis TIME command reports."""
+
+    def __init__(self) -> None:
+        self.now = _START_TIME
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Generator[_Clock, None, None]:
+    clock = _Clock()
+    with patch("fakeredis.commands_mixins.server_mixin.time", clock):
+        yield clock
+
+
+@pytest.fixture
+def redis_client() -> fakeredis.FakeRedis:
+    # runs the Lua scripts, which need lupa
+    return fakeredis.FakeRedis()
+
+
+def _build_limiter(redis_client: fakeredis.FakeRedis, max_qpm: int) -> SlackRateLimiter:
+    limiter = SlackRateLimiter("tenant", 1, redis_client=redis_client)
+    limiter.max_qpm = max_qpm
+    return limiter
+
+
+def _woken(redis_client: fakeredis.FakeRedis, waiter_id: str) -> bool:
+    return (
+        redis_client.lpop(f"slack_bot_rate_limit:tenant:1:wake:{waiter_id}") is not None
+    )
+
+
+def test_acquire_and_queue_position(
+    clock: _Clock, redis_client: fakeredis.FakeRedis
+) -> None:
+    limiter = _build_limiter(redis_client, max_qpm=2)
+
+    assert limiter._try_acquire("a") == (True, 0, 0)
+    assert limiter._try_acquire("b") == (True, 0, 0)
+
+    # out of tokens, one comes back every 30 seconds
+    assert limiter._try_acquire("c") == (False, 1, 30)
+    assert limiter._try_acquire("d") == (False, 2, 30)
+    assert limiter.get_queue_depth() == 2
+
+    # checking in again keeps the place in the queue and refreshes the liveness
+    clock.now += 10
+    assert limiter._try_acquire("d") == (False, 2, 20)
+    waiter_ttl = redis_client.ttl("slack_bot_rate_limit:tenant:1:waiter:d")
+    assert 0 < waiter_ttl <= _WAITER_TTL_SECONDS
+
+
+def test_waiters_are_served_in_order(
+    clock: _Clock, redis_client: fakeredis.FakeRedis
+) -> None:
+    limiter = _build_limiter(redis_client, max_qpm=1)
+    assert limiter._try_acquire("a")[0]
+    for waiter_id in ["b", "c", "d"]:
+        assert not limiter._try_acquire(waiter_id)[0]
+
+    clock.now += 60
+    # a token is available, but not for those behind the head of the queue
+    assert not limiter._try_acquire("c")[0]
+    assert not limiter._try_acquire("new")[0]
+
+    # the head takes it and wakes up the next waiter
+    assert limiter._try_acquire("b")[0]
+    assert _woken(redis_client, "c")
+    assert not _woken(redis_client, "d")
+
+    clock.now += 60
+    assert limiter._try_acquire("c")[0]
+    assert _woken(redis_client, "d")
+
+
+def test_leaving_the_head_of_the_queue_wakes_the_next_waiter(
+    clock: _Clock, redis_client: fakeredis.FakeRedis
+) -> None:
+    limiter = _build_limiter(redis_client, max_qpm=1)
+    assert limiter._try_acquire("a")[0]
+    for waiter_id in ["b", "c", "d"]:
+        assert not limiter._try_acquire(waiter_id)[0]
+
+    # leaving from the middle doesn't wake anyone
+    limiter._leave("c")
+    assert not _woken(redis_client, "d")
+
+    limiter._leave("b")
+    assert _woken(redis_client, "d")
+    assert limiter.get_queue_depth() == 1
+    assert limiter._try_acquire("d") == (False, 1, 60)
+
+
+def test_acquire_times_out_and_leaves_the_queue(
+    clock: _Clock, redis_client: fakeredis.FakeRedis
+) -> None:
+    limiter = _build_limiter(redis_client, max_qpm=1)
+    limiter.max_wait_time = 0.2
+    assert limiter._try_acquire("a")[0]
+
+    with patch.object(limiter, "notify") as notify:
+        with pytest.raises(TimeoutError):
+            limiter.acquire(MagicMock(), "channel", thread_ts=None)
+
+    assert notify.call_args.args[2] == 1
+    assert limiter.get_queue_depth() == 0
+
+
+def test_dead_waiters_are_dropped(
+    clock: _Clock, redis_client: fakeredis.FakeRedis
+) -> None:
+    limiter = _build_limiter(redis_client, max_qpm=1)
+    assert limiter._try_acquire("a")[0]
+    assert not limiter._try_acquire("b")[0]
+    assert not limiter._try_acquire("c")[0]
+
+    # b stopped checking in, e.g. its pod went away
+    redis_client.delete("slack_bot_rate_limit:tenant:1:waiter:b")
+    clock.now += 60
+    assert limiter._try_acquire("c")[0]
+    assert limiter.get_queue_depth() == 0
+
+
+def test_message_limit_window(clock: _Clock, redis_client: fakeredis.FakeRedis) -> None:
+    def allowed() -> bool:
+        return check_message_limit("tenant", 1, redis_client=redis_client)
+
+    with patch(
+        "onyx.onyxbot.slack.rate_limiter.DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD",
+        2,
+    ), patch(
+        "onyx.onyxbot.slack.rate_limiter.DANSWER_BOT_RESPONSE_LIMIT_TIME_PERIOD_SECONDS",
+        60,
+    ):
+        assert allowed()
+        assert allowed()
+        assert not allowed()
+
+        # the start of the next window still fully overlaps the previous one
+        clock.now += 60
+        assert not allowed()
+
+        # halfway through, half of the previous window's count is left
+        clock.now += 30
+        assert allowed()
+        assert not allowed()
+
+        # the window without any messages is the previous window now
+        clock.now += 90
+        assert allowed()
+        assert allowed()
+        assert not allowed()
+
+
+def test_no_limits_when_redis_fails() -> None:
+    broken_redis = MagicMock()
+    broken_redis.register_script.return_value.side_effect = RedisConnectionError(
+        "redis is down"
+    )
+    with patch(
+        "onyx.onyxbot.slack.rate_limiter.DANSWER_BOT_RESPONSE_LIMIT_PER_TIME_PERIOD",
+        1,
+    ):
+        assert check_message_limit("tenant", 1, redis_client=broken_redis)
@@ -0,0 +1,116 @@
+from collections.abc import Generator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.redis.redis_connector_credential_pair import RedisConnectorCredentialPair
+from onyx.redis.redis_document_set import RedisDocumentSet
+from onyx.redis.redis_usergroup import RedisUserGroup
+
+_DOC_IDS = [f"doc{i}" for i in range(5)]
+
+
+@pytest.fixture
+def redis_client() -> Generator[fakeredis.FakeRedis, None, None]:
+    redis_client = fakeredis.FakeRedis()
+    with patch(
+        "onyx.redis.redis_object_helper.get_redis_client", return_value=redis_client
+    ):
+        yield redis_client
+
+
+def _db_session(doc_ids: list[str]) -> MagicMock:
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(doc_ids)
+    return db_session
+
+
+def _sent_batches(celery_app: MagicMock) -> list[list[str]]:
+    batches = []
+    for call in celery_app.send_task.call_args_list:
+        assert call.args == (OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,)
+        assert call.kwargs["kwargs"]["tenant_id"] == "tenant"
+        batches.append(call.kwargs["kwargs"]["document_ids"])
+    return batches
+
+
+def test_document_set_sends_batches(redis_client: fakeredis.FakeRedis) -> None:
+    rds = RedisDocumentSet("tenant", 1)
+    celery_app = MagicMock()
+
+    with patch("onyx.redis.redis_document_set.VESPA_SYNC_BATCH_SIZE", 2), patch(
+        "onyx.redis.redis_document_set.construct_document_id_select_by_docset"
+    ):
+        result = rds.generate_tasks(
+            1000, celery_app, _db_session(_DOC_IDS), redis_client, MagicMock(), "tenant"
+        )
+
+    assert _sent_batches(celery_app) == [["doc0", "doc1"], ["doc2", "doc3"], ["doc4"]]
+    # the fence counts the tasks, one per batch
+    assert result == (3, 3)
+    assert redis_client.scard(rds.taskset_key) == 3
+
+
+def test_user_group_sends_batches(redis_client: fakeredis.FakeRedis) -> None:
+    rug = RedisUserGroup("tenant", 1)
+    celery_app = MagicMock()
+
+    with patch("onyx.redis.redis_usergroup.VESPA_SYNC_BATCH_SIZE", 2), patch(
+        "onyx.redis.redis_usergroup.global_version.is_ee_version", return_value=True
+    ), patch("onyx.redis.redis_usergroup.fetch_versioned_implementation"):
+        result = rug.generate_tasks(
+            1000, celery_app, _db_session(_DOC_IDS), redis_client, MagicMock(), "tenant"
+        )
+
+    assert _sent_batches(celery_app) == [["doc0", "doc1"], ["doc2", "doc3"], ["doc4"]]
+    assert result == (3, 3)
+    assert redis_client.scard(rug.taskset_key) == 3
+
+
+def test_cc_pair_sends_batches(redis_client: fakeredis.FakeRedis) -> None:
+    rcc = RedisConnectorCredentialPair("tenant", 1)
+    # already syncing through another cc pair
+    rcc.set_skip_docs({"doc1"})
+    celery_app = MagicMock()
+
+    with patch(
+        "onyx.redis.redis_connector_credential_pair.VESPA_SYNC_BATCH_SIZE", 2
+    ), patch(
+        "onyx.redis.redis_connector_credential_pair.get_connector_credential_pair_from_id"
+    ), patch(
+        "onyx.redis.redis_connector_credential_pair."
+        "construct_document_id_select_for_connector_credential_pair_by_needs_sync"
+    ):
+        result = rcc.generate_tasks(
+            1000, celery_app, _db_session(_DOC_IDS), redis_client, MagicMock(), "tenant"
+        )
+
+    assert _sent_batches(celery_app) == [["doc0", "doc2"], ["doc3", "doc4"]]
+    assert result == (2, 5)
+    assert redis_client.scard(rcc.taskset_key) == 2
+    assert rcc.skip_docs == set(_DOC_IDS)
+
+
+def test_cc_pair_stops_at_max_tasks(redis_client: fakeredis.FakeRedis) -> None:
+    rcc = RedisConnectorCredentialPair("tenant", 1)
+    celery_app = MagicMock()
+
+    with patch(
+        "onyx.redis.redis_connector_credential_pair.VESPA_SYNC_BATCH_SIZE", 2
+    ), patch(
+        "onyx.redis.redis_connector_credential_pair.get_connector_credential_pair_from_id"
+    ), patch(
+        "onyx.redis.redis_connector_credential_pair."
+        "construct_document_id_select_for_connector_credential_pair_by_needs_sync"
+    ):
+        result = rcc.generate_tasks(
+            2, celery_app, _db_session(_DOC_IDS), redis_client, MagicMock(), "tenant"
+        )
+
+    # the rest is picked up by the next run, it still needs a sync in the db
+    assert _sent_batches(celery_app) == [["doc0", "doc1"], ["doc2", "doc3"]]
+    assert result == (2, 4)
+    assert rcc.skip_docs == {"doc0", "doc1", "doc2", "doc3"}
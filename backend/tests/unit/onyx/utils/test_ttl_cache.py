@@ -0,0 +1,32 @@
+import time
+
+from onyx.utils.ttl_cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # touching "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1